@@ -0,0 +1,42 @@
+METRICS = [
+    ('indexing', 'total_seconds'),
+    ('indexing', 'documents_per_second'),
+    ('indexing', 'peak_rss_mb'),
+    ('search', 'throughput_qps'),
+    ('search', 'latency', 'p50_ms'),
+    ('search', 'latency', 'p99_ms'),
+    ('search', 'peak_rss_mb'),
+    ('startup', 'import_seconds'),
+    ('startup', 'warm_up_seconds'),
+    ('startup', 'query_setup_seconds'),
+]
+
+
+def _get(report: dict, path: tuple):
+    for key in path:
+        if not isinstance(report, dict) or key not in report:
+            return None
+        report = report[key]
+
+    return report
+
+
+def compare_reports(base: dict, head: dict) -> list[dict]:
+    """
+    Main metrics of two benchmark reports with the head/base ratio, indexing stages are included
+    """
+    stages = set(_get(base, ('indexing', 'stages_seconds')) or {})
+    stages |= set(_get(head, ('indexing', 'stages_seconds')) or {})
+    paths = METRICS + [('indexing', 'stages_seconds', stage) for stage in sorted(stages)]
+
+    rows = []
+    for path in paths:
+        base_value, head_value = _get(base, path), _get(head, path)
+        rows.append({
+            'metric': '.'.join(path),
+            'base': base_value,
+            'head': head_value,
+            'ratio': head_value / base_value if base_value and head_value is not None else None
+        })
+
+    return rows
@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+
+PERSIAN_LETTERS = list('ابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی')
+
+
+def zipf_weights(size: int, skew: float) -> np.ndarray:
+    weights = 1 / np.arange(1, size + 1) ** skew
+    return weights / weights.sum()
+
+
+def generate_vocabulary(size: int, seed: int = 0, min_length: int = 2, max_length: int = 8) -> list[str]:
+    """
+    Distinct random words of Persian letters, their order is their frequency rank
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = {}
+    while len(vocabulary) < size:
+        length = rng.integers(min_length, max_length + 1)
+        vocabulary[''.join(rng.choice(PERSIAN_LETTERS, size=length))] = None
+
+    return list(vocabulary)
+
+
+def generate_corpus(vocabulary: list[str], documents_count: int, skew: float = 1.0, min_length: int = 50,
+                    max_length: int = 300, seed: int = 0) -> dict:
+    """
+    Documents in the dataset format (doc_id -> title, content, url), words drawn from a Zipf distribution
+    """
+    rng = np.random.default_rng(seed)
+    weights = zipf_weights(len(vocabulary), skew)
+    words = np.asarray(vocabulary)
+
+    corpus = {}
+    for doc_id in range(documents_count):
+        tokens = words[rng.choice(len(words), size=rng.integers(min_length, max_length + 1), p=weights)]
+        corpus[str(doc_id)] = {
+            'title': ' '.join(tokens[:8]),
+            'content': ' '.join(tokens[8:]),
+            'url': f'https://example.com/news/{doc_id}'
+        }
+
+    return corpus
+
+
+def generate_query_log(vocabulary: list[str], queries_count: int, skew: float = 1.0, min_terms: int = 1,
+                       max_terms: int = 4, seed: int = 0) -> list[str]:
+    """
+    Queries of min_terms to max_terms words, words drawn from a Zipf distribution over the vocabulary
+    """
+    rng = np.random.default_rng(seed)
+    weights = zipf_weights(len(vocabulary), skew)
+    words = np.asarray(vocabulary)
+
+    return [
+        ' '.join(words[rng.choice(len(words), size=rng.integers(min_terms, max_terms + 1), p=weights)])
+        for _ in range(queries_count)
+    ]
+
+
+def write_corpus(corpus: dict, path: str):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(corpus, file, ensure_ascii=False)
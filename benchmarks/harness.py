@@ -0,0 +1,303 @@
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, chdir
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.infra.index_file import IndexFile
+from src.infra.repositories import IndexFileTermRepository, IndexFileDocumentRepository, IndexFileMetaRepository
+from src.usecases.index import DataLoader, Indexer
+from src.usecases.index.postings import PostingsBuilder
+from src.usecases.index.process_documents import process_documents
+from src.usecases.search import QueryProcessor, CandidatesRetriever, SimilarityCalculator, TopKRetriever, \
+    CorpusStatisticsCache, SearchQuery
+from src.usecases.utils import TextProcessor, FastTextProcessor, LemmaCache
+from src.utils.config import config
+
+
+class StageTimer:
+    """
+    Accumulates wall-clock seconds of named stages
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb() -> float | None:
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except OSError:
+        return None
+
+
+def latency_summary(seconds: list[float]) -> dict:
+    if not seconds:
+        return {'count': 0}
+
+    milliseconds = np.asarray(seconds) * 1000
+    return {
+        'count': len(milliseconds),
+        'mean_ms': float(milliseconds.mean()),
+        'p50_ms': float(np.percentile(milliseconds, 50)),
+        'p90_ms': float(np.percentile(milliseconds, 90)),
+        'p99_ms': float(np.percentile(milliseconds, 99)),
+        'max_ms': float(milliseconds.max())
+    }
+
+
+def run_isolated(function, *args, **kwargs):
+    """
+    Runs function in a forked process, so the memory high-water mark it reports belongs to this run only
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('fork')) as executor:
+        return executor.submit(function, *args, **kwargs).result()
+
+
+def new_text_processor() -> TextProcessor:
+    # a private lemma cache, so runs do not depend on a cache file warmed by earlier runs
+    text_processor_class = FastTextProcessor if config.FAST_TEXT_PROCESSING else TextProcessor
+    return text_processor_class(lemma_cache=LemmaCache(max_size=config.LEMMA_CACHE_SIZE))
+
+
+def shard_index_paths(index_path: str, shards_count: int) -> tuple[str, list[str]]:
+    """
+    Primary and shard index file paths of the sharded copy of the index at index_path
+    """
+    return f'{index_path}_primary', [f'{index_path}_shard_{shard}' for shard in range(shards_count)]
+
+
+def benchmark_indexing(corpus_path: str, index_path: str, workdir: str, workers: int = 1,
+                       chunk_size: int = 500, shards_count: int = 0) -> dict:
+    """
+    Same steps as Indexer.build_index and Indexer.main with the index file backend, timed stage by stage.
+    With shards_count, a sharded copy is saved as well (untimed) at the paths of shard_index_paths.
+    """
+    start_rss = current_rss_mb()
+    timer = StageTimer()
+    indexer = Indexer()
+
+    # the indexer writes removed top terms into data/ of the working directory
+    os.makedirs(os.path.join(workdir, 'data'), exist_ok=True)
+    with chdir(workdir):
+        with timer.stage('text_processor_init'):
+            text_processor = new_text_processor()
+
+        with timer.stage('load'):
+            df = DataLoader(corpus_path).load_data()
+
+        with timer.stage('tokenize'):
+            df = df.reset_index().rename(columns=dict(index='doc_id'))
+            documents_df = df[['doc_id', 'title', 'url']]
+            tokens = process_documents(texts=df['text'].tolist(), text_processor=text_processor,
+                                       workers=workers, chunk_size=chunk_size)
+
+        with timer.stage('aggregate'):
+            builder = PostingsBuilder()
+            builder.add_documents(doc_ids=df['doc_id'], tokens=tokens)
+            del tokens
+            postings = indexer._build_postings(builder=builder, text_processor=text_processor)
+            terms_df, postings, documents_df = indexer._finalize_index(postings=postings, documents_df=documents_df)
+
+        with timer.stage('champions'):
+            postings = indexer.mark_champions(postings=postings)
+
+        with timer.stage('save'):
+            indexer.save_to_index_file(terms_df=terms_df, postings=postings, documents_df=documents_df,
+                                       path=index_path)
+
+        if shards_count:
+            # like Indexer.save_to_shards: postings on the shards, every term and document on the primary
+            primary_path, shard_paths = shard_index_paths(index_path=index_path, shards_count=shards_count)
+            for shard_path, (shard_terms_df, shard_postings, shard_documents_df) in zip(
+                    shard_paths, indexer.split_into_shards(terms_df=terms_df, postings=postings,
+                                                           documents_df=documents_df, shards_count=shards_count)):
+                indexer.save_to_index_file(terms_df=shard_terms_df, postings=shard_postings,
+                                           documents_df=shard_documents_df, path=shard_path)
+            indexer.save_to_index_file(terms_df=terms_df, postings=postings.filter(np.zeros(len(postings), dtype=bool)),
+                                       documents_df=documents_df, path=primary_path)
+
+    return {
+        'documents': len(documents_df),
+        'terms': len(terms_df),
+        'postings': len(postings),
+        'stages_seconds': timer.stages,
+        'total_seconds': sum(timer.stages.values()),
+        'documents_per_second': len(documents_df) / timer.stages['tokenize'],
+        'start_rss_mb': start_rss,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def benchmark_search(index_path: str, queries: list[str], page_size: int = 10) -> dict:
+    """
+    Latency of each search stage for every query of the log, with the in-process index file repositories.
+    Queries are grouped by the deepest filter level the cascade needed.
+    """
+    start_rss = current_rss_mb()
+    index = IndexFile(index_path)
+    term_repository = IndexFileTermRepository(index=index)
+    document_repository = IndexFileDocumentRepository(index=index)
+
+    init_start = time.perf_counter()
+    text_processor = new_text_processor()
+    text_processor_init_seconds = time.perf_counter() - init_start
+
+    stage_seconds = {}
+    level_seconds = {}
+    total_seconds = []
+
+    for query in queries:
+        timer = StageTimer()
+
+        with timer.stage('process_query'):
+            query_df = QueryProcessor(term_repository=term_repository,
+                                      text_processor=text_processor).process_query(query=query)
+
+        if len(query_df) == 0:
+            level = 'no_terms'
+        elif config.TOP_K_RETRIEVAL:
+            level = 'top_k'
+            with timer.stage('top_k_retrieval'):
+                ranked = TopKRetriever(document_repository=document_repository,
+                                       term_repository=term_repository).retrieve(query_df=query_df, k=page_size)
+        else:
+            retriever = CandidatesRetriever(document_repository=document_repository, term_repository=term_repository)
+            with timer.stage('retrieve_candidates'):
+                candidates_df = retriever.retrieve_candidates(query_terms=query_df['term'].tolist())
+            level = f'level_{retriever.last_filter_level}'
+
+            with timer.stage('calculate_similarity'):
+                similarities = SimilarityCalculator().calculate_similarity(query_df=query_df,
+                                                                           candidates_df=candidates_df)
+            with timer.stage('select_top_k'):
+                ranked = TopKRetriever.select_top_k(similarities, k=page_size)
+
+        if len(query_df) > 0:
+            with timer.stage('fetch_documents'):
+                document_repository.get_documents_by_doc_ids(ranked['doc_id'].tolist())
+
+        for stage, seconds in timer.stages.items():
+            stage_seconds.setdefault(stage, []).append(seconds)
+
+        query_seconds = sum(timer.stages.values())
+        level_seconds.setdefault(level, []).append(query_seconds)
+        total_seconds.append(query_seconds)
+
+    return {
+        'queries': len(queries),
+        'text_processor_init_seconds': text_processor_init_seconds,
+        'total_seconds': sum(total_seconds),
+        'throughput_qps': len(queries) / sum(total_seconds) if total_seconds else 0.0,
+        'latency': latency_summary(total_seconds),
+        'stages': {stage: latency_summary(seconds) for stage, seconds in stage_seconds.items()},
+        'by_filter_level': {level: latency_summary(seconds) for level, seconds in sorted(level_seconds.items())},
+        'start_rss_mb': start_rss,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def _same_results(results: list[dict], other_results: list[dict]) -> bool:
+    return [result['doc_id'] for result in results] == [result['doc_id'] for result in other_results] and \
+        np.allclose([result['similarity'] for result in results],
+                    [result['similarity'] for result in other_results])
+
+
+def benchmark_sharded_batch_search(index_path: str, shards_count: int, queries: list[str],
+                                   page_size: int = 10) -> dict:
+    """
+    SearchQuery.search_many against main per query on the sharded copy of the index written by benchmark_indexing,
+    queries whose pages differ are reported as mismatches
+    """
+    primary_path, shard_paths = shard_index_paths(index_path=index_path, shards_count=shards_count)
+    primary = IndexFile(primary_path)
+    term_repository = IndexFileTermRepository(index=primary)
+    document_repository = IndexFileDocumentRepository(index=primary)
+
+    shards = []
+    for shard_path in shard_paths:
+        shard = IndexFile(shard_path)
+        shards.append((IndexFileTermRepository(index=shard), IndexFileDocumentRepository(index=shard)))
+
+    search_query = SearchQuery(
+        document_repository=document_repository,
+        term_repository=term_repository,
+        statistics_cache=CorpusStatisticsCache(term_repository=term_repository,
+                                               document_repository=document_repository,
+                                               index_meta_repository=IndexFileMetaRepository(index=primary)),
+        text_processor=new_text_processor(),
+        shards=shards
+    )
+
+    start = time.perf_counter()
+    main_results = [search_query.main(query=query, page_size=page_size) for query in queries]
+    main_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_results = search_query.search_many(queries=queries, page_size=page_size)
+    search_many_seconds = time.perf_counter() - start
+
+    return {
+        'queries': len(queries),
+        'shards': shards_count,
+        'mismatches': [query for query, results, other_results in zip(queries, main_results, batch_results)
+                       if not _same_results(results, other_results)],
+        'main_seconds': main_seconds,
+        'search_many_seconds': search_many_seconds,
+        'speedup': main_seconds / search_many_seconds if search_many_seconds else 0.0
+    }
+
+
+def benchmark_startup(index_path: str, query: str) -> dict:
+    """
+    Import, model loading and first query seconds of a new search process on the index file
+    """
+    environment = os.environ | {'INDEX_BACKEND': 'index_file', 'INDEX_FILE_PATH': index_path}
+    project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.startup', query], env=environment, cwd=project_path,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def get_environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'config': config.model_dump(exclude={'DATABASE_URL'})
+    }
@@ -0,0 +1,168 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.corpus import generate_vocabulary, generate_corpus, write_corpus
+from benchmarks.harness import benchmark_indexing, new_text_processor, latency_summary
+from src.infra.index_file import IndexFile
+from src.infra.repositories import IndexFileDocumentRepository
+from src.usecases.search import PositionalConstraint, PositionalQueryParser, PositionalMatcher
+from src.usecases.utils import TextProcessor, load_stop_terms
+from src.utils.config import config
+
+
+def generate_positional_queries(corpus: dict, text_processor: TextProcessor, queries_count: int,
+                                max_distance: int = 5, seed: int = 0) -> list[tuple[str, int, list[str]]]:
+    """
+    Quoted phrases of 2 or 3 consecutive tokens of a random document, and NEAR/k of two tokens a few positions
+    apart, each with the doc id of the document it was taken from and its tokens.
+    Queries are built from the processed tokens, whose places are the indexed positions: normalization can join
+    neighbouring raw words into one token, so raw words would not be at the positions of the index.
+    """
+    rng = np.random.default_rng(seed)
+    doc_ids = list(corpus)
+    documents_tokens = {}
+
+    queries = []
+    while len(queries) < queries_count:
+        doc_id = doc_ids[rng.integers(len(doc_ids))]
+        if doc_id not in documents_tokens:
+            documents_tokens[doc_id] = text_processor.process_text(text=corpus[doc_id]['content'])
+        tokens = documents_tokens[doc_id]
+        if len(tokens) <= max_distance + 1:
+            continue
+
+        length = int(rng.integers(2, 4))
+        start = int(rng.integers(len(tokens) - max_distance - 1))
+
+        if len(queries) % 2 == 0:
+            phrase_tokens = tokens[start:start + length]
+            queries.append(('"' + ' '.join(phrase_tokens) + '"', int(doc_id), phrase_tokens))
+        else:
+            distance = int(rng.integers(1, max_distance + 1))
+            near_tokens = [tokens[start], tokens[start + distance]]
+            queries.append((f'{near_tokens[0]} NEAR/{distance} {near_tokens[1]}', int(doc_id), near_tokens))
+
+    return queries
+
+
+def naive_match(index: IndexFile, constraint: PositionalConstraint) -> np.ndarray:
+    """
+    Positional check on the whole postings of every term: all their positions are decoded, and every document
+    containing all terms is checked
+    """
+    positions = {}
+    for term in set(constraint.terms):
+        if term not in index.term_ids:
+            return np.array([], dtype=np.int64)
+
+        postings = index.get_postings_slice(term)
+        positions[term] = {
+            doc_id: set(index.get_positions(posting).tolist())
+            for posting, doc_id in zip(range(postings.start, postings.stop), index.postings_doc_ids[postings].tolist())
+        }
+
+    doc_ids = set.intersection(*(set(term_positions) for term_positions in positions.values()))
+
+    matched = []
+    for doc_id in doc_ids:
+        if constraint.is_phrase:
+            first_term, first_offset = constraint.terms[0], constraint.offsets[0]
+            is_match = any(
+                all(start + offset in positions[term][doc_id] for term, offset in
+                    zip(constraint.terms, constraint.offsets))
+                for start in (position - first_offset for position in positions[first_term][doc_id])
+            )
+        else:
+            left, right = (positions[term][doc_id] for term in constraint.terms)
+            is_match = any(abs(position - other) <= constraint.distance and (position != other or left is not right)
+                           for position in left for other in right)
+        if is_match:
+            matched.append(doc_id)
+
+    return np.array(sorted(matched), dtype=np.int64)
+
+
+def benchmark_positional_queries(documents_count: int = 2000, vocabulary_size: int = 20000, corpus_skew: float = 1.0,
+                                 queries_count: int = 200, seed: int = 0) -> dict:
+    text_processor = new_text_processor()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = generate_corpus(generate_vocabulary(vocabulary_size, seed=seed), documents_count, skew=corpus_skew,
+                                 seed=seed)
+        corpus_path = os.path.join(workdir, 'corpus.json')
+        write_corpus(corpus, corpus_path)
+
+        index_path = os.path.join(workdir, 'index')
+        indexing = benchmark_indexing(corpus_path=corpus_path, index_path=index_path, workdir=workdir)
+        index = IndexFile(index_path)
+
+        # the indexer writes the removed top terms relative to its working directory
+        removed_terms = load_stop_terms(os.path.join(workdir, config.STOP_TERMS_PATH))
+        parser = PositionalQueryParser(text_processor=text_processor, removed_terms=removed_terms)
+        document_frequencies = dict(zip(index.terms, np.asarray(index.document_frequencies).tolist()))
+        matcher = PositionalMatcher(document_repository=IndexFileDocumentRepository(index=index))
+
+        # phrases with removed top terms are kept, their other words still have to match at their offsets.
+        # A token processed again may not give itself back (the lemma of a lemma), such queries are left out as
+        # their constraint is not the one of the source document.
+        queries, removed_term_queries, reprocessed_queries = [], 0, 0
+        for query, source_doc_id, tokens in generate_positional_queries(corpus, text_processor=text_processor,
+                                                                        queries_count=queries_count * 10, seed=seed):
+            _, constraints = parser.parse(query)
+            if not constraints:
+                continue
+            if [term for constraint in constraints for term in constraint.terms] != \
+                    [token for token in tokens if token not in removed_terms]:
+                reprocessed_queries += 1
+                continue
+
+            queries.append((constraints, source_doc_id))
+            removed_term_queries += bool(removed_terms.intersection(tokens))
+            if len(queries) == queries_count:
+                break
+
+        mismatches, missed_sources, naive_seconds, matcher_seconds, matched_documents = [], [], [], [], 0
+        for constraints, source_doc_id in queries:
+            start = time.perf_counter()
+            naive_doc_ids = [naive_match(index, constraint) for constraint in constraints]
+            naive_seconds.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            doc_ids = [matcher.match(constraint, document_frequencies=document_frequencies)
+                       for constraint in constraints]
+            matcher_seconds.append(time.perf_counter() - start)
+
+            matched_documents += sum(len(constraint_doc_ids) for constraint_doc_ids in doc_ids)
+            if any(not np.array_equal(expected, found) for expected, found in zip(naive_doc_ids, doc_ids)):
+                mismatches.append([constraint.key() for constraint in constraints])
+            # a query taken from a document matches at least that document
+            if any(source_doc_id not in found for found in doc_ids):
+                missed_sources.append([constraint.key() for constraint in constraints])
+
+        positions_count = int(np.asarray(index.postings_term_frequencies).sum())
+        encoded_bytes = int(index.postings_positions.nbytes)
+
+    return {
+        'documents': indexing['documents'],
+        'postings': indexing['postings'],
+        'queries': len(queries),
+        'removed_term_queries': removed_term_queries,
+        'reprocessed_queries': reprocessed_queries,
+        'matched_documents': matched_documents,
+        'mismatches': mismatches,
+        'missed_sources': missed_sources,
+        'positions': {
+            'count': positions_count,
+            # Neo4j stores an integer array with 8 bytes per element
+            'list_bytes': positions_count * 8,
+            'encoded_bytes': encoded_bytes,
+            'compression_ratio': positions_count * 8 / encoded_bytes if encoded_bytes else 0.0
+        },
+        'naive': latency_summary(naive_seconds),
+        'positional_matcher': latency_summary(matcher_seconds),
+        'positions_fetched': matcher.positions_fetched,
+        'speedup': sum(naive_seconds) / sum(matcher_seconds) if sum(matcher_seconds) else 0.0
+    }
@@ -0,0 +1,45 @@
+import json
+import sys
+import time
+
+
+def measure_startup(query: str, repeats: int = 20) -> dict:
+    """
+    Cold start of a search process, to be run in a new interpreter so that no module is imported yet
+    """
+    start = time.perf_counter()
+    from src.usecases.search import SearchQuery
+    from src.usecases.utils import get_processing_context
+    import_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_seconds = get_processing_context().warm_up()
+    warm_up_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    search_query = SearchQuery()
+    search_query.main(query=query)
+    first_query_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    search_query.main(query=query)
+    second_query_seconds = time.perf_counter() - start
+
+    # what every search pays before its own work: the search object and a text processor
+    start = time.perf_counter()
+    for _ in range(repeats):
+        SearchQuery()._get_query_processor().get_text_processor()
+    query_setup_seconds = (time.perf_counter() - start) / repeats
+
+    return {
+        'import_seconds': import_seconds,
+        'warm_up_seconds': warm_up_seconds,
+        'load_seconds': load_seconds,
+        'first_query_seconds': first_query_seconds,
+        'second_query_seconds': second_query_seconds,
+        'query_setup_seconds': query_setup_seconds
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(measure_startup(query=sys.argv[1])))
@@ -0,0 +1,127 @@
+import time
+
+import numpy as np
+
+from src.usecases.utils import TextProcessor, FastTextProcessor, LemmaCache
+from src.utils.config import config
+
+# news-like sentences with the entities, spacings and characters the normalizer and tokenizer deal with
+GOLDEN_TEXTS = [
+    'به گزارش خبرگزاری ایرنا، رئیس جمهور روز دوشنبه ۱۲ مهر ۱۴۰۲ در جلسه هیئت دولت گفت: «اقتصاد کشور در حال بهبود است».',
+    'قیمت دلار در بازار آزاد امروز به 48,500 تومان رسید و نرخ تورم 45.3 درصد اعلام شد.',
+    'برای اطلاعات بیشتر به سایت www.irna.ir مراجعه کنید یا با ایمیل info@irna.ir تماس بگیرید.',
+    'کاربران در توییتر با هشتگ #انتخابات_۱۴۰۲ و آیدی @khamenei_ir واکنش نشان دادند.',
+    'تیم ملی فوتبال ايران در بازي ديروز با نتيجه ۲ بر ۱ پيروز شد و به مرحله بعد صعود کرد.',
+    'وزیر آموزش و پرورش گفته شده است که کتاب های درسی جدید تا پایان شهریور توزیع خواهد شد.',
+    'دانش آموزان می توانند از امروز در سامانه ثبت نام کنند و نتایج تا ۲۰ روز آینده اعلام میشود.',
+    'زمین لرزه ای به بزرگی ۵٫۴ ریشتر شهر کرمان را لرزاند؛ خوشبختانه تلفات جانی نداشت!',
+    'مدیرعامل شرکت (که نامش اعلام نشد) گفت: «ما نمیخواهیم قیمت ها را افزایش دهیم».',
+    'سلاممممم به همه دوستان عزیزززز که این خبر را دنبال میکنند.',
+    'بر اساس آمار مرکز آمار، جمعیت کشور به ۸۵ میلیون و ۳۰۰ هزار نفر رسیده است.',
+    'او در سال 2023 به عنوان بهترین بازیکن آسیا انتخاب شد و جایزه اش را دریافت کرد.',
+    'مذاکرات هسته‌ای ایران و گروه ۵+۱ در وین از سر گرفته شد... نتیجه هنوز مشخص نیست؟',
+    'آیت‌الله ﷲ و پیامبر اکرم ﷺ در سخنان امام جمعه تهران مورد اشاره قرار گرفتند.',
+    'قرارداد به مبلغ ۱۲۰۰۰۰۰۰۰ ﷼ امضا شد و پروژه تا ۱۴۰۳/۰۶/۳۱ به پایان می رسد.',
+    'ساعت ۲۲:۳۰ شب گذشته، آتش سوزی در انبار کالا در جنوب تهران رخ داد.',
+    'مَدرسه‌ی ما بزرگ‌ترین مدرسه‌ی شهر است و دانش‌آموزانِ زیادی دارد.',
+    'شرکت‌ها باید گزارش‌های مالی خود را تا پایان خرداد ماه ارائه دهند - این قانون جدید است.',
+    'https://www.example.com/news/12345?id=7&ref=home لینک خبر کامل است.',
+    'کارشناسان معتقدند “رشد اقتصادی” در سال آینده کمتر از ۳ درصد خواهد بود.',
+    'درصد افزایش حقوق کارمندان ۲۰٪ تعیین شد و از فروردین اعمال می‌شود.',
+    'بازیکنان تیم های لیگ برتر نمی‌توانند بیش از دو قرارداد همزمان داشته باشند.',
+    'جشنواره فیلم فجر با حضور هنرمندان ، منتقدان و مردم در تالار وحدت برگزار شد .',
+    'تعداد مبتلایان به کرونا در ۲۴ ساعت گذشته ۱،۲۳۴ نفر گزارش شده‌است.',
+    'وی افزود :  این طرح\tبه زودی\r\nاجرایی خواهد شد و مردم\xa0منتظر باشند .',
+    'شنبهها و یکشنبهها بازار بستهــــــ است و کتابها در خانه ای قدیمی نگهداری میشوند‌‌.',
+    'نمايندگان مجلس درباره لايحه بودجه ١٤٠٣ و نرخ ٢٥ درصدی ماليات بحث كردند.',
+    'پیام ها به آدرس news-desk@example.co.ir و صفحه instagram.com/irna_news ارسال شود.',
+    'رشد ۱٬۲۵۰٫۵ میلیارد تومانی صادرات در فصل بهار و ۳.۱۴ درصد کاهش واردات ثبت شد.',
+    'اِعلاممممم کَرد : « زمین لرزه ای به بُزرگیِ 6 دهم ریشتر ...»',
+]
+
+
+def generate_documents(documents_count: int, sentences_per_document: int = 12, seed: int = 0) -> list[str]:
+    """
+    Documents of golden texts drawn at random, a line break every few sentences
+    """
+    rng = np.random.default_rng(seed)
+    documents = []
+    for _ in range(documents_count):
+        sentences = [GOLDEN_TEXTS[index] for index in rng.integers(len(GOLDEN_TEXTS), size=sentences_per_document)]
+        documents.append('\n'.join(' '.join(sentences[start:start + 4]) for start in range(0, len(sentences), 4)))
+
+    return documents
+
+
+def new_text_processors() -> tuple[TextProcessor, FastTextProcessor]:
+    # both processors share the loaded models, each with a private lemma cache
+    text_processor = TextProcessor(lemma_cache=LemmaCache(max_size=config.LEMMA_CACHE_SIZE))
+    fast_text_processor = FastTextProcessor(
+        lemma_cache=LemmaCache(max_size=config.LEMMA_CACHE_SIZE),
+        normalizer=text_processor.normalizer,
+        tokenizer=text_processor.tokenizer.fork(),
+        lemmatizer=text_processor.lemmatizer
+    )
+
+    return text_processor, fast_text_processor
+
+
+def check_equivalence(texts: list[str], text_processor: TextProcessor,
+                      fast_text_processor: FastTextProcessor) -> dict:
+    """
+    Texts whose tokens differ between the processors, and how many texts the fast processor left to the other one
+    """
+    fallbacks = fast_text_processor.fallbacks
+    mismatches = []
+    for text in texts:
+        tokens, fast_tokens = text_processor.process_text(text), fast_text_processor.process_text(text)
+        if tokens != fast_tokens:
+            mismatches.append({'text': text, 'tokens': tokens, 'fast_tokens': fast_tokens})
+
+    return {
+        'texts': len(texts),
+        'mismatches': mismatches,
+        'fallbacks': fast_text_processor.fallbacks - fallbacks
+    }
+
+
+def measure_throughput(text_processor: TextProcessor, documents: list[str], repeats: int = 3) -> dict:
+    """
+    Documents per second of the best of repeats, the first pass fills the lemma cache
+    """
+    for document in documents:
+        text_processor.process_text(document)
+
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for document in documents:
+            text_processor.process_text(document)
+        seconds.append(time.perf_counter() - start)
+
+    return {
+        'seconds': min(seconds),
+        'documents_per_second': len(documents) / min(seconds)
+    }
+
+
+def benchmark_text_processing(documents_count: int = 500, sentences_per_document: int = 12, repeats: int = 3,
+                              seed: int = 0) -> dict:
+    text_processor, fast_text_processor = new_text_processors()
+
+    golden = check_equivalence(GOLDEN_TEXTS, text_processor, fast_text_processor)
+
+    documents = generate_documents(documents_count, sentences_per_document=sentences_per_document, seed=seed)
+    corpus = check_equivalence(documents, text_processor, fast_text_processor)
+
+    text_processor_throughput = measure_throughput(text_processor, documents, repeats=repeats)
+    fast_text_processor_throughput = measure_throughput(fast_text_processor, documents, repeats=repeats)
+
+    return {
+        'golden': golden,
+        'corpus': corpus,
+        'text_processor': text_processor_throughput,
+        'fast_text_processor': fast_text_processor_throughput,
+        'speedup': fast_text_processor_throughput['documents_per_second']
+        / text_processor_throughput['documents_per_second']
+    }
@@ -1,8 +1,16 @@
 import streamlit as st
 from src.usecases.search import SearchQuery
+from src.usecases.utils import get_processing_context
 from time import time
 
 
+@st.cache_resource
+def get_search_query() -> SearchQuery:
+    # built once per server process, reruns of the script reuse it with the loaded text processing models
+    get_processing_context().warm_up()
+    return SearchQuery()
+
+
 st.title("NEO-IR Search Panel")
 st.subheader("Search documents using TF-IDF and Cosine Similarity.")
 
@@ -11,7 +19,7 @@ query = st.text_input("Enter your search query:")
 page_size = st.selectbox("Results per page:", [5, 10, 20, 50], index=1)
 page = st.number_input("Page number:", min_value=1, value=1, step=1)
 
-search_query = SearchQuery()
+search_query = get_search_query()
 
 if st.button("Search"):
     if query.strip():
@@ -23,6 +31,9 @@ if st.button("Search"):
 
         st.success(f"Time token: {elapsed_time:.2f} seconds.")
 
+        if search_query.result_cache is not None:
+            st.caption(f"Result cache hit rate: {search_query.result_cache.hit_rate:.0%}")
+
         if results:
             for result in results:
                 st.divider()
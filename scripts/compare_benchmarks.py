@@ -0,0 +1,17 @@
+import argparse
+import json
+
+from benchmarks.compare import compare_reports
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare two reports of run_benchmarks.')
+    parser.add_argument('base')
+    parser.add_argument('head')
+    args = parser.parse_args()
+
+    with open(args.base) as base_file, open(args.head) as head_file:
+        rows = compare_reports(base=json.load(base_file), head=json.load(head_file))
+
+    for row in rows:
+        ratio = f"{row['ratio']:.3f}" if row['ratio'] is not None else '-'
+        print(f"{row['metric']:<45} {row['base'] or 0:>12.3f} {row['head'] or 0:>12.3f} {ratio:>8}")
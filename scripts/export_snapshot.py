@@ -0,0 +1,11 @@
+import argparse
+
+from src.usecases.index import IndexSnapshot
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the index of the database into a snapshot directory.')
+    parser.add_argument('path', help='snapshot directory')
+    parser.add_argument('--terms-batch-size', type=int, default=1000, help='terms whose postings are read per query')
+    args = parser.parse_args()
+
+    IndexSnapshot().export(path=args.path, terms_batch_size=args.terms_batch_size)
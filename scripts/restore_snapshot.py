@@ -0,0 +1,11 @@
+import argparse
+
+from src.usecases.index import IndexSnapshot
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load a snapshot directory into an empty database.')
+    parser.add_argument('path', help='snapshot directory')
+    parser.add_argument('--force', action='store_true', help='delete the index of a database that is not empty')
+    args = parser.parse_args()
+
+    IndexSnapshot.restore(path=args.path, force=args.force)
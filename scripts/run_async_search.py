@@ -0,0 +1,26 @@
+import argparse
+import asyncio
+import json
+
+from src.usecases.search import create_async_search_service
+
+
+async def main(queries: list[str], page: int, page_size: int):
+    service = create_async_search_service()
+    try:
+        results = await asyncio.gather(*(service.search(query=query, page=page, page_size=page_size)
+                                         for query in queries))
+    finally:
+        await service.close()
+
+    print(json.dumps(dict(zip(queries, results)), indent=4, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Search queries concurrently with the async search service.')
+    parser.add_argument('queries', nargs='+')
+    parser.add_argument('--page', type=int, default=1)
+    parser.add_argument('--page-size', type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main(queries=args.queries, page=args.page, page_size=args.page_size))
@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.corpus import generate_vocabulary, generate_corpus, generate_query_log, write_corpus
+from benchmarks.harness import run_isolated, benchmark_indexing, benchmark_search, benchmark_startup, \
+    benchmark_sharded_batch_search, get_environment
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Index a synthetic corpus and replay a query log against it.')
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--vocabulary', type=int, default=20_000)
+    parser.add_argument('--corpus-skew', type=float, default=1.0, help='zipf exponent of words in documents')
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--query-skew', type=float, default=1.0, help='zipf exponent of words in queries')
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=1, help='text processing processes of the indexer')
+    parser.add_argument('--shards', type=int, default=3, help='shards of the index searched by search_many and main')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='json report path, data/benchmarks/<commit>.json by default')
+    args = parser.parse_args()
+
+    environment = get_environment()
+    parameters = vars(args).copy()
+    output = parameters.pop('output') or os.path.join('data', 'benchmarks', f"{environment['commit'] or 'local'}.json")
+
+    vocabulary = generate_vocabulary(size=args.vocabulary, seed=args.seed)
+    queries = generate_query_log(vocabulary=vocabulary, queries_count=args.queries, skew=args.query_skew,
+                                 seed=args.seed + 1)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus_path = os.path.join(workdir, 'corpus.json')
+        index_path = os.path.join(workdir, 'index')
+
+        start = time.perf_counter()
+        write_corpus(generate_corpus(vocabulary=vocabulary, documents_count=args.documents, skew=args.corpus_skew,
+                                     seed=args.seed), corpus_path)
+        corpus_seconds = time.perf_counter() - start
+
+        indexing = run_isolated(benchmark_indexing, corpus_path=corpus_path, index_path=index_path,
+                                workdir=workdir, workers=args.workers, shards_count=args.shards)
+        search = run_isolated(benchmark_search, index_path=index_path, queries=queries, page_size=args.page_size)
+        sharded_batch_search = run_isolated(benchmark_sharded_batch_search, index_path=index_path,
+                                            shards_count=args.shards, queries=queries, page_size=args.page_size) \
+            if args.shards else None
+        startup = benchmark_startup(index_path=index_path, query=queries[0])
+
+    report = {
+        'environment': environment,
+        'parameters': parameters,
+        'corpus_generation_seconds': corpus_seconds,
+        'indexing': indexing,
+        'search': search,
+        'sharded_batch_search': sharded_batch_search,
+        'startup': startup
+    }
+
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=4)
+
+    print(f'Benchmark report written to {output}')
+
+    if sharded_batch_search and sharded_batch_search['mismatches']:
+        raise SystemExit(f"search_many differs from main on {len(sharded_batch_search['mismatches'])} queries "
+                         f"of the sharded index")
@@ -0,0 +1,14 @@
+import argparse
+
+from src.usecases.index import DataLoader
+from src.usecases.index.incremental import IncrementalIndexer
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Upsert and delete documents of an existing index.')
+    parser.add_argument('--documents', help='json file of new or changed documents, same format as the dataset')
+    parser.add_argument('--deleted', type=int, nargs='*', default=[], help='doc ids to remove')
+    args = parser.parse_args()
+
+    df = DataLoader(args.documents).load_data() if args.documents else None
+
+    IncrementalIndexer().update(df=df, deleted_doc_ids=args.deleted)
@@ -0,0 +1,38 @@
+import argparse
+import json
+
+from benchmarks.positional import benchmark_positional_queries
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare phrase and NEAR/k matching of PositionalMatcher with a naive '
+                                                 'positional check on a synthetic index file.')
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--corpus-skew', type=float, default=1.0)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='json report path')
+    args = parser.parse_args()
+
+    report = benchmark_positional_queries(documents_count=args.documents, vocabulary_size=args.vocabulary,
+                                          corpus_skew=args.corpus_skew, queries_count=args.queries, seed=args.seed)
+
+    positions = report['positions']
+    print(f"positions {positions['count']}  list bytes {positions['list_bytes']}  "
+          f"encoded bytes {positions['encoded_bytes']}  ratio {positions['compression_ratio']:.2f}x")
+    for name in ('naive', 'positional_matcher'):
+        print(f"{name:<20} mean {report[name]['mean_ms']:>8.3f} ms  p90 {report[name]['p90_ms']:>8.3f} ms")
+    print(f"queries {report['queries']}  with removed top terms {report['removed_term_queries']}  "
+          f"left out as reprocessed tokens differ {report['reprocessed_queries']}  "
+          f"matched documents {report['matched_documents']}")
+    print(f"mismatches {len(report['mismatches'])}  missed source documents {len(report['missed_sources'])}  "
+          f"speedup {report['speedup']:.2f}x")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=4, ensure_ascii=False)
+
+    if report['mismatches']:
+        raise SystemExit('PositionalMatcher documents differ from the naive positional check')
+    if report['missed_sources']:
+        raise SystemExit('Queries did not match the documents they were taken from')
@@ -0,0 +1,32 @@
+import argparse
+import json
+
+from benchmarks.text_processing import benchmark_text_processing
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare tokens and throughput of TextProcessor and '
+                                                 'FastTextProcessor on a golden corpus.')
+    parser.add_argument('--documents', type=int, default=500)
+    parser.add_argument('--sentences', type=int, default=12, help='golden sentences per document')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='json report path')
+    args = parser.parse_args()
+
+    report = benchmark_text_processing(documents_count=args.documents, sentences_per_document=args.sentences,
+                                       repeats=args.repeats, seed=args.seed)
+
+    for name in ('golden', 'corpus'):
+        result = report[name]
+        print(f"{name:<8} texts {result['texts']:>6}  mismatches {len(result['mismatches']):>4}  "
+              f"fallbacks {result['fallbacks']:>4}")
+    for name in ('text_processor', 'fast_text_processor'):
+        print(f"{name:<20} {report[name]['documents_per_second']:>10.1f} docs/sec")
+    print(f"speedup {report['speedup']:.2f}x")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=4, ensure_ascii=False)
+
+    if report['golden']['mismatches'] or report['corpus']['mismatches']:
+        raise SystemExit('FastTextProcessor tokens differ from TextProcessor tokens')
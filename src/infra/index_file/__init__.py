@@ -0,0 +1,4 @@
+from src.infra.index_file.writer import IndexFileWriter
+from src.infra.index_file.reader import IndexFile, load_index_file
+
+__all__ = ['IndexFileWriter', 'IndexFile', 'load_index_file']
@@ -0,0 +1,143 @@
+import json
+import os
+from threading import Lock
+
+import numpy as np
+
+from src.infra.snapshot import Snapshot, is_snapshot
+from src.infra.snapshot.reader import decode_strings, decode_nullable_strings
+from src.utils.positions import encode_positions_array, decode_positions
+
+
+class IndexFile:
+    """
+    Read-only view of an index written by IndexFileWriter, postings arrays are memory-mapped.
+    A snapshot directory of SnapshotWriter is read as well, its compressed arrays are loaded into memory.
+    """
+
+    def __init__(self, path: str):
+        if not os.path.exists(os.path.join(path, 'manifest.json')):
+            raise Exception(f"Index file not found: {path}")
+
+        self.path = path
+
+        if is_snapshot(path):
+            self._load_snapshot(Snapshot(path))
+            return
+
+        manifest = self._load_json('manifest')
+        # arrays are in the data directory of the manifest, next to it for indexes written before data directories
+        self.data_path = os.path.join(path, manifest.get('data_directory', ''))
+        self.version = manifest.get('version')
+        self.build_parameters = manifest.get('build_parameters', {})
+        self.total_documents = manifest['total_documents']
+
+        self.terms = self._load_json('terms')
+        self.term_ids = {term: term_id for term_id, term in enumerate(self.terms)}
+        self.document_frequencies = self._load_array('document_frequencies')
+        self.max_impacts = self._load_array('max_impacts')
+
+        self.postings_offsets = self._load_array('postings_offsets')
+        self.postings_doc_ids = self._load_array('postings_doc_ids')
+        self.postings_term_frequencies = self._load_array('postings_term_frequencies')
+        self.postings_is_champion = self._load_array('postings_is_champion')
+        self.postings_impacts = self._load_array('postings_impacts')
+        # index files written before positions were kept have none
+        if os.path.exists(os.path.join(self.data_path, 'postings_positions.npy')):
+            self.postings_positions = self._load_array('postings_positions')
+            self.postings_positions_offsets = self._load_array('postings_positions_offsets')
+        else:
+            self.postings_positions = self.postings_positions_offsets = None
+
+        self.doc_ids = self._load_array('doc_ids')
+        self.document_norms = self._load_array('document_norms')
+        documents = self._load_json('documents')
+        self.titles = documents['titles']
+        self.urls = documents['urls']
+
+    def _load_snapshot(self, snapshot: Snapshot):
+        self.version = snapshot.version
+        self.build_parameters = snapshot.parameters
+        self.total_documents = snapshot.total_documents
+
+        terms = snapshot.load_arrays('terms')
+        self.terms = decode_strings(terms['term_data'], terms['term_offsets'])
+        self.term_ids = {term: term_id for term_id, term in enumerate(self.terms)}
+        self.document_frequencies = terms['document_frequency']
+        self.max_impacts = terms['max_impact']
+
+        # postings are sorted by term id, so the postings of a term start after those of the lower ids
+        postings = snapshot.load_arrays('postings')
+        self.postings_offsets = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(postings['term_id'], minlength=len(self.terms)), out=self.postings_offsets[1:])
+        self.postings_doc_ids = postings['doc_id']
+        self.postings_term_frequencies = postings['term_frequency']
+        self.postings_is_champion = postings['is_champion']
+        self.postings_impacts = postings['impact']
+        self.postings_positions, self.postings_positions_offsets = encode_positions_array(
+            postings['positions'], postings['position_offsets']
+        )
+
+        documents = snapshot.load_arrays('documents')
+        self.doc_ids = documents['doc_id']
+        self.document_norms = documents['vector_norm']
+        self.titles = decode_nullable_strings(documents, 'title')
+        self.urls = decode_nullable_strings(documents, 'url')
+
+    def _load_array(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.data_path, f'{name}.npy'), mmap_mode='r')
+
+    def _load_json(self, name: str):
+        # the manifest is at the index path, the other files in its data directory
+        directory = self.path if name == 'manifest' else self.data_path
+        with open(os.path.join(directory, f'{name}.json'), encoding='utf-8') as file:
+            return json.load(file)
+
+    def get_document_frequency(self, term: str) -> int:
+        return int(self.document_frequencies[self.term_ids[term]])
+
+    def get_postings_slice(self, term: str) -> slice:
+        term_id = self.term_ids[term]
+        return slice(self.postings_offsets[term_id], self.postings_offsets[term_id + 1])
+
+    @property
+    def has_positions(self) -> bool:
+        return self.postings_positions is not None
+
+    def get_positions(self, posting: int) -> np.ndarray:
+        """
+        Decoded positions of the posting at the given index of the postings arrays
+        """
+        start, end = self.postings_positions_offsets[posting], self.postings_positions_offsets[posting + 1]
+        return decode_positions(self.postings_positions[start:end].tobytes())
+
+    def get_document_rows(self, doc_ids: np.ndarray) -> np.ndarray:
+        """
+        Returns positions of the given doc ids in the documents arrays, -1 for unknown doc ids
+        """
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        if len(self.doc_ids) == 0:
+            return np.full(len(doc_ids), -1)
+
+        rows = np.minimum(np.searchsorted(self.doc_ids, doc_ids), len(self.doc_ids) - 1)
+        return np.where(self.doc_ids[rows] == doc_ids, rows, -1)
+
+
+_index_files = {}
+_index_files_lock = Lock()
+
+
+def load_index_file(path: str) -> IndexFile:
+    """
+    Shared IndexFile of path, reloaded when the index is rebuilt. The manifest is written last, so a change of its
+    modification time marks a new index.
+    """
+    manifest_path = os.path.join(path, 'manifest.json')
+    modified_time = os.stat(manifest_path).st_mtime_ns if os.path.exists(manifest_path) else None
+
+    with _index_files_lock:
+        cached = _index_files.get(path)
+        if cached is None or cached[0] != modified_time:
+            cached = _index_files[path] = (modified_time, IndexFile(path))
+
+    return cached[1]
@@ -0,0 +1,133 @@
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from src.utils.positions import encode_positions
+
+
+class IndexFileWriter:
+    """
+    Writes the index into a directory of numpy arrays which can be memory-mapped by IndexFile.
+    Every write puts its arrays into a new data directory and then atomically replaces the manifest pointing at it,
+    so files a running searcher has mapped are never rewritten. Data directories older than the previous one
+    are removed.
+
+    Layout:
+    + manifest.json: data directory, index version, build parameters, total documents and counts
+    + data-<id>/: the files below
+    + terms.json: sorted term dictionary, position of a term is its id
+    + document_frequencies.npy: document frequency of each term
+    + max_impacts.npy: highest posting impact of each term
+    + postings_offsets.npy: postings of term i are in [offsets[i], offsets[i + 1])
+    + postings_doc_ids.npy, postings_term_frequencies.npy, postings_is_champion.npy, postings_impacts.npy:
+      postings sorted by doc_id
+    + postings_positions.npy, postings_positions_offsets.npy: delta and varint encoded positions, bytes of posting i
+      are in [offsets[i], offsets[i + 1]). Written when term_doc_df has a positions column.
+    + doc_ids.npy, documents.json: sorted doc ids and their titles and urls
+    + document_norms.npy: length of each document's tf-idf vector
+    """
+
+    data_directory_prefix = 'data-'
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data_path = path
+
+    def _save_array(self, name: str, array: np.ndarray):
+        np.save(os.path.join(self.data_path, f'{name}.npy'), array)
+
+    def _save_json(self, name: str, data):
+        with open(os.path.join(self.data_path, f'{name}.json'), 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+
+    def _read_data_directory(self) -> str | None:
+        """
+        Data directory of the index currently at path, '' for indexes written with their files next to the manifest
+        """
+        manifest_path = os.path.join(self.path, 'manifest.json')
+        if not os.path.exists(manifest_path):
+            return None
+
+        with open(manifest_path, encoding='utf-8') as file:
+            return json.load(file).get('data_directory', '')
+
+    def _save_manifest(self, manifest: dict):
+        temporary_path = os.path.join(self.path, 'manifest.json.tmp')
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, ensure_ascii=False)
+        os.replace(temporary_path, os.path.join(self.path, 'manifest.json'))
+
+    def _remove_old_data(self, keep: set[str]):
+        # searchers which read the previous manifest may still open its files, older ones are not used anymore.
+        # Files of mapped arrays stay readable after they are removed.
+        for name in os.listdir(self.path):
+            if name.startswith(self.data_directory_prefix) and name not in keep:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+            elif '' not in keep and (name.endswith('.npy') or name in ('terms.json', 'documents.json')):
+                os.remove(os.path.join(self.path, name))
+
+    def _save_positions(self, positions: pd.Series):
+        # positions may come as lists or already encoded
+        encoded = [value if isinstance(value, bytes) else encode_positions(value) for value in positions]
+
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+
+        self._save_array('postings_positions', np.frombuffer(b''.join(encoded), dtype=np.uint8))
+        self._save_array('postings_positions_offsets', offsets)
+
+    def write(self, terms_df: pd.DataFrame, term_doc_df: pd.DataFrame, documents_df: pd.DataFrame,
+              version: str | None = None, build_parameters: dict | None = None):
+        os.makedirs(self.path, exist_ok=True)
+        previous_data_directory = self._read_data_directory()
+        data_directory = f'{self.data_directory_prefix}{uuid.uuid4().hex}'
+        self.data_path = os.path.join(self.path, data_directory)
+        os.makedirs(self.data_path)
+
+        terms_df = terms_df.drop_duplicates(subset=['term']).sort_values(by='term').reset_index(drop=True)
+        documents_df = documents_df.drop_duplicates(subset=['doc_id']).sort_values(by='doc_id')
+        term_doc_df = term_doc_df.drop_duplicates(subset=['term', 'doc_id'])
+
+        term_ids = pd.Series(np.arange(len(terms_df)), index=terms_df['term'])
+        postings_df = (
+            term_doc_df.assign(term_id=term_doc_df['term'].map(term_ids))
+            .dropna(subset=['term_id'])
+            .astype({'term_id': np.int64})
+            .sort_values(by=['term_id', 'doc_id'])
+        )
+
+        offsets = np.zeros(len(terms_df) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(postings_df['term_id'], minlength=len(terms_df)))
+
+        self._save_json('terms', terms_df['term'].tolist())
+        self._save_array('document_frequencies', terms_df['document_frequency'].to_numpy(dtype=np.int32))
+        self._save_array('max_impacts', terms_df['max_impact'].to_numpy(dtype=np.float64))
+        self._save_array('postings_offsets', offsets)
+        self._save_array('postings_doc_ids', postings_df['doc_id'].to_numpy(dtype=np.int64))
+        self._save_array('postings_term_frequencies', postings_df['term_frequency'].to_numpy(dtype=np.int32))
+        self._save_array('postings_is_champion', postings_df['is_champion'].to_numpy(dtype=bool))
+        self._save_array('postings_impacts', postings_df['impact'].to_numpy(dtype=np.float64))
+        if 'positions' in postings_df:
+            self._save_positions(postings_df['positions'])
+
+        self._save_array('doc_ids', documents_df['doc_id'].to_numpy(dtype=np.int64))
+        self._save_array('document_norms', documents_df['vector_norm'].to_numpy(dtype=np.float64))
+        self._save_json('documents', {
+            'titles': documents_df['title'].tolist(),
+            'urls': documents_df['url'].tolist()
+        })
+
+        # written last, it switches searchers to the new data directory
+        self._save_manifest({
+            'data_directory': data_directory,
+            'version': version,
+            'build_parameters': build_parameters or {},
+            'total_documents': len(documents_df),
+            'terms_count': len(terms_df),
+            'postings_count': len(postings_df)
+        })
+        self._remove_old_data(keep={data_directory, previous_data_directory})
@@ -1,9 +1,10 @@
-from neomodel import StructuredNode, IntegerProperty, StringProperty, RelationshipFrom
+from neomodel import StructuredNode, IntegerProperty, StringProperty, FloatProperty, RelationshipFrom
 
 
 class Document(StructuredNode):
     doc_id = IntegerProperty(unique_index=True, required=True)
     title = StringProperty()
     url = StringProperty()
+    vector_norm = FloatProperty(default=0.0)
 
     terms = RelationshipFrom('src.infra.models.Term', 'src.infra.models.EXISTS_IN')
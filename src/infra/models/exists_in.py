@@ -1,7 +1,31 @@
-from neomodel import StructuredRel, IntegerProperty, ArrayProperty, BooleanProperty
+from neomodel import StructuredRel, IntegerProperty, BooleanProperty, FloatProperty
+from neomodel.properties import Property, validator
+
+from src.utils.config import config
+from src.utils.positions import encode_positions, decode_positions
+
+
+class PositionsProperty(Property):
+    """
+    Positions of a posting, delta and varint bytes with COMPRESSED_POSITIONS or an integer array otherwise.
+    Both forms are read, as a graph indexed before compression keeps its arrays.
+    """
+
+    @validator
+    def inflate(self, value) -> list[int]:
+        return decode_positions(value).tolist()
+
+    @validator
+    def deflate(self, value):
+        if isinstance(value, (bytes, bytearray)):
+            return bytes(value)
+
+        positions = [int(position) for position in value]
+        return encode_positions(positions) if config.COMPRESSED_POSITIONS else positions
 
 
 class ExistsIn(StructuredRel):
     term_frequency = IntegerProperty(required=True)
-    positions = ArrayProperty(base_property=IntegerProperty(), required=True)
+    positions = PositionsProperty(required=True)
     is_champion = BooleanProperty(default=False)
+    impact = FloatProperty(default=0.0)
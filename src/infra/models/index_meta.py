@@ -0,0 +1,6 @@
+from neomodel import StructuredNode, StringProperty, IntegerProperty
+
+
+class IndexMeta(StructuredNode):
+    version = StringProperty(required=True)
+    total_documents = IntegerProperty(default=0)
@@ -1,8 +1,9 @@
-from neomodel import StructuredNode, StringProperty, IntegerProperty, RelationshipTo
+from neomodel import StructuredNode, StringProperty, IntegerProperty, FloatProperty, RelationshipTo
 
 
 class Term(StructuredNode):
     value = StringProperty(unique_index=True, required=True)
     document_frequency = IntegerProperty(default=0)
+    max_impact = FloatProperty(default=0.0)
 
     documents = RelationshipTo('src.infra.models.Document', 'src.infra.models.EXISTS_IN')
@@ -1,3 +1,64 @@
 from src.infra.repositories.term import TermRepository
 from src.infra.repositories.exists_in import ExistsInRepository
 from src.infra.repositories.document import DocumentRepository
+from src.infra.repositories.index_meta import IndexMetaRepository
+from src.infra.repositories.index_file import IndexFileTermRepository, IndexFileDocumentRepository, \
+    IndexFileMetaRepository
+from src.infra.repositories.async_neo4j import AsyncTermRepository, AsyncDocumentRepository
+from src.infra.repositories.async_adapter import AsyncRepositoryAdapter
+from src.infra.repositories.shard import ShardTermRepository, ShardDocumentRepository
+
+from src.infra.connection import create_driver
+from src.infra.index_file import load_index_file
+from src.utils.config import config
+
+# one driver per shard database, created on first use and shared by all searches of the process
+_shard_repositories: list[tuple] | None = None
+
+
+def get_term_repository():
+    if config.INDEX_BACKEND == 'index_file':
+        return IndexFileTermRepository(index=load_index_file(config.INDEX_FILE_PATH))
+
+    return TermRepository
+
+
+def get_document_repository():
+    if config.INDEX_BACKEND == 'index_file':
+        return IndexFileDocumentRepository(index=load_index_file(config.INDEX_FILE_PATH))
+
+    return DocumentRepository
+
+
+def get_index_meta_repository():
+    if config.INDEX_BACKEND == 'index_file':
+        return IndexFileMetaRepository(index=load_index_file(config.INDEX_FILE_PATH))
+
+    return IndexMetaRepository
+
+
+def get_shard_repositories() -> list[tuple]:
+    """
+    (term repository, document repository) of each configured shard, an empty list when the index is not sharded
+    """
+    if config.INDEX_BACKEND == 'index_file':
+        # index files are cached by load_index_file, which reloads a rebuilt shard
+        return [
+            (IndexFileTermRepository(index=load_index_file(path)),
+             IndexFileDocumentRepository(index=load_index_file(path)))
+            for path in config.SHARD_INDEX_FILE_PATHS
+        ]
+
+    global _shard_repositories
+    if _shard_repositories is not None:
+        return _shard_repositories
+
+    _shard_repositories = []
+    for url in config.SHARD_DATABASE_URLS:
+        driver, database = create_driver(url)
+        _shard_repositories.append(
+            (ShardTermRepository(driver=driver, database=database),
+             ShardDocumentRepository(driver=driver, database=database))
+        )
+
+    return _shard_repositories
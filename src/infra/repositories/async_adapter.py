@@ -0,0 +1,24 @@
+import asyncio
+
+
+class AsyncRepositoryAdapter:
+    """
+    Async view of a synchronous repository, every method call runs in a worker thread.
+    Wrapping the index-file repositories gives the async search service an in-memory backend without Neo4j.
+    With get_repository the repository is fetched on every call, so a rebuilt index file is picked up.
+    """
+
+    def __init__(self, repository=None, get_repository=None):
+        self.repository = repository
+        self.get_repository = get_repository
+
+    def __getattr__(self, name: str):
+        repository = self.get_repository() if self.get_repository is not None else self.repository
+        attribute = getattr(repository, name)
+        if not callable(attribute):
+            return attribute
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(attribute, *args, **kwargs)
+
+        return call
@@ -0,0 +1,82 @@
+import pandas as pd
+from neo4j import AsyncDriver, RoutingControl
+
+from src.infra.repositories.document import DocumentRepository
+from src.infra.repositories.term import TermRepository
+from src.infra.repositories.utils import estimate_size
+from src.utils.metrics import metrics, SIZE_BUCKETS
+
+
+class AsyncCypherRunner:
+    """
+    Runs read queries on a pooled async driver, each call borrows a connection only for its own query
+    """
+
+    def __init__(self, driver: AsyncDriver, database: str | None = None):
+        self.driver = driver
+        self.database = database
+
+    async def cypher_query(self, query: str, params: dict | None = None) -> list[list]:
+        records, _, _ = await self.driver.execute_query(
+            query, params or {}, database_=self.database, routing_=RoutingControl.READ
+        )
+        result = [list(record.values()) for record in records]
+
+        if metrics.enabled:
+            size = estimate_size(result)
+            metrics.increment('db_calls', method='async')
+            metrics.increment('db_returned_bytes', size, method='async')
+            metrics.observe('db_returned_rows', len(result), buckets=SIZE_BUCKETS, method='async')
+
+        return result
+
+
+class AsyncTermRepository(AsyncCypherRunner):
+    """
+    Async repository for Term Entity, with the queries of TermRepository
+    """
+
+    async def get_terms_document_frequencies(self, query_terms: list[str]) -> pd.DataFrame:
+        result = await self.cypher_query(TermRepository.terms_document_frequencies_query, {'query_terms': query_terms})
+        return pd.DataFrame(result, columns=['term', 'document_frequency'])
+
+
+class AsyncDocumentRepository(AsyncCypherRunner):
+    """
+    Async repository for Document Entity, with the queries of DocumentRepository
+    """
+    candidates_columns = DocumentRepository.candidates_columns
+
+    async def get_total_documents_count(self) -> int:
+        result = await self.cypher_query(DocumentRepository.total_documents_count_query)
+        return result[0][0]
+
+    async def get_documents_by_doc_ids(self, doc_ids: list[int]) -> list[dict]:
+        result = await self.cypher_query(DocumentRepository.documents_by_doc_ids_query, {'doc_ids': doc_ids})
+        return DocumentRepository._build_documents(result)
+
+    async def get_documents_matching_all_query_terms(self, query_terms: list[str],
+                                                     term_with_lowest_document_frequency: str,
+                                                     total_documents: int) -> pd.DataFrame:
+        result = await self.cypher_query(DocumentRepository.documents_matching_all_query_terms_query, {
+            'query_terms': query_terms,
+            'term_with_lowest_document_frequency': term_with_lowest_document_frequency
+        })
+        return DocumentRepository._build_candidates_frame(result, total_documents=total_documents)
+
+    async def get_champion_documents_by_query_terms(self, query_terms: list[str],
+                                                    total_documents: int) -> pd.DataFrame:
+        result = await self.cypher_query(DocumentRepository.champion_documents_query, {'query_terms': query_terms})
+        return DocumentRepository._build_candidates_frame(result, total_documents=total_documents)
+
+    async def get_high_idf_documents_by_query_terms(self, query_terms: list[str], document_frequency_threshold: float,
+                                                    total_documents: int) -> pd.DataFrame:
+        result = await self.cypher_query(DocumentRepository.high_idf_documents_query, {
+            'query_terms': query_terms,
+            'document_frequency_threshold': document_frequency_threshold
+        })
+        return DocumentRepository._build_candidates_frame(result, total_documents=total_documents)
+
+    async def get_all_documents_by_query_terms(self, query_terms: list[str], total_documents: int) -> pd.DataFrame:
+        result = await self.cypher_query(DocumentRepository.all_documents_query, {'query_terms': query_terms})
+        return DocumentRepository._build_candidates_frame(result, total_documents=total_documents)
@@ -1,14 +1,18 @@
+import numpy as np
 import pandas as pd
-from neomodel import db
 
 from src.infra.models import Document
+from src.infra.repositories.utils import cypher_query
+from src.utils.positions import decode_positions
+from src.utils.weighting import add_tf_idf_columns
 
 
 class DocumentRepository:
     """
     Repository for Document Entity
     """
-    candidates_columns = ['term', 'doc_id', 'term_frequency', 'document_frequency', 'tf_value', 'idf_value', 'tf_idf']
+    candidates_columns = ['term', 'doc_id', 'term_frequency', 'document_frequency', 'tf_value', 'idf_value', 'tf_idf',
+                          'document_norm']
 
     """
     Create
@@ -18,12 +22,12 @@ class DocumentRepository:
     def bulk_create(documents_df: pd.DataFrame) -> dict:
         query = """
         UNWIND $rows AS row
-        CREATE (d:Document {doc_id: row.doc_id, title: row.title, url: row.url})
+        CREATE (d:Document {doc_id: row.doc_id, title: row.title, url: row.url, vector_norm: row.vector_norm})
         RETURN d.doc_id AS doc_id, elementId(d) AS document_id_in_neo
         """
 
         cypher_query_params = {"rows": documents_df.to_dict('records')}
-        results, _ = db.cypher_query(query, cypher_query_params)
+        results, _ = cypher_query(query, cypher_query_params)
 
         return {doc_id: document_id_in_neo for doc_id, document_id_in_neo in results}
 
@@ -31,97 +35,311 @@ class DocumentRepository:
     Read
     """
 
+    # read queries are shared with AsyncDocumentRepository
+
+    total_documents_count_query = """
+    MATCH (d:Document)
+    RETURN COUNT(d) AS total_documents
+    """
+
     @staticmethod
     def get_total_documents_count() -> int:
-        query = """
-        MATCH (d:Document)
-        RETURN COUNT(d) AS total_documents
-        """
-
-        result, _ = db.cypher_query(query)
+        result, _ = cypher_query(DocumentRepository.total_documents_count_query)
         return result[0][0]
 
+    documents_by_doc_ids_query = """
+    MATCH (d: Document)
+    WHERE d.doc_id IN $doc_ids
+    RETURN
+    d.doc_id AS doc_id,
+    d.title AS title,
+    d.url AS url
+    """
+
+    @staticmethod
+    def _build_documents(result: list) -> list[dict]:
+        return [{'doc_id': row[0], 'title': row[1], 'url': row[2]} for row in result]
+
     @staticmethod
     def get_documents_by_doc_ids(doc_ids: list[int]) -> list[dict]:
-        query = """
-        MATCH (d: Document)
-        WHERE d.doc_id IN $doc_ids
-        RETURN
-        d.doc_id AS doc_idm,
-        d.title AS title,
-        d.url AS url
+        result, _ = cypher_query(DocumentRepository.documents_by_doc_ids_query, {'doc_ids': doc_ids})
+        return DocumentRepository._build_documents(result)
+
+    postings_query = """
+    MATCH (:Term {value: $term})-[e:EXISTS_IN]->(d:Document)
+    RETURN d.doc_id AS doc_id, e.impact AS impact
+    """
+
+    # probing from the documents side, a common term is not expanded to all its postings
+    postings_by_doc_ids_query = """
+    UNWIND $doc_ids AS doc_id
+    MATCH (:Term {value: $term})-[e:EXISTS_IN]->(d:Document {doc_id: doc_id})
+    RETURN d.doc_id AS doc_id, e.impact AS impact
+    """
+
+    @staticmethod
+    def _build_postings(result) -> tuple[np.ndarray, np.ndarray]:
+        return (
+            np.array([row[0] for row in result], dtype=np.int64),
+            np.array([row[1] or 0.0 for row in result], dtype=np.float64)
+        )
+
+    @staticmethod
+    def get_postings(term: str, doc_ids: list[int] | None = None) -> tuple[np.ndarray, np.ndarray]:
         """
+        doc ids and impacts of the postings of term, only of the given doc_ids when they are passed
+        """
+        query = DocumentRepository.postings_query if doc_ids is None else DocumentRepository.postings_by_doc_ids_query
 
-        result, _ = db.cypher_query(query, {'doc_ids': doc_ids})
-        return [{'doc_id': row[0], 'title': row[1], 'url': row[2]} for row in result]
+        result, _ = cypher_query(query, {'term': term, 'doc_ids': doc_ids})
+        return DocumentRepository._build_postings(result)
+
+    positions_by_doc_ids_query = """
+    UNWIND $doc_ids AS doc_id
+    MATCH (:Term {value: $term})-[e:EXISTS_IN]->(d:Document {doc_id: doc_id})
+    RETURN d.doc_id AS doc_id, e.positions AS positions
+    """
+
+    @staticmethod
+    def _build_positions(result) -> dict[int, np.ndarray]:
+        return {row[0]: decode_positions(row[1]) for row in result}
 
     @staticmethod
-    def _build_candidates_clause() -> str:
-        return """
-        RETURN 
-        t.value AS term, 
-        d.doc_id AS doc_id, 
-        e.term_frequency AS term_frequency,
-        t.document_frequency AS document_frequency,
-        1 + log(e.term_frequency) AS tf_value,
-        log($total_documents / t.document_frequency) AS idf_value,
-        (1 + log(e.term_frequency)) * log($total_documents / t.document_frequency) AS tf_idf
+    def get_positions(term: str, doc_ids: list[int]) -> dict[int, np.ndarray]:
+        """
+        Positions of term in each of the given documents containing it
         """
+        result, _ = cypher_query(DocumentRepository.positions_by_doc_ids_query, {'term': term, 'doc_ids': doc_ids})
+        return DocumentRepository._build_positions(result)
+
+    # tf and idf values are computed vectorized on the returned frame, not per row in the database
+    candidates_clause = """
+    RETURN
+    t.value AS term,
+    d.doc_id AS doc_id,
+    e.term_frequency AS term_frequency,
+    t.document_frequency AS document_frequency,
+    d.vector_norm AS document_norm
+    """
+
+    @staticmethod
+    def _build_candidates_frame(result: list, total_documents: int) -> pd.DataFrame:
+        candidates = pd.DataFrame(result, columns=['term', 'doc_id', 'term_frequency', 'document_frequency',
+                                                   'document_norm'])
+        candidates = add_tf_idf_columns(candidates, total_documents=total_documents)
+
+        return candidates[DocumentRepository.candidates_columns]
+
+    champion_documents_query = f"""
+    UNWIND $query_terms AS term_value
+    MATCH (t: Term {{value: term_value}})-[e:EXISTS_IN {{is_champion: True}}]->(d:Document)
+    {candidates_clause}
+    """
 
     @staticmethod
     def get_champion_documents_by_query_terms(query_terms: list[str], total_documents: int) -> pd.DataFrame:
-        query = f"""
-        UNWIND $query_terms AS term_value
-        MATCH (t: Term {{value: term_value}})-[e:EXISTS_IN {{is_champion: True}}]->(d:Document)
-        {DocumentRepository._build_candidates_clause()}
-        """
+        result, _ = cypher_query(DocumentRepository.champion_documents_query, {'query_terms': query_terms})
+        return DocumentRepository._build_candidates_frame(result, total_documents=total_documents)
 
-        result, _ = db.cypher_query(query, {'query_terms': query_terms, 'total_documents': total_documents})
-        return pd.DataFrame(result, columns=DocumentRepository.candidates_columns)
+    documents_matching_all_query_terms_query = f"""
+    MATCH (t: Term {{value: $term_with_lowest_document_frequency}} )-[:EXISTS_IN]->(d: Document)
+    WITH d
+    MATCH (t: Term)-[:EXISTS_IN]->(d)
+    WITH d.doc_id AS doc_id, COLLECT(t.value) AS terms_in_doc
+    WHERE ALL(term IN $query_terms WHERE term IN terms_in_doc)
+    WITH doc_id
+    UNWIND $query_terms AS term_value
+    MATCH (t: Term {{value: term_value}})-[e:EXISTS_IN]->(d:Document {{doc_id: doc_id}})
+    {candidates_clause}
+    """
 
     @staticmethod
     def get_documents_matching_all_query_terms(query_terms: list[str], term_with_lowest_document_frequency: str,
                                                total_documents: int) -> pd.DataFrame:
-        query = f"""
-        MATCH (t: Term {{value: $term_with_lowest_document_frequency}} )-[:EXISTS_IN]->(d: Document)
-        WITH d
-        MATCH (t: Term)-[:EXISTS_IN]->(d)
-        WITH d.doc_id AS doc_id, COLLECT(t.value) AS terms_in_doc
-        WHERE ALL(term IN $query_terms WHERE term IN terms_in_doc)
-        WITH doc_id
-        UNWIND $query_terms AS term_value
-        MATCH (t: Term {{value: term_value}})-[e:EXISTS_IN]->(d:Document {{doc_id: doc_id}})
-        {DocumentRepository._build_candidates_clause()}
-        """
+        result, _ = cypher_query(DocumentRepository.documents_matching_all_query_terms_query,
+                                 {'query_terms': query_terms,
+                                  'term_with_lowest_document_frequency': term_with_lowest_document_frequency})
+        return DocumentRepository._build_candidates_frame(result, total_documents=total_documents)
 
-        result, _ = db.cypher_query(query, {'query_terms': query_terms,
-                                            'term_with_lowest_document_frequency': term_with_lowest_document_frequency,
-                                            'total_documents': total_documents})
-        return pd.DataFrame(result, columns=DocumentRepository.candidates_columns)
+    high_idf_documents_query = f"""
+    UNWIND $query_terms AS term_value
+    MATCH (t: Term {{value: term_value}})-[e:EXISTS_IN]->(d: Document)
+    WHERE t.document_frequency < $document_frequency_threshold
+    {candidates_clause}
+    """
 
     @staticmethod
     def get_high_idf_documents_by_query_terms(query_terms: list[str],
                                               document_frequency_threshold: float,
                                               total_documents: int) -> pd.DataFrame:
-        query = f"""
-        UNWIND $query_terms AS term_value
-        MATCH (t: Term {{value: term_value}})-[e:EXISTS_IN]->(d: Document)
-        WHERE t.document_frequency < $document_frequency_threshold
-        {DocumentRepository._build_candidates_clause()}
-        """
+        result, _ = cypher_query(DocumentRepository.high_idf_documents_query,
+                                 {'query_terms': query_terms,
+                                  'document_frequency_threshold': document_frequency_threshold})
+        return DocumentRepository._build_candidates_frame(result, total_documents=total_documents)
 
-        result, _ = db.cypher_query(query, {'query_terms': query_terms,
-                                            'document_frequency_threshold': document_frequency_threshold,
-                                            'total_documents': total_documents})
-        return pd.DataFrame(result, columns=DocumentRepository.candidates_columns)
+    all_documents_query = f"""
+    UNWIND $query_terms AS term_value
+    MATCH (t: Term {{value: term_value}})-[e: EXISTS_IN]->(d: Document)
+    {candidates_clause}
+    """
 
     @staticmethod
     def get_all_documents_by_query_terms(query_terms: list[str], total_documents: int) -> pd.DataFrame:
+        result, _ = cypher_query(DocumentRepository.all_documents_query, {'query_terms': query_terms})
+        return DocumentRepository._build_candidates_frame(result, total_documents=total_documents)
+
+    postings_by_query_terms_query = """
+    UNWIND $query_terms AS term_value
+    MATCH (t: Term {value: term_value})-[e: EXISTS_IN]->(d: Document)
+    RETURN
+    t.value AS term,
+    d.doc_id AS doc_id,
+    e.term_frequency AS term_frequency,
+    t.document_frequency AS document_frequency,
+    d.vector_norm AS document_norm,
+    e.is_champion AS is_champion
+    """
+
+    @staticmethod
+    def _build_postings_frame(result: list, total_documents: int) -> pd.DataFrame:
+        postings = pd.DataFrame(result, columns=['term', 'doc_id', 'term_frequency', 'document_frequency',
+                                                 'document_norm', 'is_champion'])
+        postings = add_tf_idf_columns(postings, total_documents=total_documents)
+
+        return postings[DocumentRepository.candidates_columns + ['is_champion']]
+
+    @staticmethod
+    def get_postings_by_query_terms(query_terms: list[str], total_documents: int) -> pd.DataFrame:
+        """
+        Candidates of filter level 4 with the is_champion flag, enough to apply every filter level in memory
+        """
+        result, _ = cypher_query(DocumentRepository.postings_by_query_terms_query, {'query_terms': query_terms})
+        return DocumentRepository._build_postings_frame(result, total_documents=total_documents)
+
+    @staticmethod
+    def get_candidates_by_cascade(query_terms: list[str], count: int = 10) -> pd.DataFrame:
+        """
+        Same result as running filter levels 1 to 4 one after another until there are `count` candidates,
+        but term statistics, the documents count and all needed levels are fetched in a single query.
+        A level is only computed if the distinct rows of previous levels are fewer than `count`.
+        """
+        row_map = """{
+            term: t.value,
+            doc_id: d.doc_id,
+            term_frequency: e.term_frequency,
+            document_frequency: t.document_frequency,
+            document_norm: d.vector_norm
+        }"""
+
         query = f"""
+        MATCH (d:Document)
+        WITH COUNT(d) AS total_documents
         UNWIND $query_terms AS term_value
-        MATCH (t: Term {{value: term_value}})-[e: EXISTS_IN]->(d: Document)
-        {DocumentRepository._build_candidates_clause()}
+        MATCH (t:Term {{value: term_value}})
+        WITH total_documents, COLLECT(t) AS terms
+        WITH total_documents, terms,
+            reduce(lowest = head(terms), t IN terms |
+                CASE WHEN t.document_frequency < lowest.document_frequency THEN t ELSE lowest END
+            ) AS lowest_term,
+            reduce(total = 0.0, t IN terms | total + t.document_frequency) / size(terms) AS document_frequency_threshold
+
+        CALL {{
+            WITH terms, lowest_term
+            MATCH (lowest_term)-[:EXISTS_IN]->(d:Document)
+            WHERE size(terms) = size($query_terms) AND ALL(t IN terms WHERE EXISTS {{ (t)-[:EXISTS_IN]->(d) }})
+            UNWIND terms AS t
+            MATCH (t)-[e:EXISTS_IN]->(d)
+            RETURN COLLECT({row_map}) AS level_1
+        }}
+
+        CALL {{
+            WITH terms, level_1
+            WITH terms, level_1 WHERE size(level_1) < $count
+            UNWIND terms AS t
+            MATCH (t)-[e:EXISTS_IN {{is_champion: True}}]->(d:Document)
+            RETURN COLLECT({row_map}) AS level_2
+        }}
+        CALL {{
+            WITH level_1, level_2
+            UNWIND level_1 + level_2 AS row
+            RETURN COUNT(DISTINCT [row.term, row.doc_id]) AS found_2
+        }}
+
+        CALL {{
+            WITH terms, document_frequency_threshold, found_2
+            WITH terms, document_frequency_threshold, found_2 WHERE found_2 < $count
+            UNWIND terms AS t
+            MATCH (t)-[e:EXISTS_IN]->(d:Document)
+            WHERE t.document_frequency < document_frequency_threshold
+            RETURN COLLECT({row_map}) AS level_3
+        }}
+        CALL {{
+            WITH level_1, level_2, level_3
+            UNWIND level_1 + level_2 + level_3 AS row
+            RETURN COUNT(DISTINCT [row.term, row.doc_id]) AS found_3
+        }}
+
+        CALL {{
+            WITH terms, found_3
+            WITH terms, found_3 WHERE found_3 < $count
+            UNWIND terms AS t
+            MATCH (t)-[e:EXISTS_IN]->(d:Document)
+            RETURN COLLECT({row_map}) AS level_4
+        }}
+
+        RETURN total_documents, level_1, level_2, level_3, level_4
+        """
+
+        result, _ = cypher_query(query, {'query_terms': query_terms, 'count': count})
+        if not result:
+            return pd.DataFrame(columns=DocumentRepository.candidates_columns)
+
+        total_documents, *levels = result[0]
+        rows = [
+            [row['term'], row['doc_id'], row['term_frequency'], row['document_frequency'], row['document_norm']]
+            for level in levels for row in level
+        ]
+
+        return DocumentRepository._build_candidates_frame(rows, total_documents=total_documents).drop_duplicates()
+
+    @staticmethod
+    def get_all_documents() -> pd.DataFrame:
+        query = """
+        MATCH (d:Document)
+        RETURN d.doc_id AS doc_id, d.title AS title, d.url AS url, d.vector_norm AS vector_norm
+        """
+
+        result, _ = cypher_query(query)
+        return pd.DataFrame(result, columns=['doc_id', 'title', 'url', 'vector_norm'])
+
+    """
+    Update
+    """
+
+    @staticmethod
+    def update_vector_norms(doc_ids: list[int]):
+        query = """
+        MATCH (d:Document)
+        WITH COUNT(d) AS total_documents
+        UNWIND $doc_ids AS doc_id
+        MATCH (d:Document {doc_id: doc_id})
+        OPTIONAL MATCH (t:Term)-[e:EXISTS_IN]->(d)
+        WITH d, SUM(((1 + log(e.term_frequency)) * log(total_documents / t.document_frequency)) ^ 2) AS squares
+        SET d.vector_norm = sqrt(squares)
+        """
+
+        cypher_query(query, {'doc_ids': doc_ids})
+
+    """
+    Delete
+    """
+
+    @staticmethod
+    def delete_by_doc_ids(doc_ids: list[int]):
+        query = """
+        UNWIND $doc_ids AS doc_id
+        MATCH (d:Document {doc_id: doc_id})
+        DETACH DELETE d
         """
 
-        result, _ = db.cypher_query(query, {'query_terms': query_terms, 'total_documents': total_documents})
-        return pd.DataFrame(result, columns=DocumentRepository.candidates_columns)
+        cypher_query(query, {'doc_ids': doc_ids})
@@ -1,8 +1,11 @@
 import pandas as pd
-from src.infra.repositories.utils import bulk_create_with_batches
+
+from src.infra.repositories.utils import bulk_create_with_batches, cypher_query
 
 
 class ExistsInRepository:
+    postings_columns = ['term', 'doc_id', 'term_frequency', 'positions', 'is_champion', 'impact']
+
     @staticmethod
     def bulk_create(exists_in_df: pd.DataFrame):
         query = """
@@ -16,3 +19,63 @@ class ExistsInRepository:
             query=query,
             data=exists_in_df
         )
+
+    @staticmethod
+    def get_postings_page(after_term: str | None, terms_limit: int) -> tuple[pd.DataFrame, str | None]:
+        """
+        Postings of the next terms_limit terms in term order after after_term, and the last term of the page
+        to continue from, None when there are no more terms
+        """
+        query = """
+        MATCH (t:Term)
+        WHERE $after_term IS NULL OR t.value > $after_term
+        WITH t ORDER BY t.value LIMIT $terms_limit
+        OPTIONAL MATCH (t)-[e:EXISTS_IN]->(d:Document)
+        RETURN t.value AS term, d.doc_id AS doc_id, e.term_frequency AS term_frequency, e.positions AS positions,
+        e.is_champion AS is_champion, e.impact AS impact
+        """
+
+        result, _ = cypher_query(query, {'after_term': after_term, 'terms_limit': terms_limit})
+        if not result:
+            return pd.DataFrame(columns=ExistsInRepository.postings_columns), None
+
+        # terms without postings come back once with empty relationship columns
+        postings_df = pd.DataFrame(result, columns=ExistsInRepository.postings_columns)
+        return postings_df.dropna(subset=['doc_id']), max(row[0] for row in result)
+
+    @staticmethod
+    def update_champions(terms: list[str], k: int = 50):
+        """
+        Marks top k documents of each term by term frequency as champions,
+        ties are broken by doc_id like Indexer.mark_champions
+        """
+        query = """
+        UNWIND $terms AS term_value
+        MATCH (t:Term {value: term_value})-[e:EXISTS_IN]->(d:Document)
+        WITH t, e ORDER BY e.term_frequency DESC, d.doc_id ASC
+        WITH t, COLLECT(e) AS relations
+        UNWIND range(0, size(relations) - 1) AS rank
+        WITH relations[rank] AS e, rank < $k AS is_champion
+        SET e.is_champion = is_champion
+        """
+
+        cypher_query(query, {'terms': terms, 'k': k})
+
+    @staticmethod
+    def update_impacts(terms: list[str]):
+        """
+        Recomputes impacts of all postings of the given terms and their max impact, like Indexer.add_impacts
+        """
+        query = """
+        MATCH (d:Document)
+        WITH COUNT(d) AS total_documents
+        UNWIND $terms AS term_value
+        MATCH (t:Term {value: term_value})-[e:EXISTS_IN]->(d:Document)
+        WITH t, e, d, (1 + log(e.term_frequency)) * log(total_documents / t.document_frequency) AS tf_idf
+        WITH t, e, CASE WHEN d.vector_norm > 0 THEN tf_idf / d.vector_norm ELSE 0.0 END AS impact
+        SET e.impact = impact
+        WITH t, MAX(impact) AS max_impact
+        SET t.max_impact = max_impact
+        """
+
+        cypher_query(query, {'terms': terms})
@@ -0,0 +1,246 @@
+import numpy as np
+import pandas as pd
+
+from src.infra.index_file import IndexFile
+from src.utils.weighting import tf_value, idf_value
+
+
+class IndexFileTermRepository:
+    """
+    Repository for Term Entity backed by a memory-mapped index file
+    """
+
+    def __init__(self, index: IndexFile):
+        self.index = index
+
+    """
+    Read
+    """
+
+    def get_terms_by_query_terms(self, query_terms: list[str]) -> list[str]:
+        return [term for term in query_terms if term in self.index.term_ids]
+
+    def get_terms_document_frequencies(self, query_terms: list[str]) -> pd.DataFrame:
+        terms = self.get_terms_by_query_terms(query_terms)
+        return pd.DataFrame({
+            'term': terms,
+            'document_frequency': [self.index.get_document_frequency(term) for term in terms]
+        }, columns=['term', 'document_frequency'])
+
+    def get_terms_max_impacts(self, query_terms: list[str]) -> dict:
+        return {
+            term: float(self.index.max_impacts[self.index.term_ids[term]])
+            for term in self.get_terms_by_query_terms(query_terms)
+        }
+
+    def get_all_document_frequencies(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            'term': self.index.terms,
+            'document_frequency': np.asarray(self.index.document_frequencies)
+        }, columns=['term', 'document_frequency'])
+
+
+class IndexFileMetaRepository:
+    """
+    Repository for the index version stamp and build parameters of an index file
+    """
+
+    def __init__(self, index: IndexFile):
+        self.index = index
+
+    def get_version(self) -> str | None:
+        return self.index.version
+
+    def get_build_parameters(self) -> dict:
+        return self.index.build_parameters
+
+
+class IndexFileDocumentRepository:
+    """
+    Repository for Document Entity backed by a memory-mapped index file
+    """
+    candidates_columns = ['term', 'doc_id', 'term_frequency', 'document_frequency', 'tf_value', 'idf_value', 'tf_idf',
+                          'document_norm']
+
+    def __init__(self, index: IndexFile):
+        self.index = index
+
+    """
+    Read
+    """
+
+    def get_total_documents_count(self) -> int:
+        return self.index.total_documents
+
+    def get_documents_by_doc_ids(self, doc_ids: list[int]) -> list[dict]:
+        rows = self.index.get_document_rows(doc_ids)
+        return [
+            {'doc_id': int(self.index.doc_ids[row]), 'title': self.index.titles[row], 'url': self.index.urls[row]}
+            for row in rows if row >= 0
+        ]
+
+    def get_postings(self, term: str, doc_ids: list[int] | None = None) -> tuple[np.ndarray, np.ndarray]:
+        if term not in self.index.term_ids:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+
+        postings = self.index.get_postings_slice(term)
+        postings_doc_ids = self.index.postings_doc_ids[postings]
+        impacts = self.index.postings_impacts[postings]
+
+        if doc_ids is None:
+            return np.asarray(postings_doc_ids), np.asarray(impacts)
+
+        # binary search of the probed doc ids, the rest of the postings list is not touched
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        if len(postings_doc_ids) == 0:
+            return doc_ids[:0], np.array([], dtype=np.float64)
+
+        positions = np.minimum(np.searchsorted(postings_doc_ids, doc_ids), len(postings_doc_ids) - 1)
+        found = postings_doc_ids[positions] == doc_ids
+
+        return doc_ids[found], np.asarray(impacts[positions[found]])
+
+    def get_positions(self, term: str, doc_ids: list[int]) -> dict[int, np.ndarray]:
+        """
+        Positions of term in each of the given documents containing it, only their postings are decoded
+        """
+        if not self.index.has_positions:
+            raise Exception(f"Index file has no positions, build it again to run phrase queries: {self.index.path}")
+        if term not in self.index.term_ids or not len(doc_ids):
+            return {}
+
+        postings = self.index.get_postings_slice(term)
+        postings_doc_ids = self.index.postings_doc_ids[postings]
+        if len(postings_doc_ids) == 0:
+            return {}
+
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(postings_doc_ids, doc_ids), len(postings_doc_ids) - 1)
+        found = postings_doc_ids[rows] == doc_ids
+
+        return {
+            doc_id: self.index.get_positions(postings.start + row)
+            for doc_id, row in zip(doc_ids[found].tolist(), rows[found].tolist())
+        }
+
+    def _build_candidates(self, term: str, postings_mask, total_documents: int) -> pd.DataFrame:
+        postings = self.index.get_postings_slice(term)
+        doc_ids = self.index.postings_doc_ids[postings]
+        term_frequencies = self.index.postings_term_frequencies[postings]
+
+        if postings_mask is not None:
+            mask = postings_mask(doc_ids, self.index.postings_is_champion[postings])
+            doc_ids = doc_ids[mask]
+            term_frequencies = term_frequencies[mask]
+
+        document_frequency = self.index.get_document_frequency(term)
+        tf_values = tf_value(term_frequencies.astype(np.float64))
+        idf = idf_value(document_frequency, total_documents)
+
+        return pd.DataFrame({
+            'term': term,
+            'doc_id': doc_ids,
+            'term_frequency': term_frequencies,
+            'document_frequency': document_frequency,
+            'tf_value': tf_values,
+            'idf_value': idf,
+            'tf_idf': tf_values * idf,
+            'document_norm': self.index.document_norms[self.index.get_document_rows(doc_ids)]
+        }, columns=self.candidates_columns)
+
+    def _build_candidates_frame(self, query_terms: list[str], total_documents: int,
+                                postings_mask=None) -> pd.DataFrame:
+        frames = [
+            self._build_candidates(term=term, postings_mask=postings_mask, total_documents=total_documents)
+            for term in query_terms if term in self.index.term_ids
+        ]
+
+        if not frames:
+            return pd.DataFrame(columns=self.candidates_columns)
+
+        return pd.concat(frames, ignore_index=True)
+
+    def get_champion_documents_by_query_terms(self, query_terms: list[str], total_documents: int) -> pd.DataFrame:
+        return self._build_candidates_frame(
+            query_terms=query_terms,
+            total_documents=total_documents,
+            postings_mask=lambda doc_ids, is_champion: is_champion
+        )
+
+    def get_documents_matching_all_query_terms(self, query_terms: list[str], term_with_lowest_document_frequency: str,
+                                               total_documents: int) -> pd.DataFrame:
+        if any(term not in self.index.term_ids for term in query_terms):
+            return pd.DataFrame(columns=self.candidates_columns)
+
+        # start from the shortest postings list and intersect with the others
+        matching_doc_ids = self.index.postings_doc_ids[self.index.get_postings_slice(term_with_lowest_document_frequency)]
+        for term in query_terms:
+            matching_doc_ids = np.intersect1d(
+                matching_doc_ids, self.index.postings_doc_ids[self.index.get_postings_slice(term)], assume_unique=True
+            )
+
+        return self._build_candidates_frame(
+            query_terms=query_terms,
+            total_documents=total_documents,
+            postings_mask=lambda doc_ids, is_champion: np.isin(doc_ids, matching_doc_ids, assume_unique=True)
+        )
+
+    def get_high_idf_documents_by_query_terms(self, query_terms: list[str],
+                                              document_frequency_threshold: float,
+                                              total_documents: int) -> pd.DataFrame:
+        return self._build_candidates_frame(
+            query_terms=[
+                term for term in query_terms
+                if term in self.index.term_ids
+                and self.index.get_document_frequency(term) < document_frequency_threshold
+            ],
+            total_documents=total_documents
+        )
+
+    def get_all_documents_by_query_terms(self, query_terms: list[str], total_documents: int) -> pd.DataFrame:
+        return self._build_candidates_frame(query_terms=query_terms, total_documents=total_documents)
+
+    def get_postings_by_query_terms(self, query_terms: list[str], total_documents: int) -> pd.DataFrame:
+        frames = [
+            self._build_candidates(term=term, postings_mask=None, total_documents=total_documents).assign(
+                is_champion=np.asarray(self.index.postings_is_champion[self.index.get_postings_slice(term)])
+            )
+            for term in query_terms if term in self.index.term_ids
+        ]
+
+        if not frames:
+            return pd.DataFrame(columns=self.candidates_columns + ['is_champion'])
+
+        return pd.concat(frames, ignore_index=True)
+
+    def get_candidates_by_cascade(self, query_terms: list[str], count: int = 10) -> pd.DataFrame:
+        """
+        Filter levels 1 to 4 one after another until there are `count` candidates, all in-process
+        """
+        terms = [term for term in query_terms if term in self.index.term_ids]
+        if not terms:
+            return pd.DataFrame(columns=self.candidates_columns)
+
+        document_frequencies = [self.index.get_document_frequency(term) for term in terms]
+        total_documents = self.get_total_documents_count()
+
+        levels = [
+            lambda: self.get_documents_matching_all_query_terms(
+                query_terms=query_terms,
+                term_with_lowest_document_frequency=terms[int(np.argmin(document_frequencies))],
+                total_documents=total_documents),
+            lambda: self.get_champion_documents_by_query_terms(query_terms=terms, total_documents=total_documents),
+            lambda: self.get_high_idf_documents_by_query_terms(
+                query_terms=terms,
+                document_frequency_threshold=float(np.mean(document_frequencies)),
+                total_documents=total_documents),
+            lambda: self.get_all_documents_by_query_terms(query_terms=terms, total_documents=total_documents),
+        ]
+
+        candidates = pd.DataFrame(columns=self.candidates_columns)
+        for level in levels:
+            if len(candidates) >= count:
+                break
+            candidates = pd.concat([candidates, level()]).drop_duplicates()
+
+        return candidates
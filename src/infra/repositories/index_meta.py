@@ -0,0 +1,50 @@
+import json
+
+from src.infra.repositories.utils import cypher_query
+
+
+class IndexMetaRepository:
+    """
+    Repository for IndexMeta Entity, a single node holding the version stamp of the current index
+    and the parameters it was built with
+    """
+
+    @staticmethod
+    def set_version(version: str, total_documents: int, build_parameters: dict | None = None):
+        """
+        Without build_parameters the ones of the index are kept, as an incremental update does not rebuild it
+        """
+        # node properties cannot be maps, so the parameters are kept as json
+        query = """
+        MERGE (m:IndexMeta)
+        SET m.version = $version, m.total_documents = $total_documents,
+            m.build_parameters = coalesce($build_parameters, m.build_parameters)
+        """
+
+        cypher_query(query, {
+            'version': version,
+            'total_documents': total_documents,
+            'build_parameters': json.dumps(build_parameters) if build_parameters is not None else None
+        })
+
+    @staticmethod
+    def get_version() -> str | None:
+        query = """
+        MATCH (m:IndexMeta)
+        RETURN m.version AS version
+        LIMIT 1
+        """
+
+        result, _ = cypher_query(query)
+        return result[0][0] if result else None
+
+    @staticmethod
+    def get_build_parameters() -> dict:
+        query = """
+        MATCH (m:IndexMeta)
+        RETURN m.build_parameters AS build_parameters
+        LIMIT 1
+        """
+
+        result, _ = cypher_query(query)
+        return json.loads(result[0][0]) if result and result[0][0] else {}
@@ -0,0 +1,194 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import pandas as pd
+
+from src.infra.connection import create_driver
+from src.infra.models import install_all_labels
+from src.infra.repositories.utils import detach_delete_all
+from src.utils import logger
+
+
+class ThroughputController:
+    """
+    Adapts batch size and parallelism to the observed throughput.
+    Batch size follows the per-batch write rate so that a batch takes about target_batch_seconds,
+    parallelism is hill-climbed on the total rows/sec of each window of batches.
+    """
+
+    def __init__(self, batch_size: int, parallelism: int, min_batch_size: int = 200, max_batch_size: int = 50_000,
+                 max_parallelism: int = 8, target_batch_seconds: float = 1.0):
+        self.batch_size = batch_size
+        self.parallelism = parallelism
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.max_parallelism = max_parallelism
+        self.target_batch_seconds = target_batch_seconds
+
+        self._window_rows = 0
+        self._window_start = time.perf_counter()
+        self._window_batches = 0
+        self._last_throughput = None
+        self._direction = 1
+
+    def record(self, rows: int, seconds: float):
+        if rows and seconds > 0:
+            # smooth the change, a single slow batch should not collapse the batch size
+            target_size = rows / seconds * self.target_batch_seconds
+            self.batch_size = int(np.clip((self.batch_size + target_size) / 2, self.min_batch_size,
+                                          self.max_batch_size))
+
+        self._window_rows += rows
+        self._window_batches += 1
+        if self._window_batches >= 2 * self.parallelism:
+            self._adapt_parallelism()
+
+    def _adapt_parallelism(self):
+        elapsed = time.perf_counter() - self._window_start
+        throughput = self._window_rows / elapsed if elapsed > 0 else 0.0
+
+        if self._last_throughput is not None and throughput < self._last_throughput:
+            self._direction = -self._direction
+
+        self.parallelism = int(np.clip(self.parallelism + self._direction, 1, self.max_parallelism))
+        self._last_throughput = throughput
+
+        self._window_rows = 0
+        self._window_batches = 0
+        self._window_start = time.perf_counter()
+
+
+class GraphIngestor:
+    """
+    Loads the index into an empty Neo4j database with concurrent batched write transactions.
+    Relationships are matched by the unique term value and doc_id, and each batch holds whole term groups,
+    so concurrent batches never write relationships of the same term.
+    """
+
+    terms_query = """
+    UNWIND $rows AS row
+    CREATE (:Term {value: row.term, document_frequency: row.document_frequency, max_impact: row.max_impact})
+    """
+
+    documents_query = """
+    UNWIND $rows AS row
+    CREATE (:Document {doc_id: row.doc_id, title: row.title, url: row.url, vector_norm: row.vector_norm})
+    """
+
+    relationships_query = """
+    UNWIND $rows AS row
+    MATCH (t:Term {value: row.term})
+    MATCH (d:Document {doc_id: row.doc_id})
+    CREATE (t)-[:EXISTS_IN {term_frequency: row.term_frequency, positions: row.positions, is_champion: row.is_champion,
+                             impact: row.impact}]->(d)
+    """
+
+    def __init__(self, database_url: str, batch_size: int = 2000, parallelism: int = 4, max_parallelism: int = 8,
+                 progress_interval: float = 5.0):
+        self.database_url = database_url
+        self.batch_size = batch_size
+        self.parallelism = parallelism
+        self.max_parallelism = max_parallelism
+        self.progress_interval = progress_interval
+
+        self.driver, self.database = create_driver(database_url, max_connection_pool_size=max_parallelism * 2)
+
+    def close(self):
+        self.driver.close()
+
+    @staticmethod
+    def ensure_constraints():
+        # unique constraints back the property lookups of relationships, they must exist before loading
+        install_all_labels()
+
+    # the constraints install_all_labels creates for the models, by their neomodel names
+    constraints_queries = [
+        'CREATE CONSTRAINT constraint_unique_Term_value IF NOT EXISTS FOR (n:Term) REQUIRE n.value IS UNIQUE',
+        'CREATE CONSTRAINT constraint_unique_Document_doc_id IF NOT EXISTS FOR (n:Document) REQUIRE n.doc_id IS UNIQUE'
+    ]
+
+    def create_constraints(self):
+        """
+        Constraints of ensure_constraints on the ingestor's own database, neomodel only reaches DATABASE_URL
+        """
+        for query in self.constraints_queries:
+            self.driver.execute_query(query, database_=self.database)
+
+    def is_empty(self) -> bool:
+        records, _, _ = self.driver.execute_query('MATCH (n) RETURN n LIMIT 1', database_=self.database)
+        return not records
+
+    def delete_all(self):
+        detach_delete_all(run_query=lambda query: self.driver.execute_query(query, database_=self.database).records)
+
+    def _write_batch(self, query: str, rows: list[dict]) -> tuple[int, float]:
+        start = time.perf_counter()
+        with self.driver.session(database=self.database) as session:
+            session.execute_write(lambda tx: tx.run(query, rows=rows).consume())
+
+        return len(rows), time.perf_counter() - start
+
+    def _ingest(self, query: str, df: pd.DataFrame, label: str, group_boundaries: np.ndarray | None = None):
+        """
+        Writes rows of df in batches, a batch never splits rows between two group boundaries
+        """
+        total_rows = len(df)
+        if total_rows == 0:
+            return
+
+        if group_boundaries is None:
+            group_boundaries = np.arange(1, total_rows + 1)
+
+        controller = ThroughputController(batch_size=self.batch_size, parallelism=self.parallelism,
+                                          max_parallelism=self.max_parallelism)
+        start_time = last_report_time = time.perf_counter()
+        next_row = written_rows = 0
+        in_flight = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_parallelism) as executor:
+            while next_row < total_rows or in_flight:
+                while next_row < total_rows and len(in_flight) < controller.parallelism:
+                    boundary = np.searchsorted(group_boundaries, next_row + controller.batch_size)
+                    end_row = int(group_boundaries[min(boundary, len(group_boundaries) - 1)])
+
+                    rows = df.iloc[next_row:end_row].to_dict('records')
+                    in_flight.add(executor.submit(self._write_batch, query, rows))
+                    next_row = end_row
+
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rows_count, seconds = future.result()
+                    controller.record(rows=rows_count, seconds=seconds)
+                    written_rows += rows_count
+
+                now = time.perf_counter()
+                if now - last_report_time >= self.progress_interval:
+                    last_report_time = now
+                    logger.log(
+                        f'{label}: {written_rows}/{total_rows} rows, {written_rows / (now - start_time):.0f} rows/sec, '
+                        f'batch size {controller.batch_size}, parallelism {controller.parallelism}'
+                    )
+
+        elapsed = time.perf_counter() - start_time
+        logger.log(f'{label}: {total_rows} rows in {elapsed:.1f}s, {total_rows / elapsed:.0f} rows/sec')
+
+    def ingest_terms(self, terms_df: pd.DataFrame):
+        self._ingest(self.terms_query, terms_df[['term', 'document_frequency', 'max_impact']], label='Terms')
+
+    def ingest_documents(self, documents_df: pd.DataFrame):
+        self._ingest(self.documents_query, documents_df[['doc_id', 'title', 'url', 'vector_norm']], label='Documents')
+
+    def ingest_relationships(self, term_doc_df: pd.DataFrame):
+        term_doc_df = term_doc_df.sort_values(by='term', kind='stable').reset_index(drop=True)
+        terms = term_doc_df['term'].to_numpy()
+
+        # end of each term group
+        group_boundaries = np.append(np.flatnonzero(terms[1:] != terms[:-1]) + 1, len(terms))
+
+        self._ingest(
+            self.relationships_query,
+            term_doc_df[['term', 'doc_id', 'term_frequency', 'positions', 'is_champion', 'impact']],
+            label='EXISTS_IN relations',
+            group_boundaries=group_boundaries
+        )
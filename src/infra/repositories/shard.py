@@ -0,0 +1,99 @@
+import pandas as pd
+from neo4j import Driver, RoutingControl
+
+from src.infra.repositories.document import DocumentRepository
+from src.infra.repositories.term import TermRepository
+from src.infra.repositories.utils import estimate_size
+from src.utils.metrics import metrics, SIZE_BUCKETS
+
+
+class ShardCypherRunner:
+    """
+    Runs read queries on the driver of one shard database, neomodel's `db` is bound to the primary database only
+    """
+
+    def __init__(self, driver: Driver, database: str | None = None):
+        self.driver = driver
+        self.database = database
+
+    def cypher_query(self, query: str, params: dict | None = None) -> list[list]:
+        records, _, _ = self.driver.execute_query(
+            query, params or {}, database_=self.database, routing_=RoutingControl.READ
+        )
+        result = [list(record.values()) for record in records]
+
+        if metrics.enabled:
+            size = estimate_size(result)
+            metrics.increment('db_calls', method='shard')
+            metrics.increment('db_returned_bytes', size, method='shard')
+            metrics.observe('db_returned_rows', len(result), buckets=SIZE_BUCKETS, method='shard')
+
+        return result
+
+
+class ShardTermRepository(ShardCypherRunner):
+    """
+    Repository for Term Entity of one shard, with the queries of TermRepository.
+    Terms of a shard carry the global document frequency and max impact.
+    """
+
+    def get_terms_document_frequencies(self, query_terms: list[str]) -> pd.DataFrame:
+        result = self.cypher_query(TermRepository.terms_document_frequencies_query, {'query_terms': query_terms})
+        return pd.DataFrame(result, columns=['term', 'document_frequency'])
+
+    def get_terms_max_impacts(self, query_terms: list[str]) -> dict:
+        result = self.cypher_query(TermRepository.terms_max_impacts_query, {'query_terms': query_terms})
+        return {term: max_impact or 0.0 for term, max_impact in result}
+
+
+class ShardDocumentRepository(ShardCypherRunner):
+    """
+    Repository for Document Entity of one shard, with the queries of DocumentRepository
+    """
+    candidates_columns = DocumentRepository.candidates_columns
+
+    def get_total_documents_count(self) -> int:
+        result = self.cypher_query(DocumentRepository.total_documents_count_query)
+        return result[0][0]
+
+    def get_documents_by_doc_ids(self, doc_ids: list[int]) -> list[dict]:
+        result = self.cypher_query(DocumentRepository.documents_by_doc_ids_query, {'doc_ids': doc_ids})
+        return DocumentRepository._build_documents(result)
+
+    def get_postings(self, term: str, doc_ids: list[int] | None = None):
+        query = DocumentRepository.postings_query if doc_ids is None else DocumentRepository.postings_by_doc_ids_query
+
+        result = self.cypher_query(query, {'term': term, 'doc_ids': doc_ids})
+        return DocumentRepository._build_postings(result)
+
+    def get_positions(self, term: str, doc_ids: list[int]) -> dict:
+        result = self.cypher_query(DocumentRepository.positions_by_doc_ids_query, {'term': term, 'doc_ids': doc_ids})
+        return DocumentRepository._build_positions(result)
+
+    def get_documents_matching_all_query_terms(self, query_terms: list[str], term_with_lowest_document_frequency: str,
+                                               total_documents: int) -> pd.DataFrame:
+        result = self.cypher_query(DocumentRepository.documents_matching_all_query_terms_query, {
+            'query_terms': query_terms,
+            'term_with_lowest_document_frequency': term_with_lowest_document_frequency
+        })
+        return DocumentRepository._build_candidates_frame(result, total_documents=total_documents)
+
+    def get_champion_documents_by_query_terms(self, query_terms: list[str], total_documents: int) -> pd.DataFrame:
+        result = self.cypher_query(DocumentRepository.champion_documents_query, {'query_terms': query_terms})
+        return DocumentRepository._build_candidates_frame(result, total_documents=total_documents)
+
+    def get_high_idf_documents_by_query_terms(self, query_terms: list[str], document_frequency_threshold: float,
+                                              total_documents: int) -> pd.DataFrame:
+        result = self.cypher_query(DocumentRepository.high_idf_documents_query, {
+            'query_terms': query_terms,
+            'document_frequency_threshold': document_frequency_threshold
+        })
+        return DocumentRepository._build_candidates_frame(result, total_documents=total_documents)
+
+    def get_all_documents_by_query_terms(self, query_terms: list[str], total_documents: int) -> pd.DataFrame:
+        result = self.cypher_query(DocumentRepository.all_documents_query, {'query_terms': query_terms})
+        return DocumentRepository._build_candidates_frame(result, total_documents=total_documents)
+
+    def get_postings_by_query_terms(self, query_terms: list[str], total_documents: int) -> pd.DataFrame:
+        result = self.cypher_query(DocumentRepository.postings_by_query_terms_query, {'query_terms': query_terms})
+        return DocumentRepository._build_postings_frame(result, total_documents=total_documents)
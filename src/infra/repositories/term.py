@@ -1,5 +1,5 @@
 import pandas as pd
-from neomodel import db
+from src.infra.repositories.utils import cypher_query
 
 
 class TermRepository:
@@ -20,7 +20,20 @@ class TermRepository:
         """
 
         cypher_query_params = {"rows": terms_df.to_dict('records')}
-        results, _ = db.cypher_query(query, cypher_query_params)
+        results, _ = cypher_query(query, cypher_query_params)
+
+        return {term: term_id_in_neo for term, term_id_in_neo in results}
+
+    @staticmethod
+    def bulk_merge(terms: list[str]) -> dict:
+        query = """
+        UNWIND $terms AS term_value
+        MERGE (t:Term {value: term_value})
+        ON CREATE SET t.document_frequency = 0
+        RETURN t.value AS term, elementId(t) AS term_id_in_neo
+        """
+
+        results, _ = cypher_query(query, {'terms': terms})
 
         return {term: term_id_in_neo for term, term_id_in_neo in results}
 
@@ -36,17 +49,92 @@ class TermRepository:
         RETURN t.value
         """
 
-        result, _ = db.cypher_query(query, {'query_terms': query_terms})
+        result, _ = cypher_query(query, {'query_terms': query_terms})
+        return [term[0] for term in result]
+
+    @staticmethod
+    def get_terms_by_doc_ids(doc_ids: list[int]) -> list[str]:
+        query = """
+        UNWIND $doc_ids AS doc_id
+        MATCH (t:Term)-[:EXISTS_IN]->(:Document {doc_id: doc_id})
+        RETURN DISTINCT t.value
+        """
+
+        result, _ = cypher_query(query, {'doc_ids': doc_ids})
         return [term[0] for term in result]
 
+    # shared with AsyncTermRepository
+    terms_document_frequencies_query = """
+    UNWIND $query_terms AS term_value
+    MATCH (t:Term {value: term_value})
+    RETURN t.value AS term, t.document_frequency AS document_frequency
+    """
 
     @staticmethod
     def get_terms_document_frequencies(query_terms: list[str]) -> pd.DataFrame:
+        result, _ = cypher_query(TermRepository.terms_document_frequencies_query, {'query_terms': query_terms})
+        return pd.DataFrame(result, columns=['term', 'document_frequency'])
+
+    terms_max_impacts_query = """
+    UNWIND $query_terms AS term_value
+    MATCH (t:Term {value: term_value})
+    RETURN t.value AS term, t.max_impact AS max_impact
+    """
+
+    @staticmethod
+    def get_terms_max_impacts(query_terms: list[str]) -> dict:
+        result, _ = cypher_query(TermRepository.terms_max_impacts_query, {'query_terms': query_terms})
+        return {term: max_impact or 0.0 for term, max_impact in result}
+
+    @staticmethod
+    def get_all_document_frequencies() -> pd.DataFrame:
         query = """
-        UNWIND $query_terms AS term_value
-        MATCH (t:Term {value: term_value})
+        MATCH (t:Term)
         RETURN t.value AS term, t.document_frequency AS document_frequency
         """
 
-        result, _ = db.cypher_query(query, {'query_terms': query_terms})
+        result, _ = cypher_query(query)
         return pd.DataFrame(result, columns=['term', 'document_frequency'])
+
+    @staticmethod
+    def get_all_terms() -> pd.DataFrame:
+        query = """
+        MATCH (t:Term)
+        RETURN t.value AS term, t.document_frequency AS document_frequency, t.max_impact AS max_impact
+        """
+
+        result, _ = cypher_query(query)
+        return pd.DataFrame(result, columns=['term', 'document_frequency', 'max_impact'])
+
+    """
+    Update
+    """
+
+    @staticmethod
+    def update_document_frequencies(terms: list[str]):
+        query = """
+        UNWIND $terms AS term_value
+        MATCH (t:Term {value: term_value})
+        OPTIONAL MATCH (t)-[e:EXISTS_IN]->(:Document)
+        WITH t, COUNT(e) AS document_frequency
+        SET t.document_frequency = document_frequency
+        """
+
+        cypher_query(query, {'terms': terms})
+
+    """
+    Delete
+    """
+
+    @staticmethod
+    def delete_orphan_terms(terms: list[str]) -> int:
+        query = """
+        UNWIND $terms AS term_value
+        MATCH (t:Term {value: term_value})
+        WHERE NOT (t)-[:EXISTS_IN]->()
+        DELETE t
+        RETURN COUNT(t) AS deleted_count
+        """
+
+        result, _ = cypher_query(query, {'terms': terms})
+        return result[0][0]
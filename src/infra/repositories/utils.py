@@ -1,17 +1,59 @@
+import sys
+
 from neomodel import db
 import pandas as pd
 
+from src.utils.metrics import metrics, SIZE_BUCKETS
+
+
+def estimate_size(value) -> int:
+    """
+    Approximate bytes of a query result, strings by their utf-8 length and scalars as 8 bytes
+    """
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+
+    return 8
+
+
+def cypher_query(query: str, params: dict | None = None):
+    """
+    db.cypher_query, counting the calls and returned bytes per calling repository method when metrics are enabled
+    """
+    if not metrics.enabled:
+        return db.cypher_query(query, params)
+
+    method = sys._getframe(1).f_code.co_name
+    with metrics.span('db_query') as span:
+        result, meta = db.cypher_query(query, params)
+        size = estimate_size(result)
+        span.set(method=method, rows=len(result), bytes=size)
+
+    metrics.increment('db_calls', method=method)
+    metrics.increment('db_returned_bytes', size, method=method)
+    metrics.observe('db_returned_rows', len(result), buckets=SIZE_BUCKETS, method=method)
+    return result, meta
+
 
 def bulk_create_with_batches(query: str, data: pd.DataFrame, batch_size: int =2000):
     for i in range(0, len(data), batch_size):
         batch = data[i:i + batch_size]
-        db.cypher_query(query, {"rows": batch.to_dict('records')})
+        cypher_query(query, {"rows": batch.to_dict('records')})
+
 
+def detach_delete_all(batch_size: int = 20_000, run_query=None):
+    """
+    Deletes everything in batches, on the neomodel database unless run_query (query -> rows) is given
+    """
+    run_query = run_query or (lambda query: cypher_query(query)[0])
 
-def detach_delete_all(batch_size: int = 20_000):
     def delete_by_query(query):
         while True:
-            result, _ = db.cypher_query(query)
+            result = run_query(query)
             deleted_count = result[0][0]
 
             if deleted_count == 0:
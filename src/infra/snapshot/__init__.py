@@ -0,0 +1,4 @@
+from src.infra.snapshot.writer import SnapshotWriter
+from src.infra.snapshot.reader import Snapshot, SNAPSHOT_FORMAT, is_snapshot
+
+__all__ = ['SnapshotWriter', 'Snapshot', 'SNAPSHOT_FORMAT', 'is_snapshot']
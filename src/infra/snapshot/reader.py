@@ -0,0 +1,106 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.utils.positions import encode_positions_array
+
+SNAPSHOT_FORMAT = 'neo-ir-snapshot'
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def decode_strings(data: np.ndarray, offsets: np.ndarray) -> list[str]:
+    buffer = data.tobytes()
+    offsets = offsets.tolist()
+
+    return [buffer[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def decode_nullable_strings(arrays: dict[str, np.ndarray], name: str) -> list[str | None]:
+    """
+    Strings of the name column, None where its null mask is set (snapshots written before null masks have none)
+    """
+    values = decode_strings(arrays[f'{name}_data'], arrays[f'{name}_offsets'])
+    if f'{name}_is_null' not in arrays:
+        return values
+
+    return [None if is_null else value for value, is_null in zip(values, arrays[f'{name}_is_null'].tolist())]
+
+
+def _load_manifest(path: str) -> dict | None:
+    manifest_path = os.path.join(path, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return None
+
+    with open(manifest_path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def is_snapshot(path: str) -> bool:
+    manifest = _load_manifest(path)
+    return manifest is not None and manifest.get('format') == SNAPSHOT_FORMAT
+
+
+class Snapshot:
+    """
+    Snapshot written by SnapshotWriter, arrays are decompressed when a file is first loaded
+    """
+
+    def __init__(self, path: str):
+        manifest = _load_manifest(path)
+        if manifest is None or manifest.get('format') != SNAPSHOT_FORMAT:
+            raise Exception(f"Snapshot not found: {path}")
+        if manifest['format_version'] > SNAPSHOT_FORMAT_VERSION:
+            raise Exception(f"Snapshot format version {manifest['format_version']} is not supported: {path}")
+
+        self.path = path
+        self.manifest = manifest
+        self.version = manifest.get('version')
+        self.total_documents = manifest['total_documents']
+        self.parameters = manifest.get('parameters', {})
+
+    def load_arrays(self, name: str) -> dict[str, np.ndarray]:
+        with np.load(os.path.join(self.path, f'{name}.npz')) as archive:
+            return {key: archive[key] for key in archive.files}
+
+    def terms_frame(self) -> pd.DataFrame:
+        terms = self.load_arrays('terms')
+        return pd.DataFrame({
+            'term': decode_strings(terms['term_data'], terms['term_offsets']),
+            'document_frequency': terms['document_frequency'].astype(np.int64),
+            'max_impact': terms['max_impact']
+        })
+
+    def documents_frame(self) -> pd.DataFrame:
+        documents = self.load_arrays('documents')
+        return pd.DataFrame({
+            'doc_id': documents['doc_id'],
+            'title': decode_nullable_strings(documents, 'title'),
+            'url': decode_nullable_strings(documents, 'url'),
+            'vector_norm': documents['vector_norm']
+        })
+
+    def term_doc_frame(self, terms: list[str] | None = None, encode_positions: bool = False) -> pd.DataFrame:
+        """
+        Postings with term strings and positions lists (or delta and varint bytes with encode_positions),
+        in the columns of GraphIngestor.ingest_relationships
+        """
+        if terms is None:
+            terms = self.terms_frame()['term'].tolist()
+        postings = self.load_arrays('postings')
+
+        if encode_positions:
+            data, byte_offsets = encode_positions_array(postings['positions'], postings['position_offsets'])
+            positions, offsets = data.tobytes(), byte_offsets.tolist()
+        else:
+            positions, offsets = postings['positions'].tolist(), postings['position_offsets'].tolist()
+
+        return pd.DataFrame({
+            'term': np.asarray(terms, dtype=object)[postings['term_id']],
+            'doc_id': postings['doc_id'],
+            'term_frequency': postings['term_frequency'].astype(np.int64),
+            'positions': [positions[start:end] for start, end in zip(offsets[:-1], offsets[1:])],
+            'is_champion': postings['is_champion'],
+            'impact': postings['impact']
+        })
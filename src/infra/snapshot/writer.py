@@ -0,0 +1,155 @@
+import itertools
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from src.infra.snapshot.reader import SNAPSHOT_FORMAT, SNAPSHOT_FORMAT_VERSION, is_snapshot
+
+
+def _is_null(value) -> bool:
+    # pandas may hold a missing string as NaN, which is the only value not equal to itself
+    return value is None or value != value
+
+
+def encode_strings(values) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Strings as one utf-8 buffer sliced by offsets, so that a long title does not widen a fixed size column.
+    None is stored as an empty string, see null_mask.
+    """
+    encoded = [('' if _is_null(value) else str(value)).encode('utf-8') for value in values]
+
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def null_mask(values) -> np.ndarray:
+    return np.array([_is_null(value) for value in values], dtype=bool)
+
+
+class SnapshotWriter:
+    """
+    Writes a portable snapshot of the index, columnar arrays in compressed numpy archives.
+    The snapshot is written into a temporary directory next to path and moved into place when complete,
+    so path always holds either the previous snapshot or the new one.
+
+    Layout:
+    + manifest.json: format, index version, build parameters and counts
+    + terms.npz: sorted terms (term_data sliced by term_offsets), document_frequency, max_impact
+    + documents.npz: sorted doc_id, vector_norm, title_data/title_offsets, url_data/url_offsets,
+      title_is_null/url_is_null for documents without a title or url
+    + postings.npz: postings sorted by term and doc_id, term_id is the position of the term in terms.npz.
+      term_frequency, is_champion, impact, and positions of posting i in positions[position_offsets[i]:
+      position_offsets[i + 1]]
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.temporary_path = path
+
+    def _save_arrays(self, name: str, **arrays: np.ndarray):
+        np.savez_compressed(os.path.join(self.temporary_path, f'{name}.npz'), **arrays)
+
+    def _save_json(self, name: str, data):
+        with open(os.path.join(self.temporary_path, f'{name}.json'), 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False, indent=2)
+
+    def _move_into_place(self):
+        # a directory can not be replaced while it has files, the previous snapshot is moved aside first
+        previous_path = None
+        if os.path.exists(self.path):
+            previous_path = f'{self.path}.previous-{uuid.uuid4().hex}'
+            os.rename(self.path, previous_path)
+
+        os.rename(self.temporary_path, self.path)
+        if previous_path is not None:
+            shutil.rmtree(previous_path)
+
+    def write(self, terms_df: pd.DataFrame, term_doc_df: pd.DataFrame, documents_df: pd.DataFrame,
+              version: str | None = None, parameters: dict | None = None):
+        if os.path.exists(self.path) and (not os.path.isdir(self.path) or os.listdir(self.path)) \
+                and not is_snapshot(self.path):
+            raise Exception(f"{self.path} exists and is not a snapshot, it is not replaced")
+
+        self.temporary_path = f'{self.path}.tmp-{uuid.uuid4().hex}'
+        os.makedirs(self.temporary_path)
+        try:
+            self._write(terms_df=terms_df, term_doc_df=term_doc_df, documents_df=documents_df, version=version,
+                        parameters=parameters)
+            self._move_into_place()
+        except BaseException:
+            shutil.rmtree(self.temporary_path, ignore_errors=True)
+            raise
+
+    def _write(self, terms_df: pd.DataFrame, term_doc_df: pd.DataFrame, documents_df: pd.DataFrame,
+               version: str | None, parameters: dict | None):
+
+        terms_df = terms_df.drop_duplicates(subset=['term']).sort_values(by='term').reset_index(drop=True)
+        documents_df = documents_df.drop_duplicates(subset=['doc_id']).sort_values(by='doc_id')
+        term_doc_df = term_doc_df.drop_duplicates(subset=['term', 'doc_id'])
+
+        term_ids = pd.Series(np.arange(len(terms_df)), index=terms_df['term'])
+        postings_df = (
+            term_doc_df.assign(term_id=term_doc_df['term'].map(term_ids))
+            .dropna(subset=['term_id'])
+            .astype({'term_id': np.int64})
+            .sort_values(by=['term_id', 'doc_id'])
+        )
+
+        positions = postings_df['positions'].tolist()
+        position_offsets = np.zeros(len(positions) + 1, dtype=np.int64)
+        np.cumsum([len(posting_positions) for posting_positions in positions], out=position_offsets[1:])
+
+        term_data, term_offsets = encode_strings(terms_df['term'])
+        self._save_arrays(
+            'terms',
+            term_data=term_data,
+            term_offsets=term_offsets,
+            document_frequency=terms_df['document_frequency'].to_numpy(dtype=np.int32),
+            max_impact=terms_df['max_impact'].fillna(0.0).to_numpy(dtype=np.float64)
+        )
+
+        title_data, title_offsets = encode_strings(documents_df['title'])
+        url_data, url_offsets = encode_strings(documents_df['url'])
+        self._save_arrays(
+            'documents',
+            doc_id=documents_df['doc_id'].to_numpy(dtype=np.int64),
+            vector_norm=documents_df['vector_norm'].to_numpy(dtype=np.float64),
+            title_data=title_data,
+            title_offsets=title_offsets,
+            url_data=url_data,
+            url_offsets=url_offsets,
+            title_is_null=null_mask(documents_df['title']),
+            url_is_null=null_mask(documents_df['url'])
+        )
+
+        self._save_arrays(
+            'postings',
+            term_id=postings_df['term_id'].to_numpy(dtype=np.int32),
+            doc_id=postings_df['doc_id'].to_numpy(dtype=np.int64),
+            term_frequency=postings_df['term_frequency'].to_numpy(dtype=np.int32),
+            is_champion=postings_df['is_champion'].to_numpy(dtype=bool),
+            impact=postings_df['impact'].to_numpy(dtype=np.float64),
+            position_offsets=position_offsets,
+            positions=np.fromiter(itertools.chain.from_iterable(positions), dtype=np.int32,
+                                  count=int(position_offsets[-1]))
+        )
+
+        # written last, a directory without manifest is an incomplete snapshot
+        self._save_json('manifest', {
+            'format': SNAPSHOT_FORMAT,
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'version': version,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'parameters': parameters or {},
+            'total_documents': len(documents_df),
+            'terms_count': len(terms_df),
+            'postings_count': len(postings_df),
+            'positions_count': int(position_offsets[-1])
+        })
@@ -1,2 +1,4 @@
 from src.usecases.index.load_data import DataLoader
+from src.usecases.index.postings import Postings, PostingsBuilder
 from src.usecases.index.main import Indexer
+from src.usecases.index.snapshot import IndexSnapshot
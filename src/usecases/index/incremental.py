@@ -0,0 +1,100 @@
+import pandas as pd
+from neomodel import db
+
+from src.infra.repositories import TermRepository, DocumentRepository, ExistsInRepository, IndexMetaRepository
+from src.usecases.index.main import Indexer
+from src.usecases.index.process_documents import process_documents
+from src.usecases.utils import TextProcessor, get_processing_context, load_stop_terms
+
+from src.utils import logger
+from src.utils.config import config
+from src.utils.positions import encode_positions
+
+
+class IncrementalIndexer:
+    """
+    Upserts and deletes documents of an existing Neo4j index without rebuilding it.
+    Only the changed documents are processed, and only terms of those documents get their
+    document frequency and champions recomputed.
+    """
+
+    def __init__(self, removed_top_terms_path: str = 'data/removed_top_terms.csv', champions_count: int = 50):
+        self.removed_top_terms = load_stop_terms(removed_top_terms_path)
+        self.champions_count = champions_count
+
+    def build_changes(self, df: pd.DataFrame, text_processor: TextProcessor) -> tuple[pd.DataFrame, pd.DataFrame]:
+        df = df.reset_index().rename(columns=dict(index='doc_id'))
+        documents_df = df[['doc_id', 'title', 'url']].assign(vector_norm=0.0)
+
+        df['tokens'] = process_documents(
+            texts=df['text'].tolist(),
+            text_processor=text_processor,
+            workers=config.TEXT_PROCESSING_WORKERS,
+            chunk_size=config.TEXT_PROCESSING_CHUNK_SIZE
+        )
+
+        term_doc_df = Indexer._aggregate_tokens(df=df)
+        # terms removed from the full index as top frequent terms stay out of it
+        term_doc_df = term_doc_df[~term_doc_df['term'].isin(self.removed_top_terms)]
+        if config.COMPRESSED_POSITIONS:
+            term_doc_df = term_doc_df.assign(positions=term_doc_df['positions'].map(encode_positions))
+
+        return term_doc_df.assign(is_champion=False), documents_df
+
+    def update(self, df: pd.DataFrame | None = None, deleted_doc_ids: list[int] | None = None):
+        """
+        Documents of df (in the format of DataLoader.load_data) are inserted or replaced,
+        documents of deleted_doc_ids are removed
+        """
+        # postings of a sharded index are on the shards, updating the primary alone would desync them
+        if config.SHARD_DATABASE_URLS:
+            raise Exception('Incremental indexing of sharded indexes is not supported, rebuild the index')
+
+        text_processor = get_processing_context().get_text_processor()
+
+        if df is not None and len(df) > 0:
+            term_doc_df, documents_df = self.build_changes(df=df, text_processor=text_processor)
+        else:
+            term_doc_df, documents_df = pd.DataFrame(columns=['term', 'doc_id']), pd.DataFrame(columns=['doc_id'])
+
+        upserted_doc_ids = documents_df['doc_id'].tolist()
+        changed_doc_ids = list(set(upserted_doc_ids) | set(deleted_doc_ids or []))
+
+        if not changed_doc_ids:
+            logger.log('No documents to update.')
+            return
+
+        with db.transaction:
+            affected_terms = set(TermRepository.get_terms_by_doc_ids(doc_ids=changed_doc_ids))
+            affected_terms |= set(term_doc_df['term'])
+            affected_terms = list(affected_terms)
+
+            DocumentRepository.delete_by_doc_ids(doc_ids=changed_doc_ids)
+            logger.log(f'Removed old versions of {len(changed_doc_ids)} documents.')
+
+            if upserted_doc_ids:
+                document_ids = DocumentRepository.bulk_create(documents_df=documents_df)
+                term_ids = TermRepository.bulk_merge(terms=term_doc_df['term'].unique().tolist())
+
+                ExistsInRepository.bulk_create(
+                    exists_in_df=Indexer._prepare_relationships(term_doc_df.copy(), term_ids, document_ids)
+                )
+                logger.log(f'Saved {len(upserted_doc_ids)} documents and {len(term_doc_df)} relations.')
+
+            TermRepository.update_document_frequencies(terms=affected_terms)
+            deleted_terms_count = TermRepository.delete_orphan_terms(terms=affected_terms)
+            ExistsInRepository.update_champions(terms=affected_terms, k=self.champions_count)
+            logger.log(
+                f'Updated {len(affected_terms)} terms, removed {deleted_terms_count} terms without documents.'
+            )
+
+            # norms of other documents drift only through the small change of N and df, they are refreshed by reindex
+            DocumentRepository.update_vector_norms(doc_ids=upserted_doc_ids)
+            ExistsInRepository.update_impacts(terms=affected_terms)
+
+            IndexMetaRepository.set_version(
+                version=Indexer.new_index_version(),
+                total_documents=DocumentRepository.get_total_documents_count()
+            )
+
+        logger.log('Incremental indexing finished successfully.')
@@ -1,3 +1,6 @@
+import json
+from typing import Iterator
+
 import pandas as pd
 
 from src.utils import logger
@@ -27,6 +30,117 @@ class DataLoader:
         except ValueError:
             raise Exception("Error decoding json file.")
 
+    def load_batches(self, batch_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Streaming version of load_data, the file is parsed incrementally and
+        documents are yielded in frames of at most batch_size rows
+        """
+        loaded_count = 0
+        records = {}
+        for doc_id, record in self._iter_records():
+            self._validate_record(doc_id, record)
+            records[doc_id] = record
+
+            if len(records) == batch_size:
+                loaded_count += len(records)
+                yield self._make_batch(records)
+                records = {}
+
+        if records:
+            loaded_count += len(records)
+            yield self._make_batch(records)
+
+        logger.log(f'Loaded {loaded_count} documents successfully.')
+
+    def _make_batch(self, records: dict) -> pd.DataFrame:
+        df = pd.DataFrame.from_dict(records, orient='index')
+        return self._make_text_column(df)
+
+    def _iter_records(self, read_size: int = 1 << 20) -> Iterator[tuple[int | str, dict]]:
+        """
+        Yields (key, value) pairs of the top level json object without reading the whole file
+        """
+        decoder = json.JSONDecoder()
+
+        try:
+            file = open(self.file_path, encoding='utf-8')
+        except FileNotFoundError:
+            raise Exception(f"File not found: {self.file_path}")
+
+        with file:
+            buffer = ''
+            position = 0
+            is_eof = False
+
+            def read_more() -> bool:
+                nonlocal buffer, position, is_eof
+                chunk = file.read(read_size)
+                if not chunk:
+                    is_eof = True
+                    return False
+
+                buffer = buffer[position:] + chunk
+                position = 0
+                return True
+
+            def next_char() -> str:
+                nonlocal position
+                while True:
+                    while position < len(buffer) and buffer[position].isspace():
+                        position += 1
+                    if position < len(buffer):
+                        return buffer[position]
+                    if not read_more():
+                        raise Exception("Error decoding json file.")
+
+            def decode():
+                nonlocal position
+                while True:
+                    try:
+                        value, end = decoder.raw_decode(buffer, position)
+                    except json.JSONDecodeError:
+                        if is_eof or not read_more():
+                            raise Exception("Error decoding json file.")
+                        continue
+
+                    # a value that ends with the buffer may continue in the next chunk
+                    if end == len(buffer) and not is_eof and read_more():
+                        continue
+
+                    position = end
+                    return value
+
+            def expect(char: str):
+                nonlocal position
+                if next_char() != char:
+                    raise Exception("Error decoding json file.")
+                position += 1
+
+            expect('{')
+            if next_char() == '}':
+                return
+
+            while True:
+                key = decode()
+                expect(':')
+                next_char()
+                value = decode()
+
+                yield (int(key) if isinstance(key, str) and key.isdigit() else key), value
+
+                if next_char() == '}':
+                    return
+                expect(',')
+                next_char()
+
+    def _validate_record(self, doc_id, record):
+        if not isinstance(record, dict):
+            raise Exception(f"Document {doc_id} is not a json object.")
+
+        for column in self.required_columns:
+            if column not in record:
+                raise Exception(f"Document {doc_id} is missing required column: {column}")
+
     def _validate_data_structure(self, df: pd.DataFrame):
         for column in self.required_columns:
             if column not in df.columns:
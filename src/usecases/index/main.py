@@ -1,66 +1,217 @@
+import uuid
+from typing import Iterable
+
+import numpy as np
 import pandas as pd
 
-from src.infra.repositories import TermRepository, DocumentRepository, ExistsInRepository
+from src.infra.index_file import IndexFileWriter
+from src.infra.repositories import IndexMetaRepository
+from src.infra.repositories.ingestion import GraphIngestor
 from src.infra.repositories.utils import detach_delete_all
 from src.usecases.index import DataLoader
-from src.usecases.utils import TextProcessor
+from src.usecases.index.postings import Postings, PostingsBuilder
+from src.usecases.index.process_documents import process_documents
+from src.usecases.utils import TextProcessor, get_processing_context, save_stop_terms
 
 from src.utils import logger
+from src.utils.config import config
+from src.utils.metrics import metrics
+from src.utils.sharding import get_shards
+from src.utils.weighting import tf_value, idf_value
 
 
 class Indexer:
+    champions_count = 50
+
     @staticmethod
-    def _filter_top_frequent_terms(term_doc_df: pd.DataFrame, top_k: int = 50) -> pd.DataFrame:
-        term_frequencies = term_doc_df.groupby('term')['term_frequency'].sum().reset_index(name='total_frequency')
+    def _filter_top_frequent_terms(postings: Postings, top_k: int = 50) -> Postings:
+        total_frequencies = postings.collection_frequencies()
+        top_term_ids = np.argsort(-total_frequencies, kind='stable')[:top_k]
 
-        top_terms = term_frequencies.sort_values(by='total_frequency', ascending=False).head(top_k)
+        top_terms = pd.DataFrame({
+            'term': postings.terms[top_term_ids],
+            'total_frequency': total_frequencies[top_term_ids]
+        })
 
-        filtered_term_doc_df = term_doc_df[~term_doc_df['term'].isin(top_terms['term'])]
+        filtered_postings = postings.filter(~np.isin(postings.term_ids, top_term_ids))
 
         logger.log(f'Removed top {top_k} frequent terms.')
 
         top_terms.to_csv('data/removed_top_terms.csv', index=False)
 
-        return filtered_term_doc_df
+        return filtered_postings
+
+    @staticmethod
+    def _aggregate_tokens(df: pd.DataFrame) -> pd.DataFrame:
+        builder = PostingsBuilder()
+        builder.add_documents(doc_ids=df['doc_id'], tokens=df['tokens'])
+
+        return builder.build().to_term_doc_df()
+
+    @staticmethod
+    def _build_postings(builder: PostingsBuilder, text_processor: TextProcessor) -> Postings:
+        """
+        With stop terms enabled, a text processor without stop terms lets the top frequent terms through:
+        they are counted on the collected tokens, dropped before postings are aggregated and saved as stop terms,
+        which text processors drop from documents and queries from then on
+        """
+        if not config.STOP_TERMS_ENABLED or text_processor.stop_terms:
+            return builder.build()
+
+        top_terms = builder.top_terms(top_k=config.STOP_TERMS_COUNT)
+        save_stop_terms(top_terms=top_terms, path=config.STOP_TERMS_PATH)
+        logger.log(f'Saved top {len(top_terms)} frequent terms as stop terms.')
+
+        return builder.build(excluded_terms=top_terms['term'])
 
-    def build_index(self, df: pd.DataFrame, text_processor: TextProcessor) -> tuple[
-        pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    def _finalize_index(self, postings: Postings, documents_df: pd.DataFrame) -> tuple[
+        pd.DataFrame, Postings, pd.DataFrame]:
+        # stop terms never reach the postings
+        if not config.STOP_TERMS_ENABLED:
+            postings = self._filter_top_frequent_terms(postings=postings, top_k=config.STOP_TERMS_COUNT)
+
+        document_frequencies = postings.document_frequencies()
+        documents_df = self.add_document_norms(documents_df=documents_df, postings=postings)
+        max_impacts = self.add_impacts(postings=postings, documents_df=documents_df)
+
+        term_ids = np.flatnonzero(document_frequencies)
+        terms_df = pd.DataFrame({
+            'term': postings.terms[term_ids],
+            'document_frequency': document_frequencies[term_ids],
+            'max_impact': max_impacts[term_ids]
+        })
+
+        return terms_df, postings, documents_df
+
+    def build_index(self, df: pd.DataFrame, text_processor: TextProcessor, workers: int = 1,
+                    chunk_size: int = 500) -> tuple[pd.DataFrame, Postings, pd.DataFrame]:
+        """
+        Terms with document frequency and max impact, postings with impacts and documents with norms.
+        Postings stay in arrays until they are saved.
+        """
         df = df.reset_index().rename(columns=dict(index='doc_id'))
         documents_df = df[['doc_id', 'title', 'url']]
 
-        df['tokens'] = df['text'].apply(text_processor.process_text)
+        with metrics.span('tokenize') as span:
+            tokens = process_documents(
+                texts=df['text'].tolist(),
+                text_processor=text_processor,
+                workers=workers,
+                chunk_size=chunk_size
+            )
+            span.set(documents=len(df))
 
-        tokens_df = df.explode('tokens')[['doc_id', 'tokens']]
-        tokens_df["position"] = tokens_df.groupby('doc_id').cumcount()
+        with metrics.span('aggregate'):
+            builder = PostingsBuilder()
+            builder.add_documents(doc_ids=df['doc_id'], tokens=tokens)
+            del tokens
+            postings = self._build_postings(builder=builder, text_processor=text_processor)
 
-        term_doc_df = (
-            tokens_df.groupby(['tokens', 'doc_id'])
-            .agg(
-                term_frequency=('tokens', 'count'),
-                positions=('position', list)
-            )
-            .reset_index()
-            .rename(columns=dict(tokens='term'))
-        )
+        with metrics.span('finalize'):
+            return self._finalize_index(postings=postings, documents_df=documents_df)
 
-        term_doc_df = self._filter_top_frequent_terms(term_doc_df=term_doc_df)
+    def build_index_streaming(self, batches: Iterable[pd.DataFrame], text_processor: TextProcessor,
+                              workers: int = 1, chunk_size: int = 500) -> tuple[
+        pd.DataFrame, Postings, pd.DataFrame]:
+        """
+        Same output as build_index, but documents are tokenized batch by batch,
+        so text and tokens of only one batch are in memory at a time
+        """
+        documents_partials = []
+        builder = PostingsBuilder()
 
-        terms_df = (
-            term_doc_df.groupby('term')['doc_id']
-            .nunique()
-            .reset_index(name='document_frequency')
-        )
+        for batch_df in batches:
+            batch_df = batch_df.reset_index().rename(columns=dict(index='doc_id'))
+            documents_partials.append(batch_df[['doc_id', 'title', 'url']])
 
-        return terms_df, term_doc_df, documents_df
+            with metrics.span('tokenize') as span:
+                tokens = process_documents(
+                    texts=batch_df['text'].tolist(),
+                    text_processor=text_processor,
+                    workers=workers,
+                    chunk_size=chunk_size
+                )
+                span.set(documents=len(batch_df))
+
+            with metrics.span('aggregate'):
+                builder.add_documents(doc_ids=batch_df['doc_id'], tokens=tokens)
+            logger.log(f'Processed {sum(len(partial) for partial in documents_partials)} documents.')
+
+        documents_df = pd.concat(documents_partials, ignore_index=True)
+
+        with metrics.span('aggregate'):
+            postings = self._build_postings(builder=builder, text_processor=text_processor)
+
+        with metrics.span('finalize'):
+            return self._finalize_index(postings=postings, documents_df=documents_df)
 
     @staticmethod
-    def mark_champions(term_doc_df: pd.DataFrame, k: int = 50) -> pd.DataFrame:
-        term_doc_df['rank'] = term_doc_df.groupby('term')['term_frequency'].rank(ascending=False, method='first')
+    def _get_tf_idf(documents_df: pd.DataFrame, postings: Postings) -> np.ndarray:
+        total_documents = documents_df['doc_id'].nunique()
+        document_frequencies = postings.document_frequencies()[postings.term_ids]
+
+        return tf_value(postings.term_frequencies.astype(np.float64)) * idf_value(document_frequencies,
+                                                                                   total_documents)
+
+    @staticmethod
+    def _get_document_values(documents_df: pd.DataFrame, values: np.ndarray | None = None) -> np.ndarray:
+        """
+        Array indexed by doc_id, zeros or values of documents_df rows
+        """
+        size = int(documents_df['doc_id'].max()) + 1 if len(documents_df) else 0
+        document_values = np.zeros(size)
+        if values is not None:
+            document_values[documents_df['doc_id'].to_numpy()] = values
+
+        return document_values
+
+    @classmethod
+    def add_document_norms(cls, documents_df: pd.DataFrame, postings: Postings) -> pd.DataFrame:
+        """
+        Length of each document's full tf-idf vector, computed on the filtered terms
+        so that removed top frequent terms are not part of it
+        """
+        tf_idf = cls._get_tf_idf(documents_df=documents_df, postings=postings)
+        norms = np.sqrt(np.bincount(postings.doc_ids, weights=tf_idf ** 2,
+                                    minlength=len(cls._get_document_values(documents_df))))
+
+        return documents_df.assign(vector_norm=norms[documents_df['doc_id'].to_numpy()])
+
+    @classmethod
+    def add_impacts(cls, postings: Postings, documents_df: pd.DataFrame) -> np.ndarray:
+        """
+        Impact of a posting is its tf-idf divided by the document norm, its share of the cosine similarity
+        before query normalization. Sets impacts of postings and returns max impact of each term id,
+        which bounds the impact of all its postings.
+        """
+        tf_idf = cls._get_tf_idf(documents_df=documents_df, postings=postings)
+        norms = cls._get_document_values(documents_df, documents_df['vector_norm'].to_numpy())[postings.doc_ids]
+
+        postings.impacts = np.divide(tf_idf, norms, out=np.zeros(len(norms)), where=norms > 0)
+
+        max_impacts = np.zeros(len(postings.terms))
+        if len(postings):
+            term_starts = postings.term_starts()
+            max_impacts[postings.term_ids[term_starts]] = np.maximum.reduceat(postings.impacts, term_starts)
+
+        return max_impacts
+
+    @staticmethod
+    def mark_champions(postings: Postings, k: int = 50) -> Postings:
+        """
+        Top k postings of each term by term frequency, ties are broken by doc_id
+        """
+        # postings are sorted by term and doc_id and lexsort is stable, so equal frequencies keep doc_id order
+        order = np.lexsort((-postings.term_frequencies, postings.term_ids))
+
+        term_starts = postings.term_starts()
+        group_sizes = np.diff(np.append(term_starts, len(postings)))
+        ranks = np.arange(len(postings)) - np.repeat(term_starts, group_sizes)
 
-        term_doc_df['is_champion'] = term_doc_df['rank'] <= k
+        postings.is_champion = np.empty(len(postings), dtype=bool)
+        postings.is_champion[order] = ranks < k
 
-        term_doc_df = term_doc_df.drop(columns=['rank'])
-        return term_doc_df
+        return postings
 
     @staticmethod
     def _prepare_relationships(term_doc_df, term_ids, document_ids) -> pd.DataFrame:
@@ -68,7 +219,48 @@ class Indexer:
         term_doc_df['document_id'] = term_doc_df['doc_id'].map(document_ids)
         return term_doc_df[['term_id', 'document_id', 'term_frequency', 'positions', 'is_champion']]
 
-    def save_to_db(self, terms_df: pd.DataFrame, term_doc_df: pd.DataFrame, documents_df: pd.DataFrame):
+    @staticmethod
+    def new_index_version() -> str:
+        return uuid.uuid4().hex
+
+    def build_parameters(self) -> dict:
+        """
+        Settings the index is built with, saved next to its version
+        """
+        return {
+            'champions_count': self.champions_count,
+            'stop_terms_enabled': config.STOP_TERMS_ENABLED,
+            'stop_terms_count': config.STOP_TERMS_COUNT,
+            'fast_text_processing': config.FAST_TEXT_PROCESSING
+        }
+
+    @staticmethod
+    def _create_ingestor(database_url: str) -> GraphIngestor:
+        return GraphIngestor(
+            database_url=database_url,
+            batch_size=config.INGESTION_BATCH_SIZE,
+            parallelism=config.INGESTION_PARALLELISM,
+            max_parallelism=config.INGESTION_MAX_PARALLELISM
+        )
+
+    @staticmethod
+    def _ingest(ingestor: GraphIngestor, terms_df: pd.DataFrame, documents_df: pd.DataFrame,
+                term_doc_df: pd.DataFrame):
+        with metrics.span('ingest_terms'):
+            ingestor.ingest_terms(terms_df=terms_df)
+        logger.log('Saving terms finished successfully.')
+
+        with metrics.span('ingest_documents'):
+            ingestor.ingest_documents(documents_df=documents_df)
+        logger.log('Saving documents finished successfully.')
+
+        with metrics.span('ingest_relationships'):
+            ingestor.ingest_relationships(term_doc_df=term_doc_df)
+        logger.log('Saving EXISTS_IN relations finished successfully.')
+
+    def save_to_db(self, terms_df: pd.DataFrame, postings: Postings, documents_df: pd.DataFrame):
+        term_doc_df = postings.to_term_doc_df(encode_positions=config.COMPRESSED_POSITIONS)
+
         detach_delete_all()
         logger.log('Detach delete done.')
 
@@ -77,32 +269,140 @@ class Indexer:
         documents_df = documents_df.drop_duplicates(subset=['doc_id'])
         term_doc_df = term_doc_df.drop_duplicates(subset=['term', 'doc_id'])
 
-        term_ids = TermRepository.bulk_create(terms_df=terms_df)
-        logger.log('Saving terms finished successfully.')
+        ingestor = self._create_ingestor(database_url=config.DATABASE_URL)
 
-        document_ids = DocumentRepository.bulk_create(documents_df=documents_df)
-        logger.log('Saving documents finished successfully.')
+        try:
+            ingestor.ensure_constraints()
+            logger.log('Constraints are installed.')
 
-        term_doc_df = self._prepare_relationships(term_doc_df, term_ids, document_ids)
-        ExistsInRepository.bulk_create(exists_in_df=term_doc_df)
-        logger.log('Saving EXISTS_IN relations finished successfully.')
+            self._ingest(ingestor=ingestor, terms_df=terms_df, documents_df=documents_df, term_doc_df=term_doc_df)
+        finally:
+            ingestor.close()
+
+        # written last, so search caches reload only when the new index is complete
+        version = self.new_index_version()
+        IndexMetaRepository.set_version(version=version, total_documents=len(documents_df),
+                                        build_parameters=self.build_parameters())
+        logger.log(f'Index version: {version}')
+
+    def save_to_index_file(self, terms_df: pd.DataFrame, postings: Postings, documents_df: pd.DataFrame, path: str):
+        # positions are kept encoded, phrase queries decode only the postings they check
+        term_doc_df = postings.to_term_doc_df(encode_positions=True)
+        IndexFileWriter(path=path).write(terms_df=terms_df, term_doc_df=term_doc_df, documents_df=documents_df,
+                                         version=self.new_index_version(), build_parameters=self.build_parameters())
+        logger.log(f'Saving index file into {path} finished successfully.')
+
+    @staticmethod
+    def split_into_shards(terms_df: pd.DataFrame, postings: Postings, documents_df: pd.DataFrame,
+                          shards_count: int) -> list[tuple[pd.DataFrame, Postings, pd.DataFrame]]:
+        """
+        Documents and their postings of each shard, placed by doc_id hash. Terms of a shard are the ones with
+        postings in it, still with the global document frequency and max impact, so idf is the same on every shard.
+        """
+        postings_shards = get_shards(postings.doc_ids, shards_count)
+        documents_shards = get_shards(documents_df['doc_id'].to_numpy(), shards_count)
+
+        shards = []
+        for shard in range(shards_count):
+            shard_postings = postings.filter(postings_shards == shard)
+            shard_terms = postings.terms[np.unique(shard_postings.term_ids)]
+            shards.append((
+                terms_df[terms_df['term'].isin(shard_terms)],
+                shard_postings,
+                documents_df[documents_shards == shard]
+            ))
+
+        return shards
+
+    def save_to_shards(self, terms_df: pd.DataFrame, postings: Postings, documents_df: pd.DataFrame,
+                       shards: list[str]):
+        """
+        Postings go to the shards (index file paths or database urls of the backend), split by split_into_shards.
+        The primary index keeps every term and document and the version but no postings: it is the one place of the
+        global statistics and document metadata, and it is written last so searches switch only to complete shards.
+        """
+        for shard, (shard_terms_df, shard_postings, shard_documents_df) in zip(
+                shards, self.split_into_shards(terms_df=terms_df, postings=postings, documents_df=documents_df,
+                                               shards_count=len(shards))):
+            with metrics.span('save_shard') as span:
+                span.set(documents=len(shard_documents_df), postings=len(shard_postings))
+
+                if config.INDEX_BACKEND == 'index_file':
+                    self.save_to_index_file(terms_df=shard_terms_df, postings=shard_postings,
+                                            documents_df=shard_documents_df, path=shard)
+                    continue
+
+                ingestor = self._create_ingestor(database_url=shard)
+                try:
+                    ingestor.delete_all()
+                    ingestor.create_constraints()
+                    term_doc_df = shard_postings.to_term_doc_df(encode_positions=config.COMPRESSED_POSITIONS)
+                    self._ingest(ingestor=ingestor, terms_df=shard_terms_df, documents_df=shard_documents_df,
+                                 term_doc_df=term_doc_df)
+                finally:
+                    ingestor.close()
+            logger.log(f'Shard {shard}: {len(shard_documents_df)} documents, {len(shard_postings)} postings.')
+
+        no_postings = postings.filter(np.zeros(len(postings), dtype=bool))
+        if config.INDEX_BACKEND == 'index_file':
+            self.save_to_index_file(terms_df=terms_df, postings=no_postings, documents_df=documents_df,
+                                    path=config.INDEX_FILE_PATH)
+        else:
+            self.save_to_db(terms_df=terms_df, postings=no_postings, documents_df=documents_df)
 
     def main(self):
-        data_loader = DataLoader("data/IR_data_news_12k.json")
-        df = data_loader.load_data()
+        with metrics.span('index') as span:
+            data_loader = DataLoader("data/IR_data_news_12k.json")
+            text_processor = get_processing_context().get_text_processor()
 
-        text_processor = TextProcessor()
-        terms_df, term_doc_df, documents_df = self.build_index(df=df, text_processor=text_processor)
-        logger.log(
-            f'Text processing finished successfully. Tokens count: {len(terms_df)}, Relations count: {len(term_doc_df)}'
-        )
+            if config.STREAMING_BATCH_SIZE:
+                terms_df, postings, documents_df = self.build_index_streaming(
+                    batches=data_loader.load_batches(batch_size=config.STREAMING_BATCH_SIZE),
+                    text_processor=text_processor,
+                    workers=config.TEXT_PROCESSING_WORKERS,
+                    chunk_size=config.TEXT_PROCESSING_CHUNK_SIZE
+                )
+            else:
+                terms_df, postings, documents_df = self.build_index(
+                    df=data_loader.load_data(),
+                    text_processor=text_processor,
+                    workers=config.TEXT_PROCESSING_WORKERS,
+                    chunk_size=config.TEXT_PROCESSING_CHUNK_SIZE
+                )
+            logger.log(
+                f'Text processing finished successfully. Tokens count: {len(terms_df)}, Relations count: {len(postings)}'
+            )
+            span.set(documents=len(documents_df), terms=len(terms_df), postings=len(postings))
 
-        term_doc_df = self.mark_champions(term_doc_df=term_doc_df)
-        logger.log('Finding champions finished successfully.')
+            if config.LEMMA_CACHE_PATH and len(text_processor.lemma_cache):
+                text_processor.lemma_cache.save(config.LEMMA_CACHE_PATH)
+                logger.log(f'Lemma cache saved: {text_processor.lemma_cache.stats()}')
 
-        self.save_to_db(
-            terms_df=terms_df,
-            term_doc_df=term_doc_df,
-            documents_df=documents_df
-        )
-        logger.log('Storing into database finished successfully.')
+            with metrics.span('champions'):
+                postings = self.mark_champions(postings=postings, k=self.champions_count)
+            logger.log('Finding champions finished successfully.')
+
+            with metrics.span('save'):
+                shards = config.SHARD_INDEX_FILE_PATHS if config.INDEX_BACKEND == 'index_file' \
+                    else config.SHARD_DATABASE_URLS
+                if shards:
+                    self.save_to_shards(terms_df=terms_df, postings=postings, documents_df=documents_df,
+                                        shards=shards)
+                    logger.log(f'Storing into {len(shards)} shards finished successfully.')
+                    return
+
+                if config.INDEX_BACKEND == 'index_file':
+                    self.save_to_index_file(
+                        terms_df=terms_df,
+                        postings=postings,
+                        documents_df=documents_df,
+                        path=config.INDEX_FILE_PATH
+                    )
+                    return
+
+                self.save_to_db(
+                    terms_df=terms_df,
+                    postings=postings,
+                    documents_df=documents_df
+                )
+            logger.log('Storing into database finished successfully.')
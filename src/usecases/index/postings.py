@@ -0,0 +1,190 @@
+from array import array
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from src.utils.positions import encode_positions_array
+
+
+class Postings:
+    """
+    (term, document) postings as parallel arrays sorted by term and doc_id, terms are ids into `terms`
+    (sorted alphabetically) and positions of all postings are one flat buffer sliced by `position_offsets`
+    """
+
+    def __init__(self, terms: np.ndarray, term_ids: np.ndarray, doc_ids: np.ndarray, term_frequencies: np.ndarray,
+                 position_offsets: np.ndarray, positions: np.ndarray):
+        self.terms = terms
+        self.term_ids = term_ids
+        self.doc_ids = doc_ids
+        self.term_frequencies = term_frequencies
+        self.position_offsets = position_offsets
+        self.positions = positions
+
+        # set by the indexer
+        self.impacts = None
+        self.is_champion = None
+
+    def __len__(self) -> int:
+        return len(self.term_ids)
+
+    def get_positions(self, index: int) -> np.ndarray:
+        return self.positions[self.position_offsets[index]:self.position_offsets[index + 1]]
+
+    def document_frequencies(self) -> np.ndarray:
+        # a (term, document) pair is a single posting, so postings per term is the document frequency
+        return np.bincount(self.term_ids, minlength=len(self.terms))
+
+    def collection_frequencies(self) -> np.ndarray:
+        return np.bincount(self.term_ids, weights=self.term_frequencies, minlength=len(self.terms)).astype(np.int64)
+
+    def term_starts(self) -> np.ndarray:
+        """
+        Index of the first posting of each term group, postings are sorted by term
+        """
+        return np.flatnonzero(np.diff(self.term_ids, prepend=-1) != 0)
+
+    def filter(self, mask: np.ndarray) -> 'Postings':
+        """
+        Postings where mask is true, with their positions
+        """
+        lengths = np.diff(self.position_offsets)[mask]
+        position_mask = np.repeat(mask, np.diff(self.position_offsets))
+
+        position_offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=position_offsets[1:])
+
+        postings = Postings(terms=self.terms, term_ids=self.term_ids[mask], doc_ids=self.doc_ids[mask],
+                            term_frequencies=self.term_frequencies[mask], position_offsets=position_offsets,
+                            positions=self.positions[position_mask])
+        if self.impacts is not None:
+            postings.impacts = self.impacts[mask]
+        if self.is_champion is not None:
+            postings.is_champion = self.is_champion[mask]
+
+        return postings
+
+    def positions_lists(self) -> list[list[int]]:
+        positions = self.positions.tolist()
+        offsets = self.position_offsets.tolist()
+
+        return [positions[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def positions_bytes(self) -> list[bytes]:
+        """
+        Positions of each posting delta and varint encoded, encoded all at once
+        """
+        data, byte_offsets = encode_positions_array(self.positions, self.position_offsets)
+        data, byte_offsets = data.tobytes(), byte_offsets.tolist()
+
+        return [data[start:end] for start, end in zip(byte_offsets[:-1], byte_offsets[1:])]
+
+    def to_term_doc_df(self, positions: bool = True, encode_positions: bool = False) -> pd.DataFrame:
+        """
+        Frame of postings for persistence, the only place where terms are strings and positions are lists
+        (or bytes with encode_positions) again
+        """
+        columns = {
+            'term': self.terms[self.term_ids],
+            'doc_id': self.doc_ids.astype(np.int64),
+            'term_frequency': self.term_frequencies.astype(np.int64)
+        }
+        if positions:
+            columns['positions'] = self.positions_bytes() if encode_positions else self.positions_lists()
+        if self.impacts is not None:
+            columns['impact'] = self.impacts
+        if self.is_champion is not None:
+            columns['is_champion'] = self.is_champion
+
+        return pd.DataFrame(columns)
+
+
+class PostingsBuilder:
+    """
+    Collects tokens of documents into compact buffers as they are produced: a term to int dictionary,
+    and one int32 term id per token. Postings are aggregated by build.
+    """
+
+    def __init__(self):
+        self.term_ids = {}
+
+        self._token_term_ids = array('i')
+        self._doc_ids = array('i')
+        self._document_lengths = array('q')
+
+    def add_document(self, doc_id: int, tokens: list[str]):
+        term_ids = self.term_ids
+        self._token_term_ids.extend([term_ids.setdefault(token, len(term_ids)) for token in tokens])
+        self._doc_ids.append(doc_id)
+        self._document_lengths.append(len(tokens))
+
+    def add_documents(self, doc_ids: Iterable[int], tokens: Iterable[list[str]]):
+        for doc_id, document_tokens in zip(doc_ids, tokens):
+            self.add_document(doc_id=doc_id, tokens=document_tokens)
+
+    def _alphabetical_ranks(self) -> tuple[np.ndarray, np.ndarray]:
+        terms = np.array(list(self.term_ids), dtype=object)
+        alphabetical_order = np.argsort(terms, kind='stable')
+        ranks = np.empty(len(terms), dtype=np.int32)
+        ranks[alphabetical_order] = np.arange(len(terms), dtype=np.int32)
+
+        return terms[alphabetical_order], ranks
+
+    def top_terms(self, top_k: int) -> pd.DataFrame:
+        """
+        Most frequent terms of the added tokens with their total frequency, counted before postings are built.
+        Ties are broken alphabetically, as Indexer._filter_top_frequent_terms does on postings.
+        """
+        terms, ranks = self._alphabetical_ranks()
+        total_frequencies = np.bincount(np.frombuffer(self._token_term_ids, dtype=np.int32), minlength=len(terms))
+        top_term_ids = np.lexsort((ranks, -total_frequencies))[:top_k]
+
+        return pd.DataFrame({
+            'term': terms[ranks[top_term_ids]],
+            'total_frequency': total_frequencies[top_term_ids].astype(np.int64)
+        })
+
+    def build(self, excluded_terms: Iterable[str] = ()) -> Postings:
+        """
+        Postings of the added tokens. Tokens of excluded_terms are dropped before aggregation,
+        positions are counted as if they were never added.
+        """
+        # term ids are renumbered in alphabetical order of terms, so postings come out sorted like the term strings
+        terms, ranks = self._alphabetical_ranks()
+
+        token_term_ids = np.frombuffer(self._token_term_ids, dtype=np.int32)
+        document_lengths = np.frombuffer(self._document_lengths, dtype=np.int64)
+        token_doc_ids = np.repeat(np.frombuffer(self._doc_ids, dtype=np.int32), document_lengths)
+
+        excluded_term_ids = [self.term_ids[term] for term in excluded_terms if term in self.term_ids]
+        if excluded_term_ids:
+            kept = ~np.isin(token_term_ids, excluded_term_ids)
+            token_term_ids, token_doc_ids = token_term_ids[kept], token_doc_ids[kept]
+            document_indexes = np.repeat(np.arange(len(document_lengths)), document_lengths)[kept]
+            document_lengths = np.bincount(document_indexes, minlength=len(document_lengths)).astype(np.int64)
+
+        token_term_ids = ranks[token_term_ids] if len(terms) else np.zeros(0, dtype=np.int32)
+
+        document_starts = np.cumsum(document_lengths) - document_lengths
+        token_positions = (
+            np.arange(len(token_term_ids), dtype=np.int64) - np.repeat(document_starts, document_lengths)
+        ).astype(np.int32)
+
+        # stable sort, so positions of a posting stay in the order they were added
+        order = np.lexsort((token_doc_ids, token_term_ids))
+        token_term_ids, token_doc_ids = token_term_ids[order], token_doc_ids[order]
+
+        posting_starts = np.flatnonzero(
+            (np.diff(token_term_ids, prepend=-1) != 0) | (np.diff(token_doc_ids, prepend=-1) != 0)
+        )
+        position_offsets = np.append(posting_starts, len(token_term_ids)).astype(np.int64)
+
+        return Postings(
+            terms=terms,
+            term_ids=token_term_ids[posting_starts],
+            doc_ids=token_doc_ids[posting_starts],
+            term_frequencies=np.diff(position_offsets).astype(np.int32),
+            position_offsets=position_offsets,
+            positions=token_positions[order]
+        )
@@ -0,0 +1,52 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+from src.usecases.utils import get_processing_context
+
+if TYPE_CHECKING:
+    from src.usecases.utils import TextProcessor
+
+# each worker process owns one text processor, the tokenizer keeps per-call state and can not be shared
+_worker_text_processor: 'TextProcessor | None' = None
+
+
+def _init_worker(text_processor: 'TextProcessor | None'):
+    global _worker_text_processor
+    _worker_text_processor = text_processor or get_processing_context().get_text_processor()
+    _worker_text_processor.lemma_cache.record_added()
+
+
+def _process_chunk(texts: list[str]) -> tuple[list[list[str]], list[tuple[str, str]]]:
+    tokens = [_worker_text_processor.process_text(text) for text in texts]
+    # lemmas looked up by the worker go back to the parent, which saves the cache
+    return tokens, _worker_text_processor.lemma_cache.pop_added()
+
+
+def process_documents(texts: list[str], text_processor: 'TextProcessor', workers: int = 1,
+                      chunk_size: int = 500) -> list[list[str]]:
+    """
+    Tokens of each text, in the same order as texts.
+    With more than one worker, texts are handed out in chunks to a process pool, and the lemmas the workers
+    look up are added to the lemma cache of text_processor.
+    """
+    if workers <= 1:
+        return [text_processor.process_text(text) for text in texts]
+
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+    # forked workers get their own copy of the already loaded processor instead of loading hazm models again
+    if 'fork' in multiprocessing.get_all_start_methods():
+        mp_context, initargs = multiprocessing.get_context('fork'), (text_processor,)
+    else:
+        mp_context, initargs = None, (None,)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_worker,
+                             initargs=initargs) as executor:
+        # map keeps the order of chunks, so the result does not depend on the number of workers
+        documents_tokens = []
+        for chunk_tokens, added_lemmas in executor.map(_process_chunk, chunks):
+            documents_tokens.extend(chunk_tokens)
+            text_processor.lemma_cache.update(added_lemmas)
+
+        return documents_tokens
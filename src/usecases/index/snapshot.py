@@ -0,0 +1,90 @@
+import pandas as pd
+
+from src.infra.repositories import TermRepository, DocumentRepository, ExistsInRepository, IndexMetaRepository
+from src.infra.snapshot import SnapshotWriter, Snapshot
+from src.usecases.index.main import Indexer
+
+from src.utils import logger
+from src.utils.config import config
+from src.utils.metrics import metrics
+from src.utils.positions import decode_positions
+
+
+class IndexSnapshot:
+    """
+    Exports the graph index into a snapshot and restores a snapshot into an empty database.
+    Neither side processes text, a restore only loads terms, documents and postings.
+    """
+
+    @staticmethod
+    def _read_postings(terms_batch_size: int) -> pd.DataFrame:
+        # keyset pages of whole terms, a page never holds part of the postings of a term
+        pages, after_term = [], None
+        while True:
+            page, after_term = ExistsInRepository.get_postings_page(after_term=after_term,
+                                                                    terms_limit=terms_batch_size)
+            if after_term is None:
+                break
+
+            # positions of graphs with COMPRESSED_POSITIONS are bytes, the snapshot keeps them as one flat array
+            pages.append(page.assign(positions=page['positions'].map(decode_positions)))
+            logger.log(f'Exported postings of {len(pages) * terms_batch_size} terms, up to {after_term}.')
+
+        if not pages:
+            return pd.DataFrame(columns=ExistsInRepository.postings_columns)
+
+        return pd.concat(pages, ignore_index=True)
+
+    def export(self, path: str, terms_batch_size: int = 1000):
+        # postings of a sharded index are on the shards, the primary alone would give a snapshot without them
+        if config.SHARD_DATABASE_URLS:
+            raise Exception('Snapshots of sharded indexes are not supported')
+
+        with metrics.span('snapshot_export') as span:
+            terms_df = TermRepository.get_all_terms()
+            documents_df = DocumentRepository.get_all_documents()
+            term_doc_df = self._read_postings(terms_batch_size=terms_batch_size)
+            span.set(documents=len(documents_df), terms=len(terms_df), postings=len(term_doc_df))
+
+            SnapshotWriter(path=path).write(terms_df=terms_df, term_doc_df=term_doc_df, documents_df=documents_df,
+                                            version=IndexMetaRepository.get_version(),
+                                            parameters=IndexMetaRepository.get_build_parameters())
+        logger.log(f'Snapshot of {len(documents_df)} documents, {len(terms_df)} terms and {len(term_doc_df)} postings '
+                   f'saved into {path}.')
+
+    @staticmethod
+    def restore(path: str, force: bool = False):
+        """
+        Loads the snapshot into the database of DATABASE_URL, which must be empty unless force is set
+        """
+        if config.SHARD_DATABASE_URLS:
+            raise Exception('Snapshots of sharded indexes are not supported')
+
+        snapshot = Snapshot(path)
+
+        with metrics.span('snapshot_restore') as span:
+            terms_df = snapshot.terms_frame()
+            documents_df = snapshot.documents_frame()
+            term_doc_df = snapshot.term_doc_frame(terms=terms_df['term'].tolist(),
+                                                  encode_positions=config.COMPRESSED_POSITIONS)
+            span.set(documents=len(documents_df), terms=len(terms_df), postings=len(term_doc_df))
+
+            ingestor = Indexer._create_ingestor(database_url=config.DATABASE_URL)
+            try:
+                if not ingestor.is_empty():
+                    if not force:
+                        raise Exception('Database is not empty, restore with force to replace its index')
+                    ingestor.delete_all()
+                    logger.log('Detach delete done.')
+
+                ingestor.ensure_constraints()
+                Indexer._ingest(ingestor=ingestor, terms_df=terms_df, documents_df=documents_df,
+                                term_doc_df=term_doc_df)
+            finally:
+                ingestor.close()
+
+        # the index is the one of the snapshot, so it keeps its version
+        version = snapshot.version or Indexer.new_index_version()
+        IndexMetaRepository.set_version(version=version, total_documents=snapshot.total_documents,
+                                        build_parameters=snapshot.parameters)
+        logger.log(f'Snapshot {path} restored, index version: {version}')
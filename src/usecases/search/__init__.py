@@ -1,4 +1,12 @@
+from src.usecases.search.statistics import CorpusStatistics, CorpusStatisticsCache, get_corpus_statistics_cache
 from src.usecases.search.process_query import QueryProcessor
+from src.usecases.search.planner import RetrievalPlan, RetrievalPlanner, get_retrieval_planner
 from src.usecases.search.retrieve_candidates import CandidatesRetriever
 from src.usecases.search.calculate_similarity import SimilarityCalculator
+from src.usecases.search.batch import BatchScorer
+from src.usecases.search.top_k import TopKRetriever
+from src.usecases.search.positional import PositionalConstraint, PositionalQueryParser, PositionalMatcher
+from src.usecases.search.result_cache import ResultCache, get_result_cache
+from src.usecases.search.document_cache import DocumentMetadataCache, get_document_metadata_cache
 from src.usecases.search.main import SearchQuery
+from src.usecases.search.service import AsyncSearchService, create_async_search_service
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+
+class BatchScorer:
+    """
+    Filter cascade and cosine similarity of many queries at once, on the postings of the union of their terms.
+    Gives the same candidates as running the default cascade of CandidatesRetriever.retrieve_candidates per query
+    (without the planner or the single round trip) and the same scores as SimilarityCalculator.
+    """
+
+    @staticmethod
+    def select_candidates(rows: pd.DataFrame, queries_df: pd.DataFrame, count: int = 10) -> pd.DataFrame:
+        """
+        rows are postings joined with the query terms. The union of filter levels 1..L is the rows whose
+        lowest level is at most L, so each query keeps the rows up to the first level reaching count rows.
+        """
+        terms_count = queries_df.groupby('query_id').size()
+        document_frequency_thresholds = queries_df.groupby('query_id')['document_frequency'].mean()
+
+        query_ids = rows['query_id']
+        matches_all_terms = (
+            rows.groupby(['query_id', 'doc_id'])['term'].transform('size') == query_ids.map(terms_count)
+        )
+        high_idf = rows['document_frequency'] < query_ids.map(document_frequency_thresholds)
+
+        lowest_level = np.select(
+            [matches_all_terms.to_numpy(), rows['is_champion'].to_numpy(dtype=bool), high_idf.to_numpy()],
+            [1, 2, 3],
+            default=4
+        )
+
+        rows_per_level = pd.crosstab(query_ids, lowest_level).reindex(columns=[1, 2, 3, 4], fill_value=0)
+        enough_rows = rows_per_level.cumsum(axis=1).to_numpy() >= count
+        last_levels = pd.Series(
+            np.where(enough_rows.any(axis=1), enough_rows.argmax(axis=1) + 1, 4),
+            index=rows_per_level.index
+        )
+
+        return rows[lowest_level <= query_ids.map(last_levels).to_numpy()]
+
+    @staticmethod
+    def score(candidates: pd.DataFrame, queries_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        query_id, doc_id and similarity of every candidate document
+        """
+        query_norms = np.sqrt((queries_df['term_frequency'] ** 2).groupby(queries_df['query_id']).sum())
+        query_weights = candidates['query_term_frequency'] / candidates['query_id'].map(query_norms)
+
+        tf_idf = candidates['tf_idf'].to_numpy(dtype=np.float64)
+        partial_norms = np.sqrt(pd.Series(tf_idf ** 2, index=candidates.index).groupby(
+            [candidates['query_id'], candidates['doc_id']]).transform('sum').to_numpy())
+
+        # like SimilarityCalculator.normalize_rows, documents without a stored norm use their partial norm
+        norms = pd.to_numeric(candidates['document_norm']).fillna(0.0).to_numpy(dtype=np.float64)
+        norms = np.where(norms > 0, norms, partial_norms)
+        weights = np.divide(tf_idf, norms, out=np.zeros_like(tf_idf), where=norms > 0)
+
+        return (
+            candidates[['query_id', 'doc_id']]
+            .assign(similarity=weights * query_weights.to_numpy())
+            .groupby(['query_id', 'doc_id'], as_index=False)['similarity']
+            .sum()
+        )
+
+    @staticmethod
+    def paginate(similarities: pd.DataFrame, page: int, page_size: int) -> pd.DataFrame:
+        """
+        Rows of the page of each query, ordered by similarity descending and doc_id ascending on ties
+        """
+        order = np.lexsort((
+            similarities['doc_id'].to_numpy(),
+            -similarities['similarity'].to_numpy(),
+            similarities['query_id'].to_numpy()
+        ))
+        similarities = similarities.iloc[order]
+
+        ranks = similarities.groupby('query_id').cumcount().to_numpy()
+        start = (page - 1) * page_size
+
+        return similarities[(ranks >= start) & (ranks < start + page_size)]
@@ -1,6 +1,8 @@
 import numpy as np
 import pandas as pd
 
+from src.utils.metrics import metrics
+
 
 class SimilarityCalculator:
     @staticmethod
@@ -8,31 +10,55 @@ class SimilarityCalculator:
         norm = np.linalg.norm(vector)
         return vector / norm if norm > 0 else vector
 
-    def get_documents_vectors(self, candidates_df: pd.DataFrame, query_terms: list[str]) -> dict:
-        unique_doc_ids = candidates_df['doc_id'].unique()
-        doc_vectors = {doc_id: np.zeros(len(query_terms)) for doc_id in unique_doc_ids}
+    @staticmethod
+    def normalize_rows(matrix: np.ndarray, norms: np.ndarray = None) -> np.ndarray:
+        """
+        Divides each row by its norm, rows without a positive norm are normalized by their own length
+        """
+        partial_norms = np.linalg.norm(matrix, axis=1)
+        if norms is None:
+            norms = partial_norms
+        else:
+            norms = np.where(norms > 0, norms, partial_norms)
+
+        norms = norms[:, np.newaxis]
+        return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
 
-        for _, row in candidates_df.iterrows():
-            term = row['term']
-            term_index = query_terms.index(term)
-            doc_vectors[row['doc_id']][term_index] = row['tf_idf']
+    def get_documents_matrix(self, candidates_df: pd.DataFrame, query_terms: list[str]) -> tuple[
+        np.ndarray, np.ndarray]:
+        """
+        Unique doc ids of the candidates (in order of appearance) and the doc x term matrix of their normalized
+        tf-idf vectors.
+        If candidates have the index-time `document_norm`, vectors are divided by the full document length,
+        which gives the true cosine instead of normalizing over the query terms only.
+        """
+        doc_codes, doc_ids = pd.factorize(candidates_df['doc_id'])
+        term_codes = pd.Categorical(candidates_df['term'], categories=query_terms).codes
+        known_terms = term_codes >= 0
 
-        for doc_id in doc_vectors.keys():
-            doc_vectors[doc_id] = self.normalize_vector(doc_vectors[doc_id])
+        matrix = np.zeros((len(doc_ids), len(query_terms)))
+        matrix[doc_codes[known_terms], term_codes[known_terms]] = (
+            candidates_df['tf_idf'].to_numpy(dtype=np.float64)[known_terms]
+        )
 
-        return doc_vectors
+        norms = None
+        if 'document_norm' in candidates_df.columns:
+            norms = np.zeros(len(doc_ids))
+            norms[doc_codes] = pd.to_numeric(candidates_df['document_norm']).fillna(0.0).to_numpy(dtype=np.float64)
+
+        return np.asarray(doc_ids), self.normalize_rows(matrix, norms=norms)
 
     def calculate_similarity(self, query_df: pd.DataFrame, candidates_df: pd.DataFrame) -> pd.DataFrame:
+        if len(candidates_df) == 0:
+            return pd.DataFrame(columns=['doc_id', 'similarity'])
+
         query_terms = query_df['term'].tolist()
         query_vector = query_df['term_frequency'].values
 
         query_vector = self.normalize_vector(vector=query_vector)
 
-        doc_vectors = self.get_documents_vectors(candidates_df=candidates_df, query_terms=query_terms)
-
-        similarities = [
-            {'doc_id': doc_id, 'similarity': np.dot(query_vector, doc_vector)}
-            for doc_id, doc_vector in doc_vectors.items()
-        ]
+        with metrics.span('calculate_similarity') as span:
+            doc_ids, doc_matrix = self.get_documents_matrix(candidates_df=candidates_df, query_terms=query_terms)
+            span.set(rows=len(candidates_df), documents=len(doc_ids))
 
-        return pd.DataFrame(similarities)
+            return pd.DataFrame({'doc_id': doc_ids, 'similarity': doc_matrix @ query_vector})
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from threading import Lock
+
+from src.utils.config import config
+
+
+class DocumentMetadataCache:
+    """
+    LRU cache of doc_id -> (title, url), so hot documents of result pages skip the metadata query.
+    Entries belong to one index version and are dropped when it changes.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        self.max_size = max_size
+        self.version = None
+
+        self.hits = 0
+        self.misses = 0
+
+        self._documents = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {'size': len(self), 'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate}
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+
+    def get_documents(self, doc_ids: list[int], document_repository,
+                      version: str) -> dict[int, tuple[str, str]]:
+        """
+        Metadata of doc_ids, documents missing from the cache are fetched with one repository call
+        """
+        found, missing = {}, []
+        with self._lock:
+            if version != self.version:
+                self._documents.clear()
+                self.version = version
+
+            for doc_id in doc_ids:
+                metadata = self._documents.get(doc_id)
+                if metadata is None:
+                    missing.append(doc_id)
+                else:
+                    self._documents.move_to_end(doc_id)
+                    found[doc_id] = metadata
+
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if not missing:
+            return found
+
+        fetched = {
+            document['doc_id']: (document['title'], document['url'])
+            for document in document_repository.get_documents_by_doc_ids(missing)
+        }
+        found.update(fetched)
+
+        with self._lock:
+            if version == self.version:
+                self._documents.update(fetched)
+                while len(self._documents) > self.max_size:
+                    self._documents.popitem(last=False)
+
+        return found
+
+
+_document_metadata_cache: DocumentMetadataCache | None = None
+
+
+def get_document_metadata_cache() -> DocumentMetadataCache:
+    """
+    Process-wide cache, sized by DOCUMENT_CACHE_SIZE
+    """
+    global _document_metadata_cache
+    if _document_metadata_cache is None:
+        _document_metadata_cache = DocumentMetadataCache(max_size=config.DOCUMENT_CACHE_SIZE)
+
+    return _document_metadata_cache
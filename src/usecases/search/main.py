@@ -1,11 +1,56 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 from pandas import lreshape
 
-from src.infra.repositories import DocumentRepository
+from src.infra.repositories import get_document_repository, get_term_repository, get_shard_repositories
 from src.usecases.search import QueryProcessor, CandidatesRetriever, SimilarityCalculator
+from src.usecases.search.batch import BatchScorer
+from src.usecases.search.positional import PositionalConstraint, PositionalQueryParser, PositionalMatcher
+from src.usecases.search.document_cache import DocumentMetadataCache, get_document_metadata_cache
+from src.usecases.search.result_cache import ResultCache, get_result_cache
+from src.usecases.search.statistics import CorpusStatisticsCache, get_corpus_statistics_cache
+from src.usecases.search.top_k import TopKRetriever
+from src.usecases.utils import get_shared_removed_terms
+from src.utils.config import config
+from src.utils.metrics import metrics
 
 
 class SearchQuery:
+    def __init__(self, document_repository=None, term_repository=None,
+                 statistics_cache: CorpusStatisticsCache | None = None, result_cache: ResultCache | None = None,
+                 document_cache: DocumentMetadataCache | None = None, top_k_retrieval: bool | None = None,
+                 text_processor=None, shards: list[tuple] | None = None):
+        # process-wide caches belong to the configured backend, injected repositories bring their own
+        uses_default_repositories = document_repository is None and term_repository is None
+        if shards is None and uses_default_repositories:
+            shards = get_shard_repositories()
+        # on a sharded index the primary repositories hold terms and documents, postings are on the shards
+        self.shards = shards or []
+
+        # shards hold their own documents only, the global document frequencies and count come from statistics
+        if statistics_cache is None and uses_default_repositories and (config.STATISTICS_CACHE_ENABLED or self.shards):
+            statistics_cache = get_corpus_statistics_cache()
+        if self.shards and statistics_cache is None:
+            raise Exception('Searching a sharded index needs a statistics cache of the primary index')
+        if result_cache is None and uses_default_repositories and config.RESULT_CACHE_ENABLED:
+            result_cache = get_result_cache()
+        if document_cache is None and uses_default_repositories:
+            document_cache = get_document_metadata_cache()
+
+        self.document_repository = document_repository or get_document_repository()
+        self.term_repository = term_repository or get_term_repository()
+        self.statistics_cache = statistics_cache
+        self.result_cache = result_cache
+        self.document_cache = document_cache
+        # when not given, each thread uses its own processor of the processing context
+        self.text_processor = text_processor
+
+        if top_k_retrieval is None:
+            top_k_retrieval = config.TOP_K_RETRIEVAL
+        self.top_k_retrieval = top_k_retrieval
+
     @staticmethod
     def paginate_response(similarities: pd.DataFrame, page: int, page_size: int) -> pd.DataFrame:
         start = (page - 1) * page_size
@@ -13,31 +58,295 @@ class SearchQuery:
 
         return similarities.iloc[start:end]
 
+    def rank(self, query_df: pd.DataFrame, statistics=None, depth: int | None = None,
+             constraints: list[PositionalConstraint] | None = None) -> pd.DataFrame:
+        """
+        Candidates sorted by similarity down to depth (all of them when depth is None), served from the result
+        cache when the same query terms were ranked on the same index version.
+        With positional constraints, the candidates are the documents satisfying all of them.
+        """
+        # without an index version a cached ranking could outlive a reindex, so the cache is skipped
+        index_version = statistics.version if statistics is not None else None
+        use_result_cache = self.result_cache is not None and index_version is not None
+
+        cache_key = None
+        if use_result_cache:
+            cache_key = ResultCache.make_key(
+                query_terms=query_df['term'].tolist(),
+                index_version=index_version,
+                constraints=[constraint.key() for constraint in constraints or []]
+            )
+            ranked = self.result_cache.get(cache_key, depth=depth)
+            metrics.increment('result_cache_lookups', hit=ranked is not None)
+            if ranked is not None:
+                return ranked
+
+            # rank deeper than asked, so that following pages hit the cache too
+            if depth is not None:
+                depth = max(depth, config.RESULT_CACHE_DEPTH)
+
+        if constraints:
+            ranked, complete = self._rank_positional(query_df=query_df, constraints=constraints,
+                                                     statistics=statistics, depth=depth)
+        elif self.shards:
+            ranked, complete = self._rank_shards(query_df=query_df, statistics=statistics, depth=depth)
+        else:
+            ranked, complete = self._rank_on(
+                document_repository=self.document_repository,
+                term_repository=self.term_repository,
+                query_df=query_df,
+                statistics=statistics,
+                depth=depth
+            )
+
+        if use_result_cache:
+            self.result_cache.put(cache_key, ranked, complete=complete)
+
+        return ranked
+
+    def _rank_on(self, document_repository, term_repository, query_df: pd.DataFrame, statistics, depth: int | None,
+                 single_round_trip: bool | None = None) -> tuple[pd.DataFrame, bool]:
+        """
+        Ranked candidates of one index and whether they are all of its candidates
+        """
+        if self.top_k_retrieval and depth is not None:
+            with metrics.span('top_k_retrieval'):
+                ranked = TopKRetriever(
+                    document_repository=document_repository,
+                    term_repository=term_repository
+                ).retrieve(query_df=query_df, k=depth)
+            # fewer than depth results means nothing was pruned
+            return ranked, len(ranked) < depth
+
+        candidates_df = CandidatesRetriever(
+            document_repository=document_repository,
+            term_repository=term_repository,
+            single_round_trip=single_round_trip,
+            statistics=statistics
+        ).retrieve_candidates(query_terms=query_df['term'].tolist())
+        similarities = SimilarityCalculator().calculate_similarity(query_df=query_df, candidates_df=candidates_df)
+
+        with metrics.span('select_top_k'):
+            ranked = TopKRetriever.select_top_k(similarities, k=depth if depth is not None else len(similarities))
+        return ranked, len(ranked) == len(similarities)
+
+    def _rank_shards(self, query_df: pd.DataFrame, statistics, depth: int | None) -> tuple[pd.DataFrame, bool]:
+        """
+        Ranks on every shard in parallel and merges their top depth lists. Scores only depend on global statistics
+        and the document itself, so the merged top depth is the top depth of the whole index.
+        """
+        with ThreadPoolExecutor(max_workers=len(self.shards)) as executor:
+            # each shard runs in a copy of the context, so its spans are children of the current one
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run, self._rank_on,
+                    document_repository=document_repository,
+                    term_repository=term_repository,
+                    query_df=query_df,
+                    statistics=statistics,
+                    depth=depth,
+                    # the single round trip cascade of a shard would count only its own documents in idf
+                    single_round_trip=False
+                )
+                for term_repository, document_repository in self.shards
+            ]
+            results = [future.result() for future in futures]
+
+        similarities = pd.concat([ranked for ranked, _ in results], ignore_index=True)
+        with metrics.span('merge_shards'):
+            ranked = TopKRetriever.select_top_k(similarities, k=depth if depth is not None else len(similarities))
+
+        return ranked, all(complete for _, complete in results) and len(ranked) == len(similarities)
+
+    def _get_document_frequencies(self, terms: list[str], statistics=None) -> dict[str, int]:
+        if statistics is not None:
+            return {term: statistics.document_frequencies.get(term, 0) for term in terms}
+
+        document_frequencies = self.term_repository.get_terms_document_frequencies(query_terms=terms)
+        return dict(zip(document_frequencies['term'], document_frequencies['document_frequency']))
+
+    def _rank_positional(self, query_df: pd.DataFrame, constraints: list[PositionalConstraint], statistics,
+                         depth: int | None) -> tuple[pd.DataFrame, bool]:
+        """
+        Documents matching the constraints on each shard (the index itself when not sharded), scored by all the
+        query terms like TopKRetriever
+        """
+        document_frequencies = self._get_document_frequencies(
+            terms=list({term for constraint in constraints for term in constraint.terms}), statistics=statistics
+        )
+
+        def rank_on(document_repository) -> pd.DataFrame:
+            matcher = PositionalMatcher(document_repository=document_repository)
+            with metrics.span('positional_match') as span:
+                doc_ids = matcher.match_all(constraints=constraints, document_frequencies=document_frequencies)
+                span.set(documents=len(doc_ids), positions=matcher.positions_fetched)
+
+            return matcher.score(query_df=query_df, doc_ids=doc_ids)
+
+        document_repositories = [document_repository for _, document_repository in self.shards] \
+            or [self.document_repository]
+        with ThreadPoolExecutor(max_workers=len(document_repositories)) as executor:
+            similarities = pd.concat([
+                future.result() for future in [
+                    executor.submit(contextvars.copy_context().run, rank_on, document_repository)
+                    for document_repository in document_repositories
+                ]
+            ], ignore_index=True)
+
+        with metrics.span('select_top_k'):
+            ranked = TopKRetriever.select_top_k(similarities, k=depth if depth is not None else len(similarities))
+        return ranked, len(ranked) == len(similarities)
+
+    def get_documents_metadata(self, doc_ids: list[int], statistics=None) -> dict[int, tuple[str, str]]:
+        # like the result cache, metadata is cached only while an index version tells when it goes stale
+        version = statistics.version if statistics is not None else None
+        if self.document_cache is not None and version is not None:
+            return self.document_cache.get_documents(
+                doc_ids=doc_ids,
+                document_repository=self.document_repository,
+                version=version
+            )
+
+        documents = self.document_repository.get_documents_by_doc_ids(doc_ids)
+        return {document['doc_id']: (document['title'], document['url']) for document in documents}
+
+    def _get_query_processor(self, statistics=None) -> QueryProcessor:
+        return QueryProcessor(
+            term_repository=self.term_repository,
+            statistics=statistics,
+            text_processor=self.text_processor
+        )
 
     def main(self, query: str, page: int = 1, page_size: int = 10) -> list[dict]:
-        query_df = QueryProcessor().process_query(query=query)
+        with metrics.span('search') as span:
+            result = self._search(query=query, page=page, page_size=page_size)
+            span.set(page=page, results=len(result))
+
+        return result
+
+    def _search(self, query: str, page: int, page_size: int) -> list[dict]:
+        statistics = self.statistics_cache.get() if self.statistics_cache is not None else None
+
+        query_processor = self._get_query_processor(statistics=statistics)
+        # quoted phrases and NEAR/k operators become constraints, their words stay query terms
+        text, constraints = PositionalQueryParser(
+            text_processor=query_processor.get_text_processor(),
+            removed_terms=get_shared_removed_terms()
+        ).parse(query)
+        query_df = query_processor.process_query(query=text)
 
         if len(query_df) == 0:
             return []
 
-        candidates_df = CandidatesRetriever().retrieve_candidates(query_terms=query_df['term'].tolist())
-        similarities = SimilarityCalculator().calculate_similarity(query_df=query_df, candidates_df=candidates_df)
-
-        similarities = similarities.sort_values(by='similarity', ascending=False)
+        with metrics.span('rank'):
+            similarities = self.rank(query_df=query_df, statistics=statistics, depth=page * page_size,
+                                     constraints=constraints)
         similarities = self.paginate_response(similarities=similarities, page=page, page_size=page_size)
 
         doc_ids = similarities['doc_id'].tolist()
-        documents = DocumentRepository.get_documents_by_doc_ids(doc_ids)
+        with metrics.span('fetch_documents'):
+            documents = self.get_documents_metadata(doc_ids=doc_ids, statistics=statistics)
 
         result = []
-        for _, row in similarities.iterrows():
-
-            doc = next((doc for doc in documents if doc['doc_id'] == row['doc_id']), {})
+        for doc_id, similarity in zip(doc_ids, similarities['similarity'].tolist()):
+            title, url = documents.get(doc_id, (None, None))
             result.append({
-                'doc_id': row['doc_id'],
-                'similarity': row['similarity'],
-                'title': doc.get('title'),
-                'url': doc.get('url')
+                'doc_id': doc_id,
+                'similarity': similarity,
+                'title': title,
+                'url': url
             })
 
         return result
+
+    def search_many(self, queries: list[str], page: int = 1, page_size: int = 10, count: int = 10) -> list[list[dict]]:
+        """
+        Results of main for each query, computed together: one tokenizer for all queries, one lookup of the union
+        of their terms, one postings fetch and a single vectorized cascade and scoring pass.
+        Candidates follow the filter cascade of retrieve_candidates with `count`, on each shard of a sharded index
+        as main does. The batch pass is that cascade
+        only, so with TOP_K_RETRIEVAL, RETRIEVAL_PLANNER or SINGLE_ROUND_TRIP_RETRIEVAL every query, and otherwise
+        each query with phrases or NEAR/k operators, is searched by main.
+        """
+        if self.top_k_retrieval or config.RETRIEVAL_PLANNER or config.SINGLE_ROUND_TRIP_RETRIEVAL:
+            return [self.main(query=query, page=page, page_size=page_size) for query in queries]
+
+        statistics = self.statistics_cache.get() if self.statistics_cache is not None else None
+        query_processor = self._get_query_processor(statistics=statistics)
+        parser = PositionalQueryParser(text_processor=query_processor.get_text_processor(),
+                                       removed_terms=get_shared_removed_terms())
+
+        results = [[] for _ in queries]
+        batch_query_ids, batch_texts = [], []
+        for query_id, query in enumerate(queries):
+            text, constraints = parser.parse(query)
+            if constraints:
+                results[query_id] = self.main(query=query, page=page, page_size=page_size)
+            else:
+                batch_query_ids.append(query_id)
+                batch_texts.append(text)
+
+        for query_id, batch_results in zip(batch_query_ids, self._search_batch(
+                queries=batch_texts, statistics=statistics, query_processor=query_processor, page=page,
+                page_size=page_size, count=count)):
+            results[query_id] = batch_results
+
+        return results
+
+    def _search_batch(self, queries: list[str], statistics, query_processor: QueryProcessor, page: int,
+                      page_size: int, count: int) -> list[list[dict]]:
+        results = [[] for _ in queries]
+        if not queries:
+            return results
+
+        queries_df = query_processor.process_queries(queries=queries)
+        if len(queries_df) == 0:
+            return results
+
+        total_documents = statistics.total_documents if statistics is not None \
+            else self.document_repository.get_total_documents_count()
+        query_terms = queries_df['term'].unique().tolist()
+        document_repositories = [document_repository for _, document_repository in self.shards] \
+            or [self.document_repository]
+        with ThreadPoolExecutor(max_workers=len(document_repositories)) as executor:
+            shards_postings = list(executor.map(
+                lambda document_repository: document_repository.get_postings_by_query_terms(
+                    query_terms=query_terms, total_documents=total_documents),
+                document_repositories
+            ))
+
+        # shards keep the global document frequencies of their terms
+        postings_df = pd.concat(shards_postings, ignore_index=True)
+        queries_df = queries_df.assign(document_frequency=queries_df['term'].map(
+            postings_df.drop_duplicates(subset=['term']).set_index('term')['document_frequency']
+        ))
+        query_rows = queries_df.rename(columns={'term_frequency': 'query_term_frequency'}).drop(
+            columns=['document_frequency'])
+
+        # like main, the cascade runs on each shard by itself, a document is on one shard so candidates are disjoint
+        candidates = [
+            BatchScorer.select_candidates(rows=rows, queries_df=queries_df, count=count)
+            for rows in (query_rows.merge(shard_postings, on='term') for shard_postings in shards_postings)
+            if len(rows)
+        ]
+        if not candidates:
+            return results
+
+        candidates = pd.concat(candidates, ignore_index=True)
+        similarities = BatchScorer.score(candidates=candidates, queries_df=queries_df)
+        similarities = BatchScorer.paginate(similarities=similarities, page=page, page_size=page_size)
+
+        doc_ids = similarities['doc_id'].tolist()
+        documents = self.get_documents_metadata(doc_ids=list(set(doc_ids)), statistics=statistics)
+
+        for query_id, doc_id, similarity in zip(similarities['query_id'].tolist(), doc_ids,
+                                                similarities['similarity'].tolist()):
+            title, url = documents.get(doc_id, (None, None))
+            results[query_id].append({
+                'doc_id': doc_id,
+                'similarity': similarity,
+                'title': title,
+                'url': url
+            })
+
+        return results
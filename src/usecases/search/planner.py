@@ -0,0 +1,143 @@
+import json
+from collections import deque
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from src.infra.repositories import get_index_meta_repository
+from src.utils.config import config
+
+
+class RetrievalPlan:
+    """
+    Filter level chosen for a query, with the query terms in execution order and the estimates it was chosen by
+    """
+
+    def __init__(self, strategy: str, filter_level: int, query_terms: list[str], estimated_rows: float,
+                 estimated_cost: float):
+        self.strategy = strategy
+        self.filter_level = filter_level
+        self.query_terms = query_terms
+        self.estimated_rows = estimated_rows
+        self.estimated_cost = estimated_cost
+
+    def to_dict(self) -> dict:
+        return {
+            'strategy': self.strategy,
+            'filter_level': self.filter_level,
+            'query_terms': self.query_terms,
+            'estimated_rows': self.estimated_rows,
+            'estimated_cost': self.estimated_cost
+        }
+
+
+class RetrievalPlanner:
+    """
+    Chooses one filter level per query from the document frequencies of its terms, instead of trying levels 1 to 4.
+
+    Estimated candidate rows of each strategy:
+    + intersection: N * prod(df / N) documents (independent terms), each with a row per term
+    + champion_only: sum(min(df, champions_count))
+    + idf_pruned: sum(df) of the terms with df below the mean
+    + full: sum(df)
+    Cost is postings read plus row_cost for each returned row, the intersection reads the rarest postings list and
+    probes it against the others. The cheapest strategy estimated to return `count` rows is chosen, full otherwise.
+    """
+
+    strategies = {'intersection': 1, 'champion_only': 2, 'idf_pruned': 3, 'full': 4}
+
+    def __init__(self, champions_count: int = 50, row_cost: float | None = None, history_size: int = 1000,
+                 log_path: str | None = None):
+        self.champions_count = champions_count
+        self.row_cost = row_cost if row_cost is not None else config.PLANNER_ROW_COST
+        self.log_path = log_path
+
+        self.history = deque(maxlen=history_size)
+        self._lock = Lock()
+
+    def estimate(self, document_frequencies: pd.DataFrame, total_documents: int) -> list[RetrievalPlan]:
+        document_frequencies = document_frequencies.sort_values(by='document_frequency', kind='stable')
+        terms = document_frequencies['term'].tolist()
+        frequencies = document_frequencies['document_frequency'].to_numpy(dtype=np.float64)
+
+        total_postings = frequencies.sum()
+        high_idf = frequencies < frequencies.mean()
+
+        intersection_documents = total_documents * np.prod(frequencies / max(total_documents, 1))
+        estimates = {
+            'intersection': (intersection_documents * len(terms), frequencies[0] * len(terms)),
+            'champion_only': (np.minimum(frequencies, self.champions_count).sum(), total_postings),
+            'idf_pruned': (frequencies[high_idf].sum(), frequencies[high_idf].sum()),
+            'full': (total_postings, total_postings),
+        }
+
+        return [
+            RetrievalPlan(
+                strategy=strategy,
+                filter_level=self.strategies[strategy],
+                query_terms=terms,
+                estimated_rows=float(rows),
+                estimated_cost=float(reads + self.row_cost * rows)
+            )
+            for strategy, (rows, reads) in estimates.items()
+        ]
+
+    def plan(self, document_frequencies: pd.DataFrame, total_documents: int, count: int = 10) -> RetrievalPlan:
+        plans = self.estimate(document_frequencies=document_frequencies, total_documents=total_documents)
+
+        sufficient_plans = [plan for plan in plans if plan.estimated_rows >= count]
+        if not sufficient_plans:
+            return plans[-1]
+
+        # min keeps the first of equal costs, the lower filter level
+        return min(sufficient_plans, key=lambda plan: plan.estimated_cost)
+
+    def record(self, plan: RetrievalPlan, actual_rows: int, seconds: float, fallback: bool = False):
+        """
+        Keeps the estimate-vs-actual numbers of an executed plan, and appends them to log_path when it is set
+        """
+        entry = plan.to_dict() | {'actual_rows': actual_rows, 'seconds': seconds, 'fallback': fallback}
+
+        with self._lock:
+            self.history.append(entry)
+            if self.log_path:
+                with open(self.log_path, 'a', encoding='utf-8') as file:
+                    file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def stats(self) -> dict:
+        """
+        Per strategy: times chosen, fallbacks to full, mean seconds and mean actual/estimated rows ratio
+        """
+        with self._lock:
+            history = pd.DataFrame(list(self.history))
+
+        if len(history) == 0:
+            return {}
+
+        history['rows_ratio'] = history['actual_rows'] / history['estimated_rows'].where(history['estimated_rows'] > 0)
+        summary = history.groupby('strategy').agg(
+            count=('strategy', 'size'),
+            fallbacks=('fallback', 'sum'),
+            mean_seconds=('seconds', 'mean'),
+            mean_rows_ratio=('rows_ratio', 'mean')
+        )
+
+        return summary.to_dict(orient='index')
+
+
+_retrieval_planner: RetrievalPlanner | None = None
+
+
+def get_retrieval_planner() -> RetrievalPlanner:
+    """
+    Process-wide planner, so the recorded history spans queries. Its champions count is the one the index was
+    built with, 50 for indexes saved without build parameters.
+    """
+    global _retrieval_planner
+    if _retrieval_planner is None:
+        build_parameters = get_index_meta_repository().get_build_parameters()
+        _retrieval_planner = RetrievalPlanner(champions_count=build_parameters.get('champions_count', 50),
+                                              log_path=config.PLANNER_LOG_PATH)
+
+    return _retrieval_planner
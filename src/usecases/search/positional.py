@@ -0,0 +1,207 @@
+import re
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from src.infra.repositories import get_document_repository
+from src.usecases.search.calculate_similarity import SimilarityCalculator
+
+if TYPE_CHECKING:
+    from src.usecases.utils import TextProcessor
+
+
+class PositionalConstraint:
+    """
+    Terms a document must contain at positions relative to each other.
+    A phrase has its terms at offsets (their place in the phrase) from a common start, NEAR/k has two terms at most
+    distance positions apart in either order.
+    """
+
+    def __init__(self, terms: list[str], offsets: list[int], distance: int | None = None):
+        self.terms = terms
+        self.offsets = offsets
+        self.distance = distance
+
+    @property
+    def is_phrase(self) -> bool:
+        return self.distance is None
+
+    def key(self) -> tuple:
+        return tuple(self.terms), tuple(self.offsets), self.distance
+
+
+class PositionalQueryParser:
+    """
+    Splits quoted phrases ("..." or «...») and `word NEAR/k word` operators out of a query.
+    The words of a constraint are still query terms, the rest of the query is searched as before.
+    """
+
+    phrase_pattern = re.compile(r'"([^"]*)"|«([^»]*)»')
+    # the right operand is not consumed, so `a NEAR/2 b NEAR/3 c` chains
+    near_pattern = re.compile(r'(\S+)\s+NEAR/(\d+)\s+(?=(\S+))')
+    near_operator_pattern = re.compile(r'\bNEAR/\d+\b')
+
+    def __init__(self, text_processor: 'TextProcessor', removed_terms: frozenset[str] = frozenset()):
+        self.text_processor = text_processor
+        # top frequent terms removed from postings, they keep their place in a phrase but cannot be matched
+        self.removed_terms = removed_terms
+
+    def _parse_phrase(self, phrase: str) -> PositionalConstraint | None:
+        # offsets are counted on the processed tokens, stop terms dropped by the text processor do not take
+        # a position in the index either, while removed top terms do
+        terms, offsets = [], []
+        for offset, token in enumerate(self.text_processor.process_text(text=phrase)):
+            if token not in self.removed_terms:
+                terms.append(token)
+                offsets.append(offset)
+        if not terms:
+            return None
+
+        return PositionalConstraint(terms=terms, offsets=offsets)
+
+    def _parse_near(self, left: str, distance: str, right: str) -> PositionalConstraint | None:
+        left_tokens = self.text_processor.process_text(text=left)
+        right_tokens = self.text_processor.process_text(text=right)
+        if not left_tokens or not right_tokens:
+            return None
+        # a removed top term has no positions to be near to, like a stop term the constraint is left out
+        if left_tokens[-1] in self.removed_terms or right_tokens[0] in self.removed_terms:
+            return None
+
+        return PositionalConstraint(terms=[left_tokens[-1], right_tokens[0]], offsets=[0, 0], distance=int(distance))
+
+    def parse(self, query: str) -> tuple[str, list[PositionalConstraint]]:
+        """
+        Query text without quotes and operators, and the positional constraints of the query
+        """
+        constraints = []
+        for match in self.phrase_pattern.finditer(query):
+            constraints.append(self._parse_phrase(match.group(1) if match.group(1) is not None else match.group(2)))
+        text = self.phrase_pattern.sub(lambda match: f' {match.group(1) or match.group(2) or ""} ', query)
+
+        for match in self.near_pattern.finditer(text):
+            constraints.append(self._parse_near(*match.groups()))
+        text = self.near_operator_pattern.sub(' ', text)
+
+        return text, [constraint for constraint in constraints if constraint is not None]
+
+
+class PositionalMatcher:
+    """
+    Documents satisfying positional constraints. Terms are intersected from the rarest one: doc ids of the rarest
+    term's postings are probed against the postings of the others, and positions are then fetched term by term only
+    for the documents still matching, so a common term never has its whole positions list loaded.
+    """
+
+    def __init__(self, document_repository=None):
+        self.document_repository = document_repository or get_document_repository()
+
+        self.positions_fetched = 0
+
+    def _intersect_documents(self, terms: list[str], doc_ids: np.ndarray | None) -> np.ndarray:
+        for term in terms:
+            if doc_ids is None:
+                doc_ids, _ = self.document_repository.get_postings(term)
+            elif len(doc_ids):
+                doc_ids, _ = self.document_repository.get_postings(term, doc_ids=doc_ids.tolist())
+
+        return np.unique(doc_ids)
+
+    def _get_positions(self, term: str, doc_ids: list[int]) -> dict[int, np.ndarray]:
+        positions = self.document_repository.get_positions(term, doc_ids=doc_ids)
+        self.positions_fetched += len(positions)
+        return positions
+
+    def _match_phrase(self, constraint: PositionalConstraint, terms: list[str], doc_ids: np.ndarray) -> np.ndarray:
+        # (term, offset) pairs of the phrase in the order of terms, a repeated term is checked at each of its offsets
+        ranks = {term: rank for rank, term in enumerate(terms)}
+        term_offsets = sorted(zip(constraint.terms, constraint.offsets), key=lambda pair: ranks[pair[0]])
+
+        # candidate phrase starts of each document
+        starts = None
+        for term, offset in term_offsets:
+            positions = self._get_positions(term, doc_ids=list(starts) if starts is not None else doc_ids.tolist())
+            if starts is None:
+                starts = {doc_id: term_positions - offset for doc_id, term_positions in positions.items()}
+            else:
+                starts = {
+                    doc_id: np.intersect1d(doc_starts, positions[doc_id] - offset, assume_unique=True)
+                    for doc_id, doc_starts in starts.items() if doc_id in positions
+                }
+            starts = {doc_id: doc_starts for doc_id, doc_starts in starts.items() if len(doc_starts)}
+            if not starts:
+                break
+
+        return np.array(sorted(starts), dtype=np.int64)
+
+    @staticmethod
+    def _within_distance(positions: np.ndarray, other_positions: np.ndarray, distance: int) -> bool:
+        # the closest other position of each position is one of its two neighbours in the sorted positions
+        indexes = np.searchsorted(other_positions, positions)
+        before = other_positions[np.maximum(indexes - 1, 0)]
+        after = other_positions[np.minimum(indexes, len(other_positions) - 1)]
+
+        return bool(np.any(np.minimum(np.abs(positions - before), np.abs(after - positions)) <= distance))
+
+    def _match_near(self, constraint: PositionalConstraint, terms: list[str], doc_ids: np.ndarray) -> np.ndarray:
+        if terms[0] == terms[-1]:
+            # two occurrences of the same term
+            positions = self._get_positions(terms[0], doc_ids=doc_ids.tolist())
+            matched = [doc_id for doc_id, term_positions in positions.items()
+                       if len(term_positions) > 1 and np.diff(term_positions).min() <= constraint.distance]
+            return np.array(sorted(matched), dtype=np.int64)
+
+        positions = self._get_positions(terms[0], doc_ids=doc_ids.tolist())
+        other_positions = self._get_positions(terms[1], doc_ids=list(positions))
+
+        matched = [
+            doc_id for doc_id, term_positions in other_positions.items()
+            if self._within_distance(positions[doc_id], term_positions, constraint.distance)
+        ]
+        return np.array(sorted(matched), dtype=np.int64)
+
+    def match(self, constraint: PositionalConstraint, document_frequencies: dict[str, int],
+              doc_ids: np.ndarray | None = None) -> np.ndarray:
+        """
+        Sorted doc ids satisfying constraint, among doc_ids when they are given
+        """
+        # words missing from the index cannot occur anywhere
+        if any(not document_frequencies.get(term) for term in constraint.terms):
+            return np.array([], dtype=np.int64)
+
+        terms = sorted(set(constraint.terms), key=lambda term: document_frequencies[term])
+        doc_ids = self._intersect_documents(terms=terms, doc_ids=doc_ids)
+        if len(doc_ids) == 0:
+            return doc_ids
+
+        if constraint.is_phrase:
+            return self._match_phrase(constraint=constraint, terms=terms, doc_ids=doc_ids)
+        return self._match_near(constraint=constraint, terms=terms, doc_ids=doc_ids)
+
+    def match_all(self, constraints: list[PositionalConstraint], document_frequencies: dict[str, int]) -> np.ndarray:
+        """
+        Documents satisfying every constraint, the constraint of the rarest term first
+        """
+        doc_ids = None
+        for constraint in sorted(constraints, key=lambda constraint: min(
+                document_frequencies.get(term, 0) for term in constraint.terms)):
+            doc_ids = self.match(constraint=constraint, document_frequencies=document_frequencies, doc_ids=doc_ids)
+            if len(doc_ids) == 0:
+                break
+
+        return doc_ids if doc_ids is not None else np.array([], dtype=np.int64)
+
+    def score(self, query_df: pd.DataFrame, doc_ids: np.ndarray) -> pd.DataFrame:
+        """
+        Cosine similarity of the given documents from the posting impacts, as TopKRetriever scores them
+        """
+        query_weights = SimilarityCalculator.normalize_vector(query_df['term_frequency'].to_numpy(dtype=np.float64))
+
+        scores = np.zeros(len(doc_ids), dtype=np.float64)
+        if len(doc_ids):
+            for term, query_weight in zip(query_df['term'], query_weights):
+                postings_doc_ids, impacts = self.document_repository.get_postings(term, doc_ids=doc_ids.tolist())
+                scores[np.searchsorted(doc_ids, postings_doc_ids)] += query_weight * impacts
+
+        return pd.DataFrame({'doc_id': doc_ids, 'similarity': scores})
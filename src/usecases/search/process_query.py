@@ -1,12 +1,36 @@
-from src.infra.repositories import TermRepository
-from src.usecases.utils import TextProcessor
+from src.infra.repositories import get_term_repository
+from src.usecases.search.statistics import CorpusStatistics
+from src.usecases.utils import get_processing_context
+from src.utils.metrics import metrics
 from collections import Counter
+from typing import TYPE_CHECKING
 import pandas as pd
 
+if TYPE_CHECKING:
+    from src.usecases.utils import TextProcessor
+
 
 class QueryProcessor:
+    def __init__(self, term_repository=None, statistics: CorpusStatistics | None = None,
+                 text_processor: 'TextProcessor | None' = None):
+        self.term_repository = term_repository or get_term_repository()
+        self.statistics = statistics
+        self.text_processor = text_processor
+
+    def get_text_processor(self) -> 'TextProcessor':
+        if self.text_processor is not None:
+            return self.text_processor
+
+        return get_processing_context().get_text_processor()
+
+    def _get_known_terms(self, terms: list[str]) -> list[str]:
+        if self.statistics is not None:
+            return self.statistics.known_terms(terms=terms)
+
+        return self.term_repository.get_terms_by_query_terms(query_terms=terms)
+
     @staticmethod
-    def extract_terms(query: str, text_processor: TextProcessor) -> list[str]:
+    def extract_terms(query: str, text_processor: 'TextProcessor') -> list[str]:
         return list(set(text_processor.process_text(text=query)))
 
     @staticmethod
@@ -19,10 +43,29 @@ class QueryProcessor:
         return tf_df
 
     def process_query(self, query: str) -> pd.DataFrame:
-        text_processor = TextProcessor()
-        terms = self.extract_terms(query=query, text_processor=text_processor)
-        terms = TermRepository.get_terms_by_query_terms(query_terms=terms)
+        with metrics.span('process_query') as span:
+            with metrics.span('tokenize'):
+                terms = self.extract_terms(query=query, text_processor=self.get_text_processor())
+            terms = self._get_known_terms(terms=terms)
 
-        tf_df = self.get_term_frequencies(terms=terms)
+            tf_df = self.get_term_frequencies(terms=terms)
+            span.set(terms=len(tf_df))
 
         return tf_df
+
+    def process_queries(self, queries: list[str]) -> pd.DataFrame:
+        """
+        Terms of all queries in one frame with a query_id column (position in queries),
+        unknown terms are dropped with a single lookup of the union of terms
+        """
+        text_processor = self.get_text_processor()
+        queries_terms = [self.extract_terms(query=query, text_processor=text_processor) for query in queries]
+
+        known_terms = set(self._get_known_terms(terms=list(set().union(*queries_terms))))
+
+        rows = [
+            (query_id, term, term_frequency)
+            for query_id, terms in enumerate(queries_terms)
+            for term, term_frequency in Counter(term for term in terms if term in known_terms).items()
+        ]
+        return pd.DataFrame(rows, columns=['query_id', 'term', 'term_frequency'])
@@ -0,0 +1,105 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+import pandas as pd
+
+from src.utils.config import config
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of ranked search results with a time to live.
+    Keys are the normalized query term set and the index version, values are the ranked doc_id/similarity
+    frame down to some depth, so every page within that depth is served from one computation.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._results = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    @staticmethod
+    def make_key(query_terms: list[str], index_version: str, constraints: list[tuple] | None = None) -> tuple:
+        # positional constraints narrow the results of the same terms, so they are part of the key
+        if constraints:
+            return frozenset(query_terms), index_version, frozenset(constraints)
+
+        return frozenset(query_terms), index_version
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+    def get(self, key: tuple, depth: int | None = None) -> pd.DataFrame | None:
+        """
+        Ranked frame of key, a truncated frame shorter than depth counts as a miss
+        """
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, ranked, complete = entry
+            if expires_at < time.monotonic():
+                del self._results[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            if not complete and depth is not None and len(ranked) < depth:
+                self.misses += 1
+                return None
+
+            self._results.move_to_end(key)
+            self.hits += 1
+            return ranked
+
+    def put(self, key: tuple, ranked: pd.DataFrame, complete: bool = True):
+        with self._lock:
+            self._results[key] = (time.monotonic() + self.ttl, ranked, complete)
+            self._results.move_to_end(key)
+
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+_result_cache: ResultCache | None = None
+
+
+def get_result_cache() -> ResultCache:
+    """
+    Process-wide cache, sized by RESULT_CACHE_SIZE and RESULT_CACHE_TTL
+    """
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(max_size=config.RESULT_CACHE_SIZE, ttl=config.RESULT_CACHE_TTL)
+
+    return _result_cache
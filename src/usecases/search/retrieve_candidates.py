@@ -1,52 +1,136 @@
+import time
+from functools import cached_property
+
 import pandas as pd
 
-from src.infra.repositories import DocumentRepository, TermRepository
+from src.infra.repositories import get_document_repository, get_term_repository
+from src.usecases.search.planner import RetrievalPlanner, get_retrieval_planner
+from src.usecases.search.statistics import CorpusStatistics
+from src.utils.config import config
+from src.utils.metrics import metrics, SIZE_BUCKETS
 
 
 class CandidatesRetriever:
-    def __init__(self):
-        self.total_documents = DocumentRepository.get_total_documents_count()
+    def __init__(self, document_repository=None, term_repository=None, single_round_trip: bool | None = None,
+                 statistics: CorpusStatistics | None = None, planner: RetrievalPlanner | None = None):
+        self.document_repository = document_repository or get_document_repository()
+        self.term_repository = term_repository or get_term_repository()
+        self.statistics = statistics
+
+        if single_round_trip is None:
+            single_round_trip = config.SINGLE_ROUND_TRIP_RETRIEVAL
+        self.single_round_trip = single_round_trip
+
+        if planner is None and config.RETRIEVAL_PLANNER:
+            planner = get_retrieval_planner()
+        self.planner = planner
+
+        # deepest filter level used by the last retrieve_candidates, None when it is not known (single round trip)
+        self.last_filter_level = None
+
+    @cached_property
+    def total_documents(self) -> int:
+        if self.statistics is not None:
+            return self.statistics.total_documents
+
+        return self.document_repository.get_total_documents_count()
 
-    @staticmethod
-    def _get_term_with_lowest_document_frequency(query_terms: list[str]) -> str:
-        term_frequencies = TermRepository.get_terms_document_frequencies(query_terms)
+    def _get_terms_document_frequencies(self, query_terms: list[str]) -> pd.DataFrame:
+        if self.statistics is not None:
+            return self.statistics.get_terms_document_frequencies(terms=query_terms)
+
+        return self.term_repository.get_terms_document_frequencies(query_terms)
+
+    def _get_term_with_lowest_document_frequency(self, query_terms: list[str]) -> str:
+        term_frequencies = self._get_terms_document_frequencies(query_terms)
         return term_frequencies.sort_values(by='document_frequency').iloc[0]['term']
 
-    @staticmethod
-    def _get_document_frequency_threshold(query_terms: list[str]) -> float:
-        term_frequencies = TermRepository.get_terms_document_frequencies(query_terms)
+    def _get_document_frequency_threshold(self, query_terms: list[str]) -> float:
+        term_frequencies = self._get_terms_document_frequencies(query_terms)
         return term_frequencies['document_frequency'].mean()
 
     def get_candidates_by_filter_level(self, query_terms: list[str], filter_level: int = 1) -> pd.DataFrame:
+        with metrics.span(f'filter_level_{filter_level}') as span:
+            candidates = self._query_filter_level(query_terms=query_terms, filter_level=filter_level)
+            span.set(rows=len(candidates))
+
+        metrics.observe('candidate_rows', len(candidates), buckets=SIZE_BUCKETS, filter_level=filter_level)
+        return candidates
+
+    def _query_filter_level(self, query_terms: list[str], filter_level: int) -> pd.DataFrame:
         match filter_level:
             case 1:
-                return DocumentRepository.get_documents_matching_all_query_terms(
+                return self.document_repository.get_documents_matching_all_query_terms(
                     query_terms=query_terms,
                     total_documents=self.total_documents,
                     term_with_lowest_document_frequency=self._get_term_with_lowest_document_frequency(
                         query_terms=query_terms))
             case 2:
-                return DocumentRepository.get_champion_documents_by_query_terms(
+                return self.document_repository.get_champion_documents_by_query_terms(
                     query_terms=query_terms,
                     total_documents=self.total_documents)
             case 3:
-                return DocumentRepository.get_high_idf_documents_by_query_terms(
+                return self.document_repository.get_high_idf_documents_by_query_terms(
                     query_terms=query_terms,
                     document_frequency_threshold=self._get_document_frequency_threshold(query_terms=query_terms),
                     total_documents=self.total_documents
                 )
             case 4:
-                return DocumentRepository.get_all_documents_by_query_terms(
+                return self.document_repository.get_all_documents_by_query_terms(
                     query_terms=query_terms,
                     total_documents=self.total_documents
                 )
 
+    def retrieve_planned_candidates(self, query_terms: list[str], count: int = 10) -> pd.DataFrame:
+        """
+        Runs the filter level chosen by the planner, and level 4 after it when it returned fewer than count rows
+        """
+        document_frequencies = self._get_terms_document_frequencies(query_terms)
+        if len(document_frequencies) == 0:
+            return pd.DataFrame()
+
+        plan = self.planner.plan(
+            document_frequencies=document_frequencies,
+            total_documents=self.total_documents,
+            count=count
+        )
+
+        start_time = time.perf_counter()
+        candidates = self.get_candidates_by_filter_level(query_terms=plan.query_terms, filter_level=plan.filter_level)
+        actual_rows = len(candidates)
+
+        fallback = actual_rows < count and plan.filter_level < 4
+        if fallback:
+            new_candidates = self.get_candidates_by_filter_level(query_terms=plan.query_terms, filter_level=4)
+            candidates = pd.concat([candidates, new_candidates]).drop_duplicates()
+
+        self.last_filter_level = 4 if fallback else plan.filter_level
+        self.planner.record(plan=plan, actual_rows=actual_rows, seconds=time.perf_counter() - start_time,
+                            fallback=fallback)
+        return candidates
+
     def retrieve_candidates(self, query_terms: list[str], count: int = 10) -> pd.DataFrame:
+        with metrics.span('retrieve_candidates') as span:
+            candidates = self._retrieve_candidates(query_terms=query_terms, count=count)
+            span.set(rows=len(candidates), filter_level=self.last_filter_level)
+
+        metrics.increment('filter_level_reached', filter_level=self.last_filter_level)
+        return candidates
+
+    def _retrieve_candidates(self, query_terms: list[str], count: int) -> pd.DataFrame:
+        if self.planner is not None:
+            return self.retrieve_planned_candidates(query_terms=query_terms, count=count)
+
+        if self.single_round_trip:
+            self.last_filter_level = None
+            return self.document_repository.get_candidates_by_cascade(query_terms=query_terms, count=count)
+
         filter_level = 1
         candidates = pd.DataFrame()
         while len(candidates) < count and filter_level <= 4:
             new_candidates = self.get_candidates_by_filter_level(query_terms=query_terms, filter_level=filter_level)
             candidates = pd.concat([candidates, new_candidates]).drop_duplicates()
+            self.last_filter_level = filter_level
             filter_level += 1
 
         return candidates
@@ -0,0 +1,181 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import pandas as pd
+
+from src.infra.connection import create_async_driver
+from src.infra.repositories import AsyncTermRepository, AsyncDocumentRepository, AsyncRepositoryAdapter, \
+    get_term_repository, get_document_repository
+from src.usecases.search.calculate_similarity import SimilarityCalculator
+from src.usecases.search.process_query import QueryProcessor
+from src.usecases.search.top_k import TopKRetriever
+from src.usecases.utils import get_processing_context
+from src.utils.config import config
+
+if TYPE_CHECKING:
+    from src.usecases.utils import TextProcessor
+
+
+class AsyncSearchService:
+    """
+    asyncio search entry point, same results as SearchQuery without its caches.
+    Term statistics and the documents count are fetched concurrently, and filter levels run in cascade order.
+    With speculative_levels the next level is started while the current one runs, so it is ready when needed.
+    At most max_concurrency searches run at once, new searches are rejected while max_pending are in flight,
+    and each search including its wait for a slot is bounded by timeout.
+    """
+
+    def __init__(self, term_repository, document_repository, text_processor: 'TextProcessor | None' = None,
+                 max_concurrency: int | None = None, max_pending: int | None = None, timeout: float | None = None,
+                 speculative_levels: bool = False, driver=None):
+        self.term_repository = term_repository
+        self.document_repository = document_repository
+        self.text_processor = text_processor
+        self.speculative_levels = speculative_levels
+        self.driver = driver
+
+        self.max_concurrency = max_concurrency if max_concurrency is not None else config.SEARCH_MAX_CONCURRENCY
+        self.max_pending = max_pending if max_pending is not None else config.SEARCH_MAX_PENDING
+        self.timeout = timeout if timeout is not None else config.SEARCH_TIMEOUT
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._pending = 0
+        # the tokenizer keeps per-text state, so text processing runs on a single thread
+        self._text_executor = ThreadPoolExecutor(max_workers=1)
+
+    def _extract_terms(self, query: str) -> list[str]:
+        text_processor = self.text_processor or get_processing_context().get_text_processor()
+        return QueryProcessor.extract_terms(query=query, text_processor=text_processor)
+
+    async def _retrieve_candidates(self, document_frequencies: pd.DataFrame, total_documents: int,
+                                   count: int = 10) -> pd.DataFrame:
+        query_terms = document_frequencies['term'].tolist()
+
+        levels = [
+            lambda: self.document_repository.get_documents_matching_all_query_terms(
+                query_terms=query_terms,
+                term_with_lowest_document_frequency=document_frequencies.sort_values(
+                    by='document_frequency').iloc[0]['term'],
+                total_documents=total_documents),
+            lambda: self.document_repository.get_champion_documents_by_query_terms(
+                query_terms=query_terms,
+                total_documents=total_documents),
+            lambda: self.document_repository.get_high_idf_documents_by_query_terms(
+                query_terms=query_terms,
+                document_frequency_threshold=document_frequencies['document_frequency'].mean(),
+                total_documents=total_documents),
+            lambda: self.document_repository.get_all_documents_by_query_terms(
+                query_terms=query_terms,
+                total_documents=total_documents),
+        ]
+
+        candidates = pd.DataFrame()
+        next_task = None
+        try:
+            for filter_level, level in enumerate(levels):
+                if len(candidates) >= count:
+                    break
+
+                task = next_task or asyncio.ensure_future(level())
+                # only the level after the current one is speculated, a query sent to the database is not stopped
+                # by cancelling its task, so later levels are never started ahead
+                next_task = None
+                if self.speculative_levels and filter_level + 1 < len(levels):
+                    next_task = asyncio.ensure_future(levels[filter_level + 1]())
+
+                new_candidates = await task
+                candidates = pd.concat([candidates, new_candidates]).drop_duplicates()
+        finally:
+            # a level which is not needed is cancelled, its error is collected here
+            if next_task is not None:
+                next_task.cancel()
+                await asyncio.gather(next_task, return_exceptions=True)
+
+        return candidates
+
+    async def _search(self, query: str, page: int, page_size: int) -> list[dict]:
+        loop = asyncio.get_running_loop()
+        terms = await loop.run_in_executor(self._text_executor, self._extract_terms, query)
+        if not terms:
+            return []
+
+        # statistics of unknown terms are not returned, so this also drops them from the query
+        document_frequencies, total_documents = await asyncio.gather(
+            self.term_repository.get_terms_document_frequencies(terms),
+            self.document_repository.get_total_documents_count()
+        )
+        if len(document_frequencies) == 0:
+            return []
+
+        query_df = QueryProcessor.get_term_frequencies(terms=document_frequencies['term'].tolist())
+        candidates_df = await self._retrieve_candidates(
+            document_frequencies=document_frequencies,
+            total_documents=total_documents
+        )
+
+        similarities = SimilarityCalculator().calculate_similarity(query_df=query_df, candidates_df=candidates_df)
+        similarities = TopKRetriever.select_top_k(similarities, k=page * page_size).iloc[(page - 1) * page_size:]
+
+        doc_ids = similarities['doc_id'].tolist()
+        documents = await self.document_repository.get_documents_by_doc_ids(doc_ids)
+        documents = {document['doc_id']: document for document in documents}
+
+        return [
+            {
+                'doc_id': doc_id,
+                'similarity': similarity,
+                'title': documents.get(doc_id, {}).get('title'),
+                'url': documents.get(doc_id, {}).get('url')
+            }
+            for doc_id, similarity in zip(doc_ids, similarities['similarity'].tolist())
+        ]
+
+    async def _search_limited(self, query: str, page: int, page_size: int) -> list[dict]:
+        async with self._semaphore:
+            return await self._search(query=query, page=page, page_size=page_size)
+
+    async def search(self, query: str, page: int = 1, page_size: int = 10) -> list[dict]:
+        if self._pending >= self.max_pending:
+            raise Exception(f"Search service is overloaded: {self._pending} pending searches")
+
+        self._pending += 1
+        try:
+            return await asyncio.wait_for(self._search_limited(query=query, page=page, page_size=page_size),
+                                          timeout=self.timeout)
+        finally:
+            self._pending -= 1
+
+    async def close(self):
+        self._text_executor.shutdown(wait=False)
+        if self.driver is not None:
+            await self.driver.close()
+
+
+def create_async_search_service(**service_config) -> AsyncSearchService:
+    """
+    Service on the configured backend: the async Neo4j driver with a pool of ASYNC_POOL_SIZE connections,
+    or the in-memory index file behind AsyncRepositoryAdapter
+    """
+    # the primary of a sharded index has no postings, searching it alone would return nothing
+    if config.SHARD_INDEX_FILE_PATHS if config.INDEX_BACKEND == 'index_file' else config.SHARD_DATABASE_URLS:
+        raise Exception('The async search service does not search sharded indexes, use SearchQuery')
+
+    if config.INDEX_BACKEND == 'index_file':
+        return AsyncSearchService(
+            term_repository=AsyncRepositoryAdapter(get_repository=get_term_repository),
+            document_repository=AsyncRepositoryAdapter(get_repository=get_document_repository),
+            **service_config
+        )
+
+    driver, database = create_async_driver(
+        config.DATABASE_URL,
+        max_connection_pool_size=config.ASYNC_POOL_SIZE,
+        connection_acquisition_timeout=config.ASYNC_CONNECTION_ACQUISITION_TIMEOUT
+    )
+    return AsyncSearchService(
+        term_repository=AsyncTermRepository(driver=driver, database=database),
+        document_repository=AsyncDocumentRepository(driver=driver, database=database),
+        driver=driver,
+        **service_config
+    )
@@ -0,0 +1,94 @@
+import time
+from threading import Lock
+
+import pandas as pd
+
+from src.infra.repositories import get_term_repository, get_document_repository, get_index_meta_repository
+from src.utils.config import config
+from src.utils.weighting import idf_value
+
+
+class CorpusStatistics:
+    """
+    Vocabulary with document frequencies and the total documents count of one index version
+    """
+
+    def __init__(self, version: str | None, total_documents: int, document_frequencies: dict[str, int]):
+        self.version = version
+        self.total_documents = total_documents
+        self.document_frequencies = document_frequencies
+
+    def known_terms(self, terms: list[str]) -> list[str]:
+        return [term for term in terms if term in self.document_frequencies]
+
+    def get_terms_document_frequencies(self, terms: list[str]) -> pd.DataFrame:
+        terms = self.known_terms(terms)
+        return pd.DataFrame({
+            'term': terms,
+            'document_frequency': [self.document_frequencies[term] for term in terms]
+        }, columns=['term', 'document_frequency'])
+
+    def idf(self, term: str) -> float:
+        return float(idf_value(self.document_frequencies[term], self.total_documents))
+
+
+class CorpusStatisticsCache:
+    """
+    Keeps CorpusStatistics in memory and reloads them when the index version written by the indexer changes.
+    The version is checked at most once every check_interval seconds.
+    """
+
+    def __init__(self, term_repository=None, document_repository=None, index_meta_repository=None,
+                 check_interval: float | None = None):
+        self.term_repository = term_repository or get_term_repository()
+        self.document_repository = document_repository or get_document_repository()
+        self.index_meta_repository = index_meta_repository or get_index_meta_repository()
+
+        if check_interval is None:
+            check_interval = config.STATISTICS_CHECK_INTERVAL
+        self.check_interval = check_interval
+
+        self._statistics: CorpusStatistics | None = None
+        self._last_check_time = 0.0
+        self._lock = Lock()
+
+    def _load(self, version: str | None) -> CorpusStatistics:
+        document_frequencies = self.term_repository.get_all_document_frequencies()
+
+        return CorpusStatistics(
+            version=version,
+            total_documents=self.document_repository.get_total_documents_count(),
+            document_frequencies=dict(zip(document_frequencies['term'], document_frequencies['document_frequency']))
+        )
+
+    def invalidate(self):
+        with self._lock:
+            self._statistics = None
+
+    def get(self) -> CorpusStatistics:
+        now = time.monotonic()
+        statistics = self._statistics
+        if statistics is not None and now - self._last_check_time < self.check_interval:
+            return statistics
+
+        with self._lock:
+            version = self.index_meta_repository.get_version()
+            if self._statistics is None or self._statistics.version != version:
+                self._statistics = self._load(version=version)
+
+            self._last_check_time = now
+            return self._statistics
+
+
+_corpus_statistics_cache: CorpusStatisticsCache | None = None
+
+
+def get_corpus_statistics_cache() -> CorpusStatisticsCache:
+    """
+    Process-wide cache for the configured backend
+    """
+    global _corpus_statistics_cache
+    if _corpus_statistics_cache is None:
+        _corpus_statistics_cache = CorpusStatisticsCache()
+
+    return _corpus_statistics_cache
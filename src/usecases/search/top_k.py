@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from src.infra.repositories import get_document_repository, get_term_repository
+from src.usecases.search.calculate_similarity import SimilarityCalculator
+
+
+class TopKRetriever:
+    """
+    Exact top k documents by cosine similarity among all documents containing any query term (filter level 4),
+    scored from the index-time posting impacts with MaxScore pruning.
+
+    Terms are processed by descending upper bound (query weight x max impact). Once the upper bounds of the
+    remaining terms add up to less than the current k-th score, no unseen document can enter the top k, so the
+    remaining terms only probe postings of the current candidates instead of reading whole postings lists,
+    and candidates which can no longer reach the k-th score are dropped.
+    """
+
+    # relative slack on the k-th score, so rounding of summed bounds never prunes a tied document
+    tolerance = 1e-9
+
+    def __init__(self, document_repository=None, term_repository=None):
+        self.document_repository = document_repository or get_document_repository()
+        self.term_repository = term_repository or get_term_repository()
+
+        self.scanned_terms_count = 0
+        self.probed_terms_count = 0
+
+    @staticmethod
+    def select_top_k(similarities: pd.DataFrame, k: int) -> pd.DataFrame:
+        """
+        The k most similar rows, ordered by similarity descending and doc_id ascending on ties.
+        argpartition finds the k-th score in linear time, and only rows at or above it get sorted.
+        """
+        scores = similarities['similarity'].to_numpy()
+        doc_ids = similarities['doc_id'].to_numpy()
+
+        if k < len(scores):
+            kth_score = scores[np.argpartition(-scores, k - 1)[k - 1]]
+            selected = np.flatnonzero(scores >= kth_score)
+        else:
+            selected = np.arange(len(scores))
+
+        order = selected[np.lexsort((doc_ids[selected], -scores[selected]))][:k]
+        return similarities.iloc[order].reset_index(drop=True)
+
+    def _get_threshold(self, scores: np.ndarray, k: int) -> float:
+        if len(scores) < k:
+            return -np.inf
+
+        kth_score = np.partition(scores, len(scores) - k)[len(scores) - k]
+        return kth_score - abs(kth_score) * self.tolerance
+
+    def retrieve(self, query_df: pd.DataFrame, k: int = 10) -> pd.DataFrame:
+        query_weights = SimilarityCalculator.normalize_vector(query_df['term_frequency'].to_numpy(dtype=np.float64))
+        query_weights = dict(zip(query_df['term'], query_weights))
+
+        max_impacts = self.term_repository.get_terms_max_impacts(list(query_weights))
+        upper_bounds = {term: query_weights[term] * max_impact for term, max_impact in max_impacts.items()}
+
+        # terms without positive impact (idf of zero) add nothing to any score
+        terms = sorted((term for term in upper_bounds if upper_bounds[term] > 0), key=upper_bounds.get, reverse=True)
+        remaining_bounds = np.cumsum([upper_bounds[term] for term in terms][::-1])[::-1]
+
+        self.scanned_terms_count = self.probed_terms_count = 0
+        doc_ids = np.array([], dtype=np.int64)
+        scores = np.array([], dtype=np.float64)
+
+        for term, remaining_bound in zip(terms, remaining_bounds):
+            threshold = self._get_threshold(scores, k)
+
+            if remaining_bound < threshold:
+                still_competitive = scores + remaining_bound >= threshold
+                doc_ids, scores = doc_ids[still_competitive], scores[still_competitive]
+
+                postings_doc_ids, impacts = self.document_repository.get_postings(term, doc_ids=doc_ids.tolist())
+                scores[np.searchsorted(doc_ids, postings_doc_ids)] += query_weights[term] * impacts
+                self.probed_terms_count += 1
+            else:
+                postings_doc_ids, impacts = self.document_repository.get_postings(term)
+                doc_ids, inverse = np.unique(np.concatenate([doc_ids, postings_doc_ids]), return_inverse=True)
+                scores = np.bincount(
+                    inverse, weights=np.concatenate([scores, query_weights[term] * impacts]), minlength=len(doc_ids)
+                )
+                self.scanned_terms_count += 1
+
+        return self.select_top_k(pd.DataFrame({'doc_id': doc_ids, 'similarity': scores}), k=k)
@@ -1 +1,16 @@
-from src.usecases.utils.process_text import TextProcessor
+from src.usecases.utils.lemma_cache import LemmaCache, get_shared_lemma_cache
+from src.usecases.utils.stop_terms import load_stop_terms, save_stop_terms, get_shared_stop_terms, \
+    get_shared_removed_terms
+from src.usecases.utils.context import ProcessingContext, get_processing_context
+
+
+def __getattr__(name: str):
+    # hazm takes seconds to import, so it is imported by the first use of TextProcessor
+    if name == 'TextProcessor':
+        from src.usecases.utils.process_text import TextProcessor
+        return TextProcessor
+    if name == 'FastTextProcessor':
+        from src.usecases.utils.fast_process_text import FastTextProcessor
+        return FastTextProcessor
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,118 @@
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from src.usecases.utils.lemma_cache import LemmaCache, get_shared_lemma_cache
+from src.usecases.utils.stop_terms import get_shared_stop_terms
+from src.utils.config import config
+
+if TYPE_CHECKING:
+    from src.usecases.utils.process_text import TextProcessor
+
+
+class ProcessingContext:
+    """
+    Text processing models of the process, loaded once on first use (hazm itself is imported then too).
+    Normalizer, lemmatizer and tokenizer word lists are only read after loading, so they are shared by all threads,
+    the tokenizer keeps the entity mapping of the text being processed, so each thread gets its own fork of it.
+    """
+
+    warm_up_text = 'متن نمونه برای آماده‌سازی مدل‌ها در سال ۱۴۰۲ با ایمیل info@example.com'
+
+    def __init__(self, lemma_cache: LemmaCache | None = None):
+        self._lemma_cache = lemma_cache
+        self._resources = {}
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+        # seconds spent on loading each resource, to measure cold start
+        self.load_seconds = {}
+
+    def _get_resource(self, name: str, factory):
+        resource = self._resources.get(name)
+        if resource is not None:
+            return resource
+
+        with self._lock:
+            if name not in self._resources:
+                start_time = time.perf_counter()
+                self._resources[name] = factory()
+                self.load_seconds[name] = time.perf_counter() - start_time
+
+        return self._resources[name]
+
+    @staticmethod
+    def _import_text_processing():
+        from src.usecases.utils import process_text
+        return process_text
+
+    @property
+    def text_processing(self):
+        return self._get_resource('hazm', self._import_text_processing)
+
+    @property
+    def text_processor_class(self) -> type['TextProcessor']:
+        if config.FAST_TEXT_PROCESSING:
+            from src.usecases.utils.fast_process_text import FastTextProcessor
+            return FastTextProcessor
+
+        return self.text_processing.TextProcessor
+
+    @property
+    def lemma_cache(self) -> LemmaCache:
+        # an injected cache is used even while empty, LemmaCache is falsy then
+        return self._get_resource(
+            'lemma_cache',
+            lambda: self._lemma_cache if self._lemma_cache is not None else get_shared_lemma_cache()
+        )
+
+    @property
+    def stop_terms(self) -> frozenset[str]:
+        return self._get_resource('stop_terms', get_shared_stop_terms)
+
+    @property
+    def normalizer(self):
+        return self._get_resource('normalizer', self.text_processing.CustomNormalizer)
+
+    @property
+    def tokenizer(self):
+        return self._get_resource('tokenizer', self.text_processing.CustomWordTokenizer)
+
+    @property
+    def lemmatizer(self):
+        return self._get_resource('lemmatizer', self.text_processing.Lemmatizer)
+
+    def get_text_processor(self) -> 'TextProcessor':
+        """
+        Text processor of the calling thread, built from the shared models
+        """
+        text_processor = getattr(self._local, 'text_processor', None)
+        if text_processor is None:
+            text_processor = self.text_processor_class(
+                lemma_cache=self.lemma_cache,
+                normalizer=self.normalizer,
+                tokenizer=self.tokenizer.fork(),
+                lemmatizer=self.lemmatizer,
+                stop_terms=self.stop_terms
+            )
+            self._local.text_processor = text_processor
+
+        return text_processor
+
+    def warm_up(self) -> dict:
+        """
+        Loads every model and processes a sample text, so the first query does not pay for it
+        """
+        self.get_text_processor().process_text(self.warm_up_text)
+        return dict(self.load_seconds)
+
+
+_processing_context: ProcessingContext | None = None
+
+
+def get_processing_context() -> ProcessingContext:
+    global _processing_context
+    if _processing_context is None:
+        _processing_context = ProcessingContext()
+
+    return _processing_context
@@ -0,0 +1,239 @@
+import re
+
+from hazm.utils import maketrans
+
+from src.usecases.utils.process_text import TextProcessor
+
+
+class FastTextProcessor(TextProcessor):
+    """
+    TextProcessor giving the same tokens with fewer passes over the text: entities are replaced in one scan
+    of a combined pattern, unwanted chars, translations, numbers and diacritics are mapped in one scan,
+    the text is tokenized once and normalizations that cannot match are skipped.
+    Texts where entities are adjacent to chars of other entities are left to TextProcessor, as the order
+    of replacements matters there.
+    """
+
+    entity_names = ['email', 'link', 'id', 'hashtag', 'number_int', 'number_float']
+
+    # chars that other entity patterns may start, continue or end with, next to an entity
+    entity_neighbour_chars = r'\w.,٫٬\-+@#:/%~?=&'
+    number_neighbour_chars = r'\w.,٫٬\-+@#%~?=&'
+    # next to a number out of other entities, only separators change what the number patterns match
+    separator_chars = r'.,٫٬'
+
+    letters = 'آابپتثجچحخدذرزژسشصضطظعغفقکگلمنوهی'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        normalizer, tokenizer = self.normalizer, self.tokenizer
+
+        # texts left to TextProcessor
+        self.fallbacks = 0
+
+        if not normalizer._remove_unwanted_chars:
+            raise Exception('FastTextProcessor needs a normalizer that removes unwanted chars')
+
+        self.number_pattern = re.compile(f'[{re.escape(normalizer.number_translation_src)}]+')
+        self.number_table = maketrans(normalizer.number_translation_src, normalizer.number_translation_dst)
+
+        # entities only start with these chars, checking them first skips the alternatives at other positions
+        self.entities_pattern = re.compile(r'(?=[a-zA-Z0-9._+\-@#\d,٬])(?:' + '|'.join(
+            f'(?P<{name}>{getattr(tokenizer, f"{name}_pattern").pattern})' for name in self.entity_names
+        ) + ')')
+        self.entity_neighbour_pattern = re.compile(f'[{self.entity_neighbour_chars}]')
+        self.number_neighbour_pattern = re.compile(f'[{self.number_neighbour_chars}]')
+        self.separator_pattern = re.compile(f'[{self.separator_chars}]')
+        # entities do not contain spaces, emails and ids need @, hashtags need # and links need a dot before a domain
+        self.entity_chunk_pattern = re.compile(r'(?<!\S)\S*(?:[@#]|[a-zA-Z0-9-]\.[a-zA-Z])\S*')
+        self.float_pattern = re.compile(r'[\d۰-۹]+(?:[.٫٬,][\d۰-۹]+)*$')
+
+        # words and the splits of tokenizer.pattern, as the tokenizer finds them
+        self.first_split_pattern = re.compile(
+            r'[؟!?]+|[\d.:]+|[:.،؛»\])}"«\[({/\\]|[^ \n\t\d؟!?.:،؛»\])}"«\[({/\\]+'
+        )
+        # unwanted chars are removed by the normalizer, so only numbers and quotations are split from words
+        self.second_split_pattern = re.compile(r'\d+|"|[^ \d"]+')
+        self.digit_pattern = re.compile(r'\d')
+
+        char_table = self._build_char_table()
+        self.char_table = str.maketrans(char_table)
+        self.char_pattern = re.compile(f'[{re.escape("".join(char_table))}]+')
+
+        self.zwnj_patterns = [
+            (re.compile(r'\u200c{2,}'), '\u200c'),
+            (re.compile(r'\u200c+ '), ' '),
+            (re.compile(r' \u200c+'), ' '),
+            (re.compile(r'\b\u200c+\B'), ''),
+            (re.compile(r'\B\u200c+\b'), '')
+        ]
+
+        # each affix pattern of the normalizer with a substring that any of its matches contains
+        affix_guards = [['ه ی '], ['می '], [' تر', ' گر', ' ها'], ['ه ا'], ['هها']]
+        self.affix_patterns = [
+            (re.compile(pattern), repl, guards)
+            for (pattern, repl), guards in zip(normalizer.affix_spacing_patterns, affix_guards)
+        ]
+        # other punctuation spacing patterns only match chars removed as unwanted chars
+        self.quotation_pattern = re.compile(normalizer.punctuation_spacing_patterns[0][0])
+        self.quotation_repl = normalizer.punctuation_spacing_patterns[0][1]
+
+        replaced_chars = ''.join(old for old, _ in normalizer.replacements).translate({ord(c): None for c in '(|)'})
+        self.replacements_pattern = re.compile(f'[{re.escape(replaced_chars)}]')
+        self.specials_pattern = re.compile(normalizer.specials_chars_patterns[0][0])
+        self.repeated_pattern = re.compile(f'([{self.letters}])\\1\\1')
+        self.joint_mi_pattern = re.compile(normalizer.joint_mi_patterns)
+        self.mi_pattern = re.compile('^(ن?می)')
+
+    def _build_char_table(self) -> dict:
+        """
+        Unwanted chars removal, translations, persian numbers and diacritics removal of the normalizer as one table
+        """
+        normalizer = self.normalizer
+        translations = maketrans(normalizer.translation_src, normalizer.translation_dst)
+        diacritics = re.findall(r'[^\[\]]', normalizer.diacritics_patterns[0][0])
+
+        chars = set(normalizer.unwanted_chars) | set(map(chr, translations)) | set(map(chr, self.number_table)) \
+            | set(diacritics)
+        table = {}
+        for char in chars:
+            if char in normalizer.unwanted_chars:
+                table[char] = ''
+                continue
+
+            mapped = translations.get(ord(char), char)
+            mapped = self.number_table.get(ord(mapped), mapped)
+            table[char] = '' if mapped in diacritics else mapped
+
+        return {char: mapped for char, mapped in table.items() if mapped != char}
+
+    @staticmethod
+    def _is_next_to(pattern: re.Pattern, text: str, start: int, end: int) -> bool:
+        return bool(start and pattern.match(text, start - 1) or pattern.match(text, end))
+
+    def _replace_entities(self, text: str) -> str | None:
+        """
+        Entities of the tokenizer found in one scan, None when an entity is next to chars of other entities.
+        Replacements are made in the order of the tokenizer, so that entities get the same labels.
+        """
+        tokenizer = self.tokenizer
+        matches = list(self.entities_pattern.finditer(text))
+        entity_chunks = None
+
+        for match in matches:
+            name, entity, start, end = match.lastgroup, match.group(), match.start(), match.end()
+
+            if name in ('number_int', 'number_float'):
+                if self._is_next_to(self.separator_pattern, text, start, end):
+                    return None
+                if self._is_next_to(self.number_neighbour_pattern, text, start, end):
+                    if entity_chunks is None:
+                        entity_chunks = [chunk.span() for chunk in self.entity_chunk_pattern.finditer(text)]
+                    if any(chunk_start <= start < chunk_end for chunk_start, chunk_end in entity_chunks):
+                        return None
+            elif self._is_next_to(self.entity_neighbour_pattern, text, start, end):
+                return None
+            if name == 'link' and '@' in entity or name == 'hashtag' and ('@' in entity or '.' in entity):
+                return None
+            if name == 'number_float' and not self.float_pattern.match(entity):
+                return None
+
+        replacements = [None] * len(matches)
+        for name in self.entity_names:
+            pattern, repl = getattr(tokenizer, f'{name}_pattern'), getattr(tokenizer, f'{name}_repl')
+            for index, match in enumerate(matches):
+                if match.lastgroup == name:
+                    # the hashtag replacement reads the group of the hashtag pattern
+                    replacements[index] = repl(pattern.match(match.group()) if name == 'hashtag' else match)
+                elif match.lastgroup == 'hashtag' and name in ('number_int', 'number_float'):
+                    # numbers in hashtags are replaced along with the other numbers
+                    replacements[index] = pattern.sub(repl, replacements[index])
+
+        parts, position = [], 0
+        for match, replacement in zip(matches, replacements):
+            parts += [text[position:match.start()], replacement]
+            position = match.end()
+        parts.append(text[position:])
+
+        return ''.join(parts)
+
+    def _translate_chars(self, text: str) -> str:
+        return self.char_pattern.sub(lambda match: match.group().translate(self.char_table), text)
+
+    def _normalize(self, text: str) -> str:
+        """
+        CustomNormalizer.normalize of a text joined from the tokens of the tokenizer, tokenized as the tokenizer would
+        """
+        normalizer = self.normalizer
+
+        text = self._translate_chars(text)
+
+        if '\u200c' in text:
+            for pattern, repl in self.zwnj_patterns:
+                text = pattern.sub(repl, text)
+        if '\r' in text:
+            text = text.replace('\r', '')
+
+        text = ' '.join(normalizer.token_spacing(self.second_split_pattern.findall(text)))
+
+        for pattern, repl, guards in self.affix_patterns:
+            if any(guard in text for guard in guards):
+                text = pattern.sub(repl, text)
+        if '"' in text:
+            text = self.quotation_pattern.sub(self.quotation_repl, text)
+
+        if self.replacements_pattern.search(text):
+            text = normalizer.unicodes_replacement(text)
+        text = self.specials_pattern.sub('', text)
+        if self.repeated_pattern.search(text):
+            text = normalizer.decrease_repeated_chars(text)
+
+        for word in self.joint_mi_pattern.findall(text):
+            separated = self.mi_pattern.sub('\\1\u200c', word)
+            if separated in normalizer.verbs:
+                text = text.replace(word, separated)
+
+        return text
+
+    def _tokenize(self, text: str) -> list[str]:
+        """
+        Tokenizer on a normalized text, in which only numbers are left to replace
+        """
+        tokenizer = self.tokenizer
+
+        if self.digit_pattern.search(text):
+            text = tokenizer.number_int_pattern.sub(tokenizer.number_int_repl, text)
+            text = tokenizer.number_float_pattern.sub(tokenizer.number_float_repl, text)
+
+        if '"' in text or self.digit_pattern.search(text):
+            tokens = self.second_split_pattern.findall(text)
+        else:
+            tokens = [token for token in text.split(' ') if token]
+
+        return tokenizer.join_verb_parts(tokens)
+
+    def process_text(self, text: str) -> list[str]:
+        # clear mapping of labels and their values
+        self.tokenizer.clear_mapping()
+
+        # text with persian numbers
+        text = self.number_pattern.sub(lambda match: match.group().translate(self.number_table), text)
+
+        # emails, links and numbers replaced with labels in one scan
+        replaced = self._replace_entities(text)
+        if replaced is None:
+            self.fallbacks += 1
+            return super().process_text(text)
+
+        tokens = self.tokenizer.join_verb_parts(self.first_split_pattern.findall(replaced))
+
+        # normalizations and the final tokenization
+        tokens = self._tokenize(self._normalize(' '.join(tokens)))
+
+        # apply lemmatizer on tokens
+        tokens = [self.lemmatize(token) for token in tokens]
+
+        # replace labels with their values
+        tokens = self.tokenizer.restore_mapping(tokens)
+
+        return self.drop_stop_terms(tokens)
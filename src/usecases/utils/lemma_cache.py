@@ -0,0 +1,114 @@
+import json
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from src.utils.config import config
+
+if TYPE_CHECKING:
+    from hazm import Lemmatizer
+
+
+class LemmaCache:
+    """
+    Bounded LRU cache from surface form to lemma
+    """
+
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self._lemmas = OrderedDict()
+        self._lock = Lock()
+        # entries put since the last pop_added, kept only after record_added
+        self._added: dict | None = None
+
+    def __len__(self) -> int:
+        return len(self._lemmas)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {'size': len(self), 'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate}
+
+    def _put(self, token: str, lemma: str):
+        self._lemmas[token] = lemma
+        self._lemmas.move_to_end(token)
+        if self._added is not None:
+            self._added[token] = lemma
+        if len(self._lemmas) > self.max_size:
+            self._lemmas.popitem(last=False)
+
+    def lemmatize(self, token: str, lemmatizer: 'Lemmatizer') -> str:
+        with self._lock:
+            lemma = self._lemmas.get(token)
+            if lemma is not None:
+                self.hits += 1
+                self._lemmas.move_to_end(token)
+                return lemma
+
+        lemma = lemmatizer.lemmatize(token)
+
+        with self._lock:
+            self.misses += 1
+            self._put(token, lemma)
+
+        return lemma
+
+    def record_added(self):
+        """
+        Starts keeping the entries put into the cache, for a worker process to send them back with pop_added
+        """
+        with self._lock:
+            self._added = {}
+
+    def pop_added(self) -> list[tuple[str, str]]:
+        with self._lock:
+            added, self._added = list(self._added.items()), {}
+
+        return added
+
+    def update(self, items: list[tuple[str, str]]):
+        with self._lock:
+            for token, lemma in items:
+                self._put(token, lemma)
+
+    def save(self, path: str):
+        with self._lock:
+            items = list(self._lemmas.items())
+
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(items, file, ensure_ascii=False)
+
+    def load(self, path: str):
+        """
+        Preloads the cache from a file written by save, most recently used entries are kept if it does not fit
+        """
+        if not os.path.exists(path):
+            return
+
+        with open(path, encoding='utf-8') as file:
+            items = json.load(file)
+
+        self.update(items[-self.max_size:])
+
+
+_shared_lemma_cache: LemmaCache | None = None
+
+
+def get_shared_lemma_cache() -> LemmaCache:
+    """
+    Process-wide cache, preloaded from LEMMA_CACHE_PATH when it is configured
+    """
+    global _shared_lemma_cache
+    if _shared_lemma_cache is None:
+        _shared_lemma_cache = LemmaCache(max_size=config.LEMMA_CACHE_SIZE)
+        if config.LEMMA_CACHE_PATH:
+            _shared_lemma_cache.load(config.LEMMA_CACHE_PATH)
+
+    return _shared_lemma_cache
@@ -1,8 +1,13 @@
 from hazm import Normalizer, WordTokenizer, Lemmatizer
+import copy
 import re
 
+from src.usecases.utils.lemma_cache import LemmaCache
+
 
 class CustomNormalizer(Normalizer):
+    unwanted_chars = """ـ.؛،؟"*ء+':!<>-«»(){}|[]#,&?@=/\\"""
+
     def __init__(
             self,
             remove_unwanted_chars: bool = True
@@ -11,7 +16,7 @@ class CustomNormalizer(Normalizer):
             persian_style=False  # not to change numbers like 10.45
         )
         self._remove_unwanted_chars = remove_unwanted_chars
-        self.unwanted_chars_pattern = re.compile(r"""[ـ.؛،؟"*ء+':!<>\-«»(){}|\[\]#,&?@=/\\]""")
+        self.unwanted_chars_pattern = re.compile(f'[{re.escape(self.unwanted_chars)}]')
 
     def remove_unwanted_chars(self, text: str) -> str:
         return self.unwanted_chars_pattern.sub("", text)
@@ -42,17 +47,45 @@ class CustomWordTokenizer(WordTokenizer):
             replace_hashtags=True,
             join_verb_parts=join_verb_parts
         )
+        self.distinguish_emails = distinguish_emails
+        self.distinguish_links = distinguish_links
+        self.distinguish_ids = distinguish_ids
+        self.distinguish_numbers = distinguish_numbers
+        self._set_replacements()
+
+    def _set_replacements(self):
         self.replaced_entities_mapping = {}
 
-        self.email_repl = lambda match: self.update_mapping(match, 'EMAIL') if distinguish_emails else r" EMAIL "
-        self.link_repl = lambda match: self.update_mapping(match, 'LINK') if distinguish_links else r" LINK "
-        self.id_repl = lambda match: self.update_mapping(match, 'ID') if distinguish_ids else r" ID "
-        self.number_int_repl = lambda match: self.update_mapping(match, 'NUM') if distinguish_numbers else r" NUM "
-        self.number_float_repl = lambda match: self.update_mapping(match, 'NUMF') if distinguish_numbers else r" NUMF "
+        self.email_repl = lambda match: self.update_mapping(match, 'EMAIL') if self.distinguish_emails else r" EMAIL "
+        self.link_repl = lambda match: self.update_mapping(match, 'LINK') if self.distinguish_links else r" LINK "
+        self.id_repl = lambda match: self.update_mapping(match, 'ID') if self.distinguish_ids else r" ID "
+        self.number_int_repl = lambda match: self.update_mapping(match, 'NUM') if self.distinguish_numbers \
+            else r" NUM "
+        self.number_float_repl = lambda match: self.update_mapping(match, 'NUMF') if self.distinguish_numbers \
+            else r" NUMF "
+
+    def fork(self) -> 'CustomWordTokenizer':
+        """
+        Tokenizer with its own entity mapping, sharing the word lists loaded by this one
+        """
+        tokenizer = copy.copy(self)
+        tokenizer._set_replacements()
+
+        return tokenizer
+
+    @staticmethod
+    def _index_to_letters(index: int) -> str:
+        # digits are split from words by the tokenizer, so labels are suffixed with letters (0 -> a, 26 -> ba)
+        letters = ''
+        while True:
+            index, remainder = divmod(index, 26)
+            letters = chr(ord('a') + remainder) + letters
+            if index == 0:
+                return letters
 
     def update_mapping(self, match, label: str):
         index = len(self.replaced_entities_mapping)
-        label = f'{label}_{index}'
+        label = f'{label}_{self._index_to_letters(index)}'
         self.replaced_entities_mapping[label] = match.group()
 
         return label
@@ -65,10 +98,29 @@ class CustomWordTokenizer(WordTokenizer):
 
 
 class TextProcessor:
-    def __init__(self):
-        self.normalizer = CustomNormalizer()
-        self.tokenizer = CustomWordTokenizer()
-        self.lemmatizer = Lemmatizer()
+    def __init__(self, lemma_cache: LemmaCache | None = None, normalizer: CustomNormalizer | None = None,
+                 tokenizer: CustomWordTokenizer | None = None, lemmatizer: Lemmatizer | None = None,
+                 stop_terms: frozenset[str] | None = None):
+        # loaded models can be passed in to share them, see ProcessingContext
+        self.normalizer = normalizer or CustomNormalizer()
+        self.tokenizer = tokenizer or CustomWordTokenizer()
+        self.lemmatizer = lemmatizer or Lemmatizer()
+        self.lemma_cache = lemma_cache if lemma_cache is not None else LemmaCache()
+        # top frequent terms of the index, they are not indexed and can not match a query
+        self.stop_terms = stop_terms or frozenset()
+
+    def lemmatize(self, token: str) -> str:
+        # labels of replaced entities are not lemmatized, so that they can be restored
+        if token in self.tokenizer.replaced_entities_mapping:
+            return token
+
+        return self.lemma_cache.lemmatize(token, self.lemmatizer)
+
+    def drop_stop_terms(self, tokens: list[str]) -> list[str]:
+        if not self.stop_terms:
+            return tokens
+
+        return [token for token in tokens if token not in self.stop_terms]
 
     def process_text(self, text: str) -> list[str]:
         # clear mapping of labels and their values
@@ -88,9 +140,9 @@ class TextProcessor:
         tokens = self.tokenizer.tokenize(text)
 
         # apply lemmatizer on tokens
-        tokens = [self.lemmatizer.lemmatize(token) for token in tokens]
+        tokens = [self.lemmatize(token) for token in tokens]
 
         # replace labels with their values
         tokens = self.tokenizer.restore_mapping(tokens)
 
-        return tokens
+        return self.drop_stop_terms(tokens)
@@ -0,0 +1,52 @@
+import os
+
+import pandas as pd
+
+from src.utils.config import config
+
+
+def load_stop_terms(path: str) -> frozenset[str]:
+    """
+    Terms of a file written by save_stop_terms (or removed_top_terms.csv of earlier indexes), empty if there is none
+    """
+    if not os.path.exists(path):
+        return frozenset()
+
+    return frozenset(pd.read_csv(path, keep_default_na=False)['term'])
+
+
+def save_stop_terms(top_terms: pd.DataFrame, path: str):
+    """
+    Top frequent terms with their total frequency, in the format of removed_top_terms.csv
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    top_terms[['term', 'total_frequency']].to_csv(path, index=False)
+
+
+_shared_stop_terms: frozenset[str] | None = None
+
+
+def get_shared_stop_terms() -> frozenset[str]:
+    """
+    Stop terms of the process, loaded from STOP_TERMS_PATH when STOP_TERMS_ENABLED is set
+    """
+    global _shared_stop_terms
+    if _shared_stop_terms is None:
+        _shared_stop_terms = load_stop_terms(config.STOP_TERMS_PATH) if config.STOP_TERMS_ENABLED else frozenset()
+
+    return _shared_stop_terms
+
+
+_shared_removed_terms: frozenset[str] | None = None
+
+
+def get_shared_removed_terms() -> frozenset[str]:
+    """
+    Top frequent terms left out of the postings, loaded from STOP_TERMS_PATH whether or not STOP_TERMS_ENABLED is set.
+    Without stop terms, the indexer removes them from built postings and positions still count them.
+    """
+    global _shared_removed_terms
+    if _shared_removed_terms is None:
+        _shared_removed_terms = load_stop_terms(config.STOP_TERMS_PATH)
+
+    return _shared_removed_terms
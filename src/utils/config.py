@@ -1,9 +1,49 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Config(BaseSettings):
     REQUIRED_COLUMNS: list = ['content', 'title', 'url']
     DATABASE_URL: str
+    INDEX_BACKEND: Literal['neo4j', 'index_file'] = 'neo4j'
+    INDEX_FILE_PATH: str = 'data/index'
+    SHARD_DATABASE_URLS: list[str] = []
+    SHARD_INDEX_FILE_PATHS: list[str] = []
+    SINGLE_ROUND_TRIP_RETRIEVAL: bool = False
+    TOP_K_RETRIEVAL: bool = False
+    RETRIEVAL_PLANNER: bool = False
+    PLANNER_ROW_COST: float = 4.0
+    PLANNER_LOG_PATH: str | None = None
+    STATISTICS_CACHE_ENABLED: bool = True
+    STATISTICS_CHECK_INTERVAL: float = 5.0
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_SIZE: int = 1024
+    RESULT_CACHE_TTL: float = 300.0
+    RESULT_CACHE_DEPTH: int = 100
+    DOCUMENT_CACHE_SIZE: int = 10_000
+    SEARCH_MAX_CONCURRENCY: int = 32
+    SEARCH_MAX_PENDING: int = 256
+    SEARCH_TIMEOUT: float = 10.0
+    ASYNC_POOL_SIZE: int = 64
+    ASYNC_CONNECTION_ACQUISITION_TIMEOUT: float = 5.0
+    TEXT_PROCESSING_WORKERS: int = 1
+    TEXT_PROCESSING_CHUNK_SIZE: int = 500
+    FAST_TEXT_PROCESSING: bool = False
+    STOP_TERMS_ENABLED: bool = False
+    STOP_TERMS_PATH: str = 'data/removed_top_terms.csv'
+    STOP_TERMS_COUNT: int = 50
+    STREAMING_BATCH_SIZE: int | None = None
+    COMPRESSED_POSITIONS: bool = True
+    INGESTION_BATCH_SIZE: int = 2000
+    INGESTION_PARALLELISM: int = 4
+    INGESTION_MAX_PARALLELISM: int = 8
+    LEMMA_CACHE_SIZE: int = 100_000
+    LEMMA_CACHE_PATH: str | None = None
+    METRICS_ENABLED: bool = False
+    METRICS_EXPORTERS: list[Literal['json_log', 'prometheus']] = ['json_log']
+    METRICS_LOG_PATH: str | None = None
+    METRICS_PROMETHEUS_PATH: str = 'data/metrics.prom'
 
     model_config = SettingsConfigDict(env_file=".env", env_nested_delimiter='__')
 
@@ -0,0 +1,281 @@
+import atexit
+import json
+import os
+import time
+from contextvars import ContextVar
+from threading import Lock
+
+from src.utils.config import config
+from src.utils.logger import log
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+class Span:
+    """
+    Timed stage of a trace, attributes hold stage results like row counts
+    """
+
+    def __init__(self, name: str, parent: 'Span | None' = None):
+        self.name = name
+        self.parent = parent
+        self.children = []
+        self.attributes = {}
+        self.start = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'duration_ms': self.duration * 1000 if self.duration is not None else None,
+            'attributes': self.attributes,
+            'children': [child.to_dict() for child in self.children]
+        }
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _SpanContext:
+    def __init__(self, metrics: 'Metrics', name: str):
+        self.metrics = metrics
+        self.name = name
+        self.span = None
+        self.token = None
+
+    def __enter__(self) -> Span:
+        parent = self.metrics.current_span.get()
+        self.span = Span(name=self.name, parent=parent)
+        if parent is not None:
+            parent.children.append(self.span)
+
+        self.token = self.metrics.current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.span.duration = time.perf_counter() - self.span.start
+        self.metrics.current_span.reset(self.token)
+        if exc_type is not None:
+            self.span.set(error=exc_type.__name__)
+
+        self.metrics.observe(f'{self.name}_seconds', self.span.duration)
+        if self.span.parent is None:
+            self.metrics.export_trace(self.span)
+
+        return None
+
+
+class JsonLogExporter:
+    """
+    Writes each finished trace as one json line, to path or the log
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._lock = Lock()
+
+    def export_trace(self, span: Span):
+        line = json.dumps({'timestamp': time.time(), 'trace': span.to_dict()}, ensure_ascii=False, default=str)
+        with self._lock:
+            if self.path is None:
+                log(line)
+                return
+
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(line + '\n')
+
+    def export_metrics(self, counters: dict, histograms: dict):
+        pass
+
+
+class PrometheusFileExporter:
+    """
+    Renders counters and histograms in the prometheus text format into a file for the node exporter
+    textfile collector. The file is replaced at most once every interval seconds, and on flush.
+    """
+
+    def __init__(self, path: str, interval: float = 10.0, prefix: str = 'neo_ir_'):
+        self.path = path
+        self.interval = interval
+        self.prefix = prefix
+        self._last_write_time = 0.0
+
+    def export_trace(self, span: Span):
+        pass
+
+    @staticmethod
+    def _escape_label_value(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    @classmethod
+    def _format_labels(cls, labels: tuple, **extra_labels) -> str:
+        labels = dict(labels) | extra_labels
+        if not labels:
+            return ''
+
+        return '{' + ','.join(
+            f'{key}="{cls._escape_label_value(value)}"' for key, value in sorted(labels.items())) + '}'
+
+    def render(self, counters: dict, histograms: dict) -> str:
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f'# TYPE {self.prefix}{name}_total counter')
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f'{self.prefix}{name}_total{self._format_labels(labels)} {value}')
+
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f'# TYPE {self.prefix}{name} histogram')
+            for (histogram_name, labels), histogram in sorted(histograms.items()):
+                if histogram_name != name:
+                    continue
+
+                for bucket, count in zip(histogram.buckets, histogram.cumulative_counts()):
+                    lines.append(f'{self.prefix}{name}_bucket{self._format_labels(labels, le=bucket)} {count}')
+                lines.append(f'{self.prefix}{name}_bucket{self._format_labels(labels, le="+Inf")} {histogram.count}')
+                lines.append(f'{self.prefix}{name}_sum{self._format_labels(labels)} {histogram.total}')
+                lines.append(f'{self.prefix}{name}_count{self._format_labels(labels)} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def export_metrics(self, counters: dict, histograms: dict, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_write_time < self.interval:
+            return
+
+        self._last_write_time = now
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            file.write(self.render(counters=counters, histograms=histograms))
+        os.replace(temporary_path, self.path)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        for index, bucket in enumerate(self.buckets):
+            if value <= bucket:
+                self.counts[index] += 1
+                break
+
+    def copy(self) -> 'Histogram':
+        histogram = Histogram(buckets=self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.count = self.count
+        histogram.total = self.total
+        return histogram
+
+    def cumulative_counts(self) -> list[int]:
+        cumulative, total = [], 0
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+
+        return cumulative
+
+
+class Metrics:
+    """
+    Spans, counters and histograms of search and indexing stages.
+    When disabled every call returns right away and span() returns a shared no-op span.
+    """
+
+    def __init__(self, enabled: bool = False, exporters: list | None = None):
+        self.enabled = enabled
+        self.exporters = exporters or []
+
+        self.current_span = ContextVar('current_span', default=None)
+        self.counters = {}
+        self.histograms = {}
+        self._lock = Lock()
+
+    def span(self, name: str):
+        if not self.enabled:
+            return NOOP_SPAN
+
+        return _SpanContext(metrics=self, name=name)
+
+    def increment(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: tuple = LATENCY_BUCKETS, **labels):
+        if not self.enabled:
+            return
+
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets=buckets)
+            histogram.observe(value)
+
+    def snapshot(self) -> tuple[dict, dict]:
+        """
+        Copies of the counters and histograms, taken under the lock so exporters never see them change
+        """
+        with self._lock:
+            return dict(self.counters), {key: histogram.copy() for key, histogram in self.histograms.items()}
+
+    def export_trace(self, span: Span):
+        if not self.exporters:
+            return
+
+        counters, histograms = self.snapshot()
+        for exporter in self.exporters:
+            exporter.export_trace(span)
+            exporter.export_metrics(counters=counters, histograms=histograms)
+
+    def flush(self):
+        if not self.enabled:
+            return
+
+        counters, histograms = self.snapshot()
+        for exporter in self.exporters:
+            if isinstance(exporter, PrometheusFileExporter):
+                exporter.export_metrics(counters=counters, histograms=histograms, force=True)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+def create_metrics() -> Metrics:
+    exporters = []
+    if 'json_log' in config.METRICS_EXPORTERS:
+        exporters.append(JsonLogExporter(path=config.METRICS_LOG_PATH))
+    if 'prometheus' in config.METRICS_EXPORTERS:
+        exporters.append(PrometheusFileExporter(path=config.METRICS_PROMETHEUS_PATH))
+
+    return Metrics(enabled=config.METRICS_ENABLED, exporters=exporters)
+
+
+metrics = create_metrics()
+atexit.register(metrics.flush)
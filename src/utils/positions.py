@@ -0,0 +1,93 @@
+import numpy as np
+
+# a varint byte holds 7 bits of the value, the high bit marks that more bytes follow
+_VARINT_LIMITS = np.array([1 << 7, 1 << 14, 1 << 21, 1 << 28], dtype=np.int64)
+
+
+def _varint_encode(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    LEB128 bytes of non-negative values and the bytes count of each value
+    """
+    lengths = 1 + (values[:, None] >= _VARINT_LIMITS).sum(axis=1)
+
+    value_indexes = np.repeat(np.arange(len(values)), lengths)
+    value_starts = np.cumsum(lengths) - lengths
+    byte_ranks = np.arange(len(value_indexes)) - np.repeat(value_starts, lengths)
+
+    data = (values[value_indexes] >> (7 * byte_ranks)) & 0x7f
+    data |= (byte_ranks < lengths[value_indexes] - 1).astype(np.int64) << 7
+
+    return data.astype(np.uint8), lengths
+
+
+def _varint_decode(data: np.ndarray) -> np.ndarray:
+    is_last = data < 0x80
+    value_indexes = np.cumsum(is_last) - is_last
+    value_starts = np.flatnonzero(np.diff(value_indexes, prepend=-1))
+    byte_ranks = np.arange(len(data)) - value_starts[value_indexes]
+
+    return np.bincount(value_indexes, weights=(data & 0x7f).astype(np.int64) << (7 * byte_ranks),
+                       minlength=int(is_last.sum())).astype(np.int64)
+
+
+def encode_positions_array(positions: np.ndarray, position_offsets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Positions of many postings (posting i in positions[position_offsets[i]:position_offsets[i + 1]]) as one byte
+    buffer: gaps between consecutive positions of a posting, each a varint. Returns the bytes and the byte offsets
+    of the postings.
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    position_offsets = np.asarray(position_offsets, dtype=np.int64)
+
+    gaps = np.diff(positions, prepend=0)
+    # the first position of a posting is stored as is
+    starts = position_offsets[:-1][np.diff(position_offsets) > 0]
+    gaps[starts] = positions[starts]
+
+    data, lengths = _varint_encode(gaps)
+    byte_offsets = np.zeros(len(positions) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=byte_offsets[1:])
+
+    return data, byte_offsets[position_offsets]
+
+
+def decode_positions_array(data: np.ndarray, byte_offsets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Positions and position offsets of postings encoded by encode_positions_array
+    """
+    data = np.asarray(data, dtype=np.uint8)
+    byte_offsets = np.asarray(byte_offsets, dtype=np.int64)
+
+    gaps = _varint_decode(data)
+    # positions before a byte offset are the last bytes of varints before it
+    last_bytes = np.zeros(len(data) + 1, dtype=np.int64)
+    np.cumsum(data < 0x80, out=last_bytes[1:])
+    position_offsets = last_bytes[byte_offsets]
+
+    positions = np.cumsum(gaps)
+    lengths = np.diff(position_offsets)
+    starts = position_offsets[:-1][lengths > 0]
+    # restart the running sum at every posting
+    positions -= np.repeat(positions[starts] - gaps[starts], lengths[lengths > 0])
+
+    return positions, position_offsets
+
+
+def encode_positions(positions) -> bytes:
+    """
+    Positions of one posting as gaps in varint bytes, the EXISTS_IN.positions value of COMPRESSED_POSITIONS
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    data, _ = encode_positions_array(positions, np.array([0, len(positions)], dtype=np.int64))
+
+    return data.tobytes()
+
+
+def decode_positions(value) -> np.ndarray:
+    """
+    Positions of an EXISTS_IN.positions value, either varint bytes or the list of positions of earlier indexes
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return np.cumsum(_varint_decode(np.frombuffer(value, dtype=np.uint8)))
+
+    return np.asarray(value if value is not None else [], dtype=np.int64)
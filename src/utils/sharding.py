@@ -0,0 +1,15 @@
+import numpy as np
+
+# 2^64 / golden ratio, multiplying by it spreads consecutive doc ids evenly over the high bits
+_FIBONACCI_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def get_shards(doc_ids, shards_count: int) -> np.ndarray:
+    """
+    Shard of each doc id, a fixed hash so that the indexer and later runs agree on the placement of a document
+    """
+    doc_ids = np.asarray(doc_ids, dtype=np.int64).astype(np.uint64)
+    with np.errstate(over='ignore'):
+        hashes = (doc_ids * _FIBONACCI_MULTIPLIER) >> np.uint64(32)
+
+    return (hashes % np.uint64(shards_count)).astype(np.int64)
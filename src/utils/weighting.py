@@ -0,0 +1,20 @@
+import numpy as np
+
+
+def tf_value(term_frequency):
+    return 1 + np.log(term_frequency)
+
+
+def idf_value(document_frequency, total_documents):
+    # integer division, same as `$total_documents / t.document_frequency` in cypher
+    return np.log(total_documents // document_frequency)
+
+
+def add_tf_idf_columns(candidates_df, total_documents: int):
+    """
+    Adds tf_value, idf_value and tf_idf columns from term_frequency and document_frequency
+    """
+    tf_values = tf_value(candidates_df['term_frequency'].astype(float))
+    idf_values = idf_value(candidates_df['document_frequency'].astype('int64'), total_documents)
+
+    return candidates_df.assign(tf_value=tf_values, idf_value=idf_values, tf_idf=tf_values * idf_values)